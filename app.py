@@ -8,6 +8,7 @@ import os
 from datetime import timedelta
 import logging
 from extensions import bcrypt
+from json_provider import MsgspecJSONProvider
 
 db = SQLAlchemy()
 migrate = Migrate()
@@ -19,6 +20,7 @@ def create_app(config_name=None):
         config_name = os.getenv('FLASK_ENV', 'development')
     
     app = Flask(__name__)
+    app.json = MsgspecJSONProvider(app)
     app.config.from_object(config[config_name])
     app.config['JWT_SECRET_KEY'] = 'jwt-secret-key-change-this'  # Change this too
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)  # Token expires in 24 hours
@@ -42,9 +44,27 @@ def create_app(config_name=None):
         db.create_all()
         
 
+    from cache import init_cache
+    init_cache(app)
+
+    from metrics import init_metrics
+    init_metrics(app)
+
+    from query_tracker import init_query_tracker
+    init_query_tracker(app)
+
+    from slow_query_log import init_slow_query_log
+    init_slow_query_log(app)
+
+    from profiling import init_profiling
+    init_profiling(app)
+
     from routes import register_blueprints
     register_blueprints(app)
 
+    from cli import register_commands
+    register_commands(app)
+
     
     @app.route('/')
     def index():
@@ -0,0 +1,265 @@
+"""Bulk loader behind ``flask seed`` for load-test sized datasets.
+
+Activities and their logs are generated column-wise, a batch at a time,
+and written straight through the DBAPI: ``executemany`` of a compiled Core
+``INSERT ... VALUES`` on SQLite (with bulk-load pragmas), ``COPY`` on
+PostgreSQL. Commits happen every ``commit_every`` rows, not per batch.
+Small tables (users, goals, centers) reuse DataGenerator's row dicts.
+"""
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app import db
+from benchmarks.data_generator import DEFAULT_PASSWORD, DataGenerator
+from helper import ENERGY_EMISSIONS, TRANSPORT_EMISSIONS
+from models.activity import Activity, EnergyLog, TransportLog
+from models.discover import Discover
+from models.goal import Goal
+from models.user import User
+
+SQLITE_BULK_PRAGMAS = {
+    'synchronous': 'OFF',
+    'journal_mode': 'MEMORY',
+    'temp_store': 'MEMORY',
+    'cache_size': '-262144',  # 256 MB
+}
+
+NOTE_POOL_SIZE = 512
+
+
+class BulkWriter:
+    """Writes tuples to a table on one raw DBAPI connection."""
+
+    def __init__(self, engine, commit_every):
+        self.engine = engine
+        self.dialect = engine.dialect.name
+        self.commit_every = commit_every
+        self.connection = engine.raw_connection()
+        self.cursor = self.connection.cursor()
+        self._uncommitted = 0
+        self._saved_pragmas = {}
+        self.rows_written = 0
+
+    def __enter__(self):
+        if self.dialect == 'sqlite':
+            for name, value in SQLITE_BULK_PRAGMAS.items():
+                self._saved_pragmas[name] = self.cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                self.cursor.execute(f"PRAGMA {name} = {value}")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.connection.commit()
+            else:
+                self.connection.rollback()
+            for name, value in self._saved_pragmas.items():
+                self.cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            self.cursor.close()
+            self.connection.close()
+        return False
+
+    def write(self, table, columns, rows):
+        if not rows:
+            return
+        if self.dialect == 'postgresql':
+            self._copy(table, columns, rows)
+        else:
+            statement = table.insert().compile(dialect=self.engine.dialect, column_keys=columns)
+            # Columns with Python-side defaults are compiled in even when not supplied
+            missing = [name for name in (statement.positiontup or statement.params) if name not in columns]
+            if missing:
+                filler = tuple(_column_default(table.c[name]) for name in missing)
+                columns = list(columns) + missing
+                rows = [tuple(row) + filler for row in rows]
+            # Compiled parameter order follows the table, not ``columns``
+            order = [columns.index(name) for name in statement.positiontup] if statement.positional else None
+            if order is not None and order != list(range(len(columns))):
+                rows = [tuple(row[i] for i in order) for row in rows]
+            if not statement.positional:
+                rows = [dict(zip(columns, row)) for row in rows]
+            self.cursor.executemany(str(statement), rows)
+        self.rows_written += len(rows)
+        self._uncommitted += len(rows)
+        if self._uncommitted >= self.commit_every:
+            self.connection.commit()
+            self._uncommitted = 0
+
+    def _copy(self, table, columns, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # COPY's CSV format reads an unquoted empty field as NULL
+        writer.writerows(['' if value is None else value for value in row] for row in rows)
+        buffer.seek(0)
+        column_list = ', '.join(columns)
+        self.cursor.copy_expert(f"COPY {table.name} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    def write_dicts(self, table, rows):
+        if rows:
+            columns = list(rows[0])
+            self.write(table, columns, [tuple(row[c] for c in columns) for row in rows])
+
+    def reset_sequences(self, tables):
+        # COPY/explicit ids don't advance PostgreSQL sequences
+        if self.dialect != 'postgresql':
+            return
+        for table in tables:
+            self.cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+            )
+
+
+def _column_default(column):
+    default = column.default
+    if default is None:
+        return None
+    return default.arg(None) if default.is_callable else default.arg
+
+
+def _format_timestamp(value):
+    # Same text layout SQLAlchemy uses for DateTime on SQLite; PostgreSQL parses it too
+    return value.isoformat(sep=' ', timespec='microseconds')
+
+
+def _next_id(model):
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+class ActivityBatchGenerator:
+    """Column-at-a-time generation of activities and their logs."""
+
+    ACTIVITY_COLUMNS = ['id', 'category', 'notes', 'timestamp', 'user_id']
+    ENERGY_COLUMNS = ['id', 'energy_type', 'energy_amount', 'energy_unit', 'co2_emission', 'activity_id']
+    TRANSPORT_COLUMNS = ['id', 'vehicle_type', 'distance', 'co2_emission', 'activity_id']
+
+    def __init__(self, seed, user_ids, notes, alpha=1.2, history_days=180, now=None):
+        self.random = random.Random(seed)
+        self.user_ids = user_ids
+        weights = [self.random.paretovariate(alpha) for _ in user_ids]
+        self.cum_weights = []
+        total = 0.0
+        for weight in weights:
+            total += weight
+            self.cum_weights.append(total)
+        self.notes = notes
+        self.history_seconds = history_days * 86400
+        self.now = now or datetime.utcnow()
+        self.energy = [(k, v) for k, v in ENERGY_EMISSIONS.items() if v > 0]
+        self.transport = list(TRANSPORT_EMISSIONS.items())
+
+    def batch(self, start_id, size):
+        rnd = self.random.random
+        users = self.random.choices(self.user_ids, cum_weights=self.cum_weights, k=size)
+        kinds = [rnd() for _ in range(size)]
+        # Recent days are busier (same skew as DataGenerator)
+        offsets = [self.history_seconds * (1 - rnd() ** 0.5) for _ in range(size)]
+        energy_picks = self.random.choices(self.energy, k=size)
+        transport_picks = self.random.choices(self.transport, k=size)
+        note_count = len(self.notes)
+
+        activities, energy_logs, transport_logs = [], [], []
+        now = self.now
+        for i in range(size):
+            activity_id = start_id + i
+            note = self.notes[int(rnd() * note_count)] if rnd() < 0.3 else None
+            timestamp = _format_timestamp(now - timedelta(seconds=offsets[i]))
+            if kinds[i] < 0.6:
+                vehicle, factor = transport_picks[i]
+                distance = round(1 + rnd() * 119, 1)
+                activities.append((activity_id, 'Transport', note, timestamp, users[i]))
+                transport_logs.append((activity_id, vehicle, distance, distance * factor, activity_id))
+            else:
+                energy_type, factor = energy_picks[i]
+                amount = round(1 + rnd() * 39, 1)
+                activities.append((activity_id, 'Energy', note, timestamp, users[i]))
+                energy_logs.append((activity_id, energy_type, amount, 'kwh', amount * factor, activity_id))
+        return activities, energy_logs, transport_logs
+
+
+def seed_database(users=0, activities=0, centers=0, seed=42, batch_size=20000,
+                  commit_every=500000, progress=None):
+    """Append synthetic rows to the current app's database; returns stats.
+
+    Ids continue from each table's current maximum, so runs can be repeated
+    to grow a dataset. Dates are anchored to midnight UTC, so the same seed
+    on an empty database gives the same data all day.
+    """
+    from extensions import bcrypt
+
+    started = time.perf_counter()
+    engine = db.engine
+    anchor = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    generator = DataGenerator(seed=seed, now=anchor)
+    first_user = _next_id(User)
+    first_activity = max(_next_id(Activity), _next_id(EnergyLog), _next_id(TransportLog))
+    first_goal = _next_id(Goal)
+    first_center = _next_id(Discover)
+    existing_user_ids = db.session.execute(select(User.id)).scalars().all()
+    db.session.close()
+
+    stats = {'users': 0, 'goals': 0, 'activities': 0, 'energy_logs': 0, 'transport_logs': 0, 'centers': 0}
+    with BulkWriter(engine, commit_every) as writer:
+        if users:
+            password_hash = bcrypt.generate_password_hash(DEFAULT_PASSWORD).decode('utf-8')
+            new_ids = list(range(first_user, first_user + users))
+            for start in range(0, users, batch_size):
+                rows = list(generator.users(min(batch_size, users - start), first_user + start, password_hash))
+                for row in rows:
+                    for key in ('created_at', 'updated_at', 'location_geocoded_at'):
+                        row[key] = _format_timestamp(row[key])
+                writer.write_dicts(User.__table__, rows)
+            goals = list(generator.goals(new_ids, first_goal))
+            for row in goals:
+                row['created_at'] = _format_timestamp(row['created_at'])
+                row['updated_at'] = _format_timestamp(row['updated_at'])
+                row['start_date'] = row['start_date'].isoformat()
+                row['end_date'] = row['end_date'].isoformat() if row['end_date'] else None
+            for start in range(0, len(goals), batch_size):
+                writer.write_dicts(Goal.__table__, goals[start:start + batch_size])
+            stats['users'], stats['goals'] = users, len(goals)
+            existing_user_ids = existing_user_ids + new_ids
+
+        if activities:
+            if not existing_user_ids:
+                raise ValueError('Activities need users; pass --users as well')
+            notes = [generator.faker.sentence(nb_words=5) for _ in range(NOTE_POOL_SIZE)]
+            batches = ActivityBatchGenerator(seed, existing_user_ids, notes, now=anchor)
+            for start in range(0, activities, batch_size):
+                size = min(batch_size, activities - start)
+                activity_rows, energy_rows, transport_rows = batches.batch(first_activity + start, size)
+                writer.write(Activity.__table__, ActivityBatchGenerator.ACTIVITY_COLUMNS, activity_rows)
+                writer.write(EnergyLog.__table__, ActivityBatchGenerator.ENERGY_COLUMNS, energy_rows)
+                writer.write(TransportLog.__table__, ActivityBatchGenerator.TRANSPORT_COLUMNS, transport_rows)
+                stats['activities'] += size
+                stats['energy_logs'] += len(energy_rows)
+                stats['transport_logs'] += len(transport_rows)
+                if progress:
+                    progress(stats['activities'], activities)
+
+        if centers:
+            for start in range(0, centers, batch_size):
+                rows = list(generator.recycling_centers(min(batch_size, centers - start), first_center + start))
+                for row in rows:
+                    row['created_at'] = _format_timestamp(row['created_at'])
+                writer.write_dicts(Discover.__table__, rows)
+            stats['centers'] = centers
+
+        writer.reset_sequences([User.__table__, Goal.__table__, Activity.__table__,
+                                EnergyLog.__table__, TransportLog.__table__, Discover.__table__])
+        stats['rows'] = writer.rows_written
+
+    if centers:
+        # Raw inserts skip the ORM events that normally refresh these
+        from services.discover_service import invalidate_discover_indexes
+        invalidate_discover_indexes()
+
+    stats['seconds'] = round(time.perf_counter() - started, 2)
+    stats['rows_per_second'] = round(stats['rows'] / stats['seconds']) if stats['seconds'] else None
+    return stats
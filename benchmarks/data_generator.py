@@ -0,0 +1,182 @@
+"""Synthetic, reproducible data for benchmarks and local seeding.
+
+Row generators yield plain dicts ready for a Core ``insert()``, with
+explicit primary keys so activities and their logs can be written in bulk
+without round trips for generated ids.
+"""
+import random
+from datetime import datetime, timedelta
+
+from faker import Faker
+
+from helper import ENERGY_EMISSIONS, TRANSPORT_EMISSIONS
+
+# Population centres that recycling centers and places cluster around
+TOWNS = (
+    ('Nairobi', -1.2921, 36.8219, 0.45),
+    ('Mombasa', -4.0435, 39.6682, 0.15),
+    ('Kisumu', -0.0917, 34.7680, 0.10),
+    ('Nakuru', -0.3031, 36.0800, 0.10),
+    ('Eldoret', 0.5143, 35.2698, 0.08),
+    ('Thika', -1.0333, 37.0693, 0.06),
+    ('Nyeri', -0.4201, 36.9476, 0.06),
+)
+
+PLACE_CATEGORIES = {
+    'Recycling Center': ['recycling', 'plastic', 'paper', 'glass', 'e-waste'],
+    'Farmers Market': ['organic', 'local', 'produce', 'market'],
+    'EV Charging': ['electric', 'charging', 'ev'],
+    'Bike Share': ['bike', 'cycling', 'transport'],
+    'Compost Site': ['compost', 'organic waste', 'garden'],
+    'Thrift Store': ['second hand', 'clothes', 'reuse'],
+}
+
+GOAL_TYPES = ('daily', 'weekly', 'monthly')
+GOAL_TARGETS = {'daily': (2, 15), 'weekly': (15, 80), 'monthly': (60, 300)}
+
+# Everyday amounts, so emissions land in a plausible range
+ENERGY_AMOUNTS = (1, 40)  # kWh, kg or litres depending on the type
+TRANSPORT_DISTANCES = (1, 120)  # km
+
+DEFAULT_PASSWORD = 'benchmark-password'
+
+
+class DataGenerator:
+    def __init__(self, seed=42, now=None, history_days=180):
+        self.random = random.Random(seed)
+        self.faker = Faker()
+        self.faker.seed_instance(seed)
+        self.now = now or datetime.utcnow()
+        self.history_days = history_days
+
+    def _point_near_town(self, spread_deg=0.08):
+        name, lat, lng, _ = self.random.choices(TOWNS, weights=[t[3] for t in TOWNS])[0]
+        return name, lat + self.random.gauss(0, spread_deg), lng + self.random.gauss(0, spread_deg)
+
+    def _timestamp(self):
+        # Recent days are busier, like a growing user base
+        days_ago = self.history_days * (1 - self.random.random() ** 0.5)
+        return self.now - timedelta(days=days_ago)
+
+    def users(self, count, start_id=1, password_hash=None):
+        for i in range(count):
+            user_id = start_id + i
+            first, last = self.faker.first_name(), self.faker.last_name()
+            town, lat, lng = self._point_near_town(0.05)
+            created_at = self.now - timedelta(days=self.random.uniform(0, self.history_days))
+            yield {
+                'id': user_id,
+                'username': f"{first.lower()}{last.lower()}{user_id}",
+                'email': f"user{user_id}@example.com",
+                'password_hash': password_hash,
+                'name': first,
+                'bio': self.faker.sentence(nb_words=10),
+                'location': town,
+                'latitude': lat,
+                'longitude': lng,
+                'location_geocoded_at': created_at,
+                'lifestyle_type': self.random.choice(('urban', 'suburban', 'rural')),
+                'carbon_goal': round(self.random.uniform(50, 400), 1),
+                'is_active': True,
+                'is_verified': self.random.random() < 0.7,
+                'created_at': created_at,
+                'updated_at': created_at,
+            }
+
+    def activity_counts(self, user_ids, total, alpha=1.2):
+        """Split ``total`` activities across users with a Pareto (power-law) skew."""
+        weights = [self.random.paretovariate(alpha) for _ in user_ids]
+        counts = dict.fromkeys(user_ids, 0)
+        for user_id in self.random.choices(user_ids, weights=weights, k=total):
+            counts[user_id] += 1
+        return counts
+
+    def activities(self, user_ids, total, start_id=1, alpha=1.2):
+        """Yield (activity, energy_log or None, transport_log or None) row triples."""
+        energy_types = [k for k, v in ENERGY_EMISSIONS.items() if v > 0] or list(ENERGY_EMISSIONS)
+        vehicle_types = list(TRANSPORT_EMISSIONS)
+        activity_id = start_id
+        for user_id, count in self.activity_counts(user_ids, total, alpha).items():
+            for _ in range(count):
+                is_transport = self.random.random() < 0.6
+                activity = {
+                    'id': activity_id,
+                    'category': 'Transport' if is_transport else 'Energy',
+                    'notes': self.faker.sentence(nb_words=5) if self.random.random() < 0.3 else None,
+                    'timestamp': self._timestamp(),
+                    'user_id': user_id,
+                }
+                if is_transport:
+                    vehicle = self.random.choice(vehicle_types)
+                    distance = round(self.random.uniform(*TRANSPORT_DISTANCES), 1)
+                    yield activity, None, {
+                        'id': activity_id,
+                        'vehicle_type': vehicle,
+                        'distance': distance,
+                        'co2_emission': distance * TRANSPORT_EMISSIONS[vehicle],
+                        'activity_id': activity_id,
+                    }
+                else:
+                    energy_type = self.random.choice(energy_types)
+                    amount = round(self.random.uniform(*ENERGY_AMOUNTS), 1)
+                    yield activity, {
+                        'id': activity_id,
+                        'energy_type': energy_type,
+                        'energy_amount': amount,
+                        'energy_unit': 'kwh',
+                        'co2_emission': amount * ENERGY_EMISSIONS[energy_type],
+                        'activity_id': activity_id,
+                    }, None
+                activity_id += 1
+
+    def goals(self, user_ids, start_id=1, max_per_user=2):
+        goal_id = start_id
+        today = self.now.date()
+        for user_id in user_ids:
+            for goal_type in self.random.sample(GOAL_TYPES, self.random.randint(0, max_per_user)):
+                start = today - timedelta(days=self.random.randint(0, 60))
+                created_at = datetime.combine(start, datetime.min.time())
+                yield {
+                    'id': goal_id,
+                    'user_id': user_id,
+                    'goal_type': goal_type,
+                    'target_value': round(self.random.uniform(*GOAL_TARGETS[goal_type]), 1),
+                    'start_date': start,
+                    'end_date': start + timedelta(days=90) if self.random.random() < 0.5 else None,
+                    'is_active': self.random.random() < 0.8,
+                    'is_achieved': False,
+                    'title': f"{goal_type.capitalize()} carbon goal",
+                    'description': None,
+                    'category': self.random.choice(('all', 'transport', 'energy')),
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                }
+                goal_id += 1
+
+    def recycling_centers(self, count, start_id=1):
+        for i in range(count):
+            town, lat, lng = self._point_near_town()
+            yield {
+                'id': start_id + i,
+                'name': f"{self.faker.last_name()} {self.random.choice(('Recycling', 'Waste Depot', 'E-Waste Centre', 'Collection Point'))}",
+                'address': f"{self.faker.street_address()}, {town}",
+                'latitude': lat,
+                'longitude': lng,
+                'created_at': self.now - timedelta(days=self.random.uniform(0, 720)),
+            }
+
+    def places(self, count, start_id=1):
+        """Places in the shape of ``data/places.json`` (used by /api/discover/search)."""
+        categories = list(PLACE_CATEGORIES)
+        for i in range(count):
+            town, lat, lng = self._point_near_town()
+            category = self.random.choice(categories)
+            yield {
+                'id': start_id + i,
+                'name': f"{self.faker.last_name()} {category}",
+                'category': category,
+                'rating': round(self.random.uniform(2.5, 5.0), 1),
+                'lat': lat,
+                'lng': lng,
+                'keywords': self.random.sample(PLACE_CATEGORIES[category], 2) + [town.lower()],
+            }
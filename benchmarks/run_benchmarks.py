@@ -0,0 +1,246 @@
+"""Endpoint benchmarks against synthetic data at several scales.
+
+Each scale gets a fresh in-memory database seeded by DataGenerator, then
+the real blueprints are driven through the Flask test client. Latency
+percentiles, throughput and SQL statements per request are written to a
+JSON file; pass ``--compare`` with an earlier file to see the change.
+
+    python -m benchmarks.run_benchmarks --scales small,medium
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/before.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import insert
+
+from benchmarks.data_generator import DEFAULT_PASSWORD, DataGenerator
+
+SCALES = {
+    'small': {'users': 50, 'activities': 2000, 'centers': 200, 'places': 300},
+    'medium': {'users': 500, 'activities': 20000, 'centers': 2000, 'places': 1500},
+    'large': {'users': 2000, 'activities': 100000, 'centers': 10000, 'places': 5000},
+}
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed(app, sizes, seed_value=42, batch_size=2000):
+    """Fill the app's database and the places list for one scale."""
+    from app import db
+    from extensions import bcrypt
+    from models.activity import Activity, EnergyLog, TransportLog
+    from models.discover import Discover
+    from models.goal import Goal
+    from models.user import User
+    from services.discover_service import ALL_PLACES, invalidate_discover_indexes
+
+    generator = DataGenerator(seed=seed_value)
+    with app.app_context():
+        db.create_all()
+        # One real hash shared by every user keeps seeding fast but logins honest
+        password_hash = bcrypt.generate_password_hash(DEFAULT_PASSWORD).decode('utf-8')
+        user_ids = list(range(1, sizes['users'] + 1))
+        for batch in _batched(generator.users(sizes['users'], password_hash=password_hash), batch_size):
+            db.session.execute(insert(User), batch)
+
+        pending = {Activity: [], EnergyLog: [], TransportLog: []}
+
+        def flush_activities():
+            # Parents first so the log foreign keys always resolve
+            for model, rows in pending.items():
+                if rows:
+                    db.session.execute(insert(model), rows)
+                    rows.clear()
+
+        for activity, energy_log, transport_log in generator.activities(user_ids, sizes['activities']):
+            pending[Activity].append(activity)
+            if energy_log:
+                pending[EnergyLog].append(energy_log)
+            if transport_log:
+                pending[TransportLog].append(transport_log)
+            if len(pending[Activity]) >= batch_size:
+                flush_activities()
+        flush_activities()
+
+        for batch in _batched(generator.goals(user_ids), batch_size):
+            db.session.execute(insert(Goal), batch)
+        for batch in _batched(generator.recycling_centers(sizes['centers']), batch_size):
+            db.session.execute(insert(Discover), batch)
+        db.session.commit()
+        invalidate_discover_indexes()
+
+    ALL_PLACES[:] = list(generator.places(sizes['places']))
+    return generator
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(client, make_request, count, warmup=5):
+    """Time ``count`` calls of ``make_request(client, i)``."""
+    for i in range(warmup):
+        make_request(client, -1 - i)
+    latencies, errors, queries = [], 0, []
+    started = time.perf_counter()
+    for i in range(count):
+        t0 = time.perf_counter()
+        response = make_request(client, i)
+        latencies.append(time.perf_counter() - t0)
+        if response.status_code >= 400:
+            errors += 1
+        if 'X-Query-Count' in response.headers:
+            queries.append(int(response.headers['X-Query-Count']))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        'requests': count,
+        'errors': errors,
+        'throughput_rps': round(count / elapsed, 1) if elapsed else None,
+        'mean_ms': ms(sum(latencies) / len(latencies)) if latencies else None,
+        'p50_ms': ms(_percentile(latencies, 50)),
+        'p95_ms': ms(_percentile(latencies, 95)),
+        'p99_ms': ms(_percentile(latencies, 99)),
+        'queries_per_request': round(sum(queries) / len(queries), 1) if queries else None,
+    }
+
+
+def run_scale(name, sizes, requests, auth_requests, seed_value):
+    from flask_jwt_extended import create_access_token
+
+    from app import create_app
+
+    app = create_app('testing')
+    app.config['QUERY_BUDGET_STRICT'] = False  # measure, don't fail
+    t0 = time.perf_counter()
+    generator = seed(app, sizes, seed_value)
+    seed_seconds = time.perf_counter() - t0
+
+    rng = generator.random
+    user_ids = list(range(1, sizes['users'] + 1))
+    with app.app_context():
+        tokens = {uid: create_access_token(identity=f"user{uid}@example.com") for uid in user_ids}
+    search_terms = ['', 'recycling', 'market', 'charging', 'compost', 'nairobi', 'bike']
+
+    def auth(uid):
+        return {'Authorization': f"Bearer {tokens[uid]}"}
+
+    def pick_user(i):
+        return user_ids[(i * 7919) % len(user_ids)]
+
+    endpoints = {
+        'GET /api/activity/activities': (requests, lambda c, i: c.get(
+            '/api/activity/activities', headers=auth(pick_user(i)))),
+        'GET /api/activity/summary': (requests, lambda c, i: c.get(
+            '/api/activity/summary', headers=auth(pick_user(i)))),
+        'GET /api/discover/search': (requests, lambda c, i: c.get(
+            '/api/discover/search', query_string={
+                'q': search_terms[i % len(search_terms)],
+                'lat': -1.2921 + rng.uniform(-0.1, 0.1), 'lng': 36.8219 + rng.uniform(-0.1, 0.1)})),
+        'POST /api/user/login': (auth_requests, lambda c, i: c.post(
+            '/api/user/login', json={'email': f"user{pick_user(i)}@example.com", 'password': DEFAULT_PASSWORD})),
+        'POST /api/user/register': (auth_requests, lambda c, i: c.post(
+            '/api/user/register', json={'email': f"new{i}_{name}@example.com", 'username': f"new{i}_{name}",
+                                        'password': DEFAULT_PASSWORD})),
+    }
+
+    results = {}
+    client = app.test_client()
+    for label, (count, make_request) in endpoints.items():
+        # Routes print debug lines per request; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[label] = measure(client, make_request, count)
+        print(f"  {label:<32} p50 {results[label]['p50_ms']:>8} ms  p95 {results[label]['p95_ms']:>8} ms  "
+              f"{results[label]['throughput_rps']:>8} req/s")
+    return {'sizes': sizes, 'seed_seconds': round(seed_seconds, 2), 'endpoints': results}
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current, previous):
+    print('\np95 change vs baseline:')
+    for scale, data in current['scales'].items():
+        before = previous.get('scales', {}).get(scale)
+        if not before:
+            continue
+        for label, stats in data['endpoints'].items():
+            old = before['endpoints'].get(label, {}).get('p95_ms')
+            new = stats['p95_ms']
+            if old and new:
+                print(f"  {scale:<7} {label:<32} {old:>9} -> {new:>9} ms ({(new - old) / old * 100:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default='small,medium', help=f"comma-separated: {', '.join(SCALES)}")
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per read endpoint')
+    parser.add_argument('--auth-requests', type=int, default=20, help='timed login/register requests (bcrypt-bound)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='earlier results file to diff against')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('CHAT_BACKEND', 'stub')
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'requests': args.requests,
+            'auth_requests': args.auth_requests,
+        },
+        'scales': {},
+    }
+    for name in [s.strip() for s in args.scales.split(',') if s.strip()]:
+        if name not in SCALES:
+            parser.error(f"unknown scale: {name}")
+        print(f"[{name}] {SCALES[name]}")
+        report['scales'][name] = run_scale(name, SCALES[name], args.requests, args.auth_requests, args.seed)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""Shared application cache for service functions.
+
+``@cached(namespace, tags=...)`` memoizes a function in the configured
+cachelib backend: ``simple`` (per process), ``filesystem`` or ``sqlite``
+(one file shared by every worker), or ``null``. Keys carry the current
+version of each tag, so invalidating a tag just gives it a new version and
+old entries age out on their own. ``invalidate_on_commit`` ties tags to
+model write events, and ``TaggedSnapshot`` rebuilds an in-process
+structure once its tag has been invalidated by any process.
+"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from cachelib import BaseCache, FileSystemCache, NullCache, SimpleCache
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+_TAG_PREFIX = 'tag:'
+
+
+class SQLiteCache(BaseCache):
+    """cachelib backend on a SQLite file, so gunicorn workers share entries."""
+
+    # Expired rows are swept, and the table trimmed, once every this many writes
+    PRUNE_EVERY = 100
+
+    def __init__(self, path, default_timeout=300, threshold=10000):
+        super().__init__(default_timeout)
+        self.path = path
+        self.threshold = threshold
+        self._conn = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connection(self):
+        # Not opened in __init__: the module is imported before gunicorn forks
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS app_cache ('
+                ' key TEXT PRIMARY KEY,'
+                ' value BLOB NOT NULL,'
+                ' expires_at REAL NOT NULL)'
+            )
+            self._conn = conn
+        return self._conn
+
+    def _expires_at(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return time.time() + timeout if timeout else 0
+
+    def get(self, key):
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    'SELECT value FROM app_cache WHERE key = ? AND (expires_at = 0 OR expires_at > ?)',
+                    (key, time.time())
+                ).fetchone()
+            return pickle.loads(row[0]) if row else None
+        except (sqlite3.Error, pickle.PickleError) as e:
+            print(f"Cache read failed for {key}: {e}")
+            return None
+
+    def _write(self, sql, key, value, timeout):
+        try:
+            blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                conn = self._connection()
+                cursor = conn.execute(sql, (key, blob, self._expires_at(timeout)))
+                self._writes += 1
+                if self._writes % self.PRUNE_EVERY == 0:
+                    self._prune(conn)
+            return cursor.rowcount > 0
+        except (sqlite3.Error, pickle.PickleError) as e:
+            print(f"Cache write failed for {key}: {e}")
+            return False
+
+    def set(self, key, value, timeout=None):
+        return self._write('INSERT OR REPLACE INTO app_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                           key, value, timeout)
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            try:
+                self._connection().execute(
+                    'DELETE FROM app_cache WHERE key = ? AND expires_at != 0 AND expires_at <= ?', (key, time.time())
+                )
+            except sqlite3.Error:
+                pass
+        return self._write('INSERT OR IGNORE INTO app_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                           key, value, timeout)
+
+    def delete(self, key):
+        try:
+            with self._lock:
+                return self._connection().execute('DELETE FROM app_cache WHERE key = ?', (key,)).rowcount > 0
+        except sqlite3.Error:
+            return False
+
+    def has(self, key):
+        return self.get(key) is not None
+
+    def clear(self):
+        try:
+            with self._lock:
+                self._connection().execute('DELETE FROM app_cache')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _prune(self, conn):
+        conn.execute('DELETE FROM app_cache WHERE expires_at != 0 AND expires_at <= ?', (time.time(),))
+        # INSERT OR REPLACE gives a fresh rowid, so low rowids are the oldest writes
+        excess = conn.execute('SELECT COUNT(*) FROM app_cache').fetchone()[0] - self.threshold
+        if excess > 0:
+            conn.execute('DELETE FROM app_cache WHERE rowid IN '
+                         '(SELECT rowid FROM app_cache ORDER BY rowid LIMIT ?)', (excess,))
+
+
+def _make_backend(config):
+    kind = config.get('CACHE_TYPE', 'simple')
+    threshold = config.get('CACHE_THRESHOLD', 5000)
+    # Entries always pass an explicit timeout; 0 keeps tag versions around
+    if kind == 'simple':
+        return SimpleCache(threshold=threshold, default_timeout=0)
+    if kind == 'filesystem':
+        return FileSystemCache(config['CACHE_DIR'], threshold=threshold, default_timeout=0)
+    if kind == 'sqlite':
+        return SQLiteCache(config['CACHE_SQLITE_PATH'], default_timeout=0, threshold=threshold)
+    if kind == 'null':
+        return NullCache()
+    raise ValueError(f"Unknown CACHE_TYPE: {kind}")
+
+
+class AppCache:
+    def __init__(self):
+        self.backend = SimpleCache(default_timeout=0)
+        self.prefix = ''
+        self.default_timeout = 300
+        self._hits = Counter()
+        self._misses = Counter()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.backend = _make_backend(app.config)
+        self.prefix = app.config.get('CACHE_KEY_PREFIX', '')
+        self.default_timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+
+    def _tag_versions(self, tags):
+        if not tags:
+            return ()
+        keys = [self.prefix + _TAG_PREFIX + tag for tag in tags]
+        versions = list(self.backend.get_many(*keys))
+        for i, version in enumerate(versions):
+            if version is None:
+                # A lost version (evicted, new backend) must not revive old entries
+                self.backend.add(keys[i], time.time_ns(), timeout=0)
+                versions[i] = self.backend.get(keys[i])
+        return tuple(versions)
+
+    def tag_version(self, tag):
+        """Current version of ``tag``; it changes whenever the tag is invalidated."""
+        return self._tag_versions((tag,))[0]
+
+    def invalidate_tags(self, *tags):
+        for tag in tags:
+            self.backend.set(self.prefix + _TAG_PREFIX + tag, time.time_ns(), timeout=0)
+
+    def claim(self, key, timeout):
+        """Store ``key`` only if absent; True for the first caller in any process."""
+        return bool(self.backend.add(self.prefix + key, 1, timeout=max(1, int(timeout))))
+
+    def key(self, namespace, args, kwargs, tags):
+        raw = repr((args, sorted(kwargs.items()), tags, self._tag_versions(tags)))
+        return f"{self.prefix}{namespace}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+    def get_or_compute(self, namespace, fn, args, kwargs, timeout=None, tags=()):
+        key = self.key(namespace, args, kwargs, tags)
+        entry = self.backend.get(key)
+        if entry is not None:
+            with self._lock:
+                self._hits[namespace] += 1
+            return entry[0]
+        with self._lock:
+            self._misses[namespace] += 1
+        value = fn(*args, **kwargs)
+        # Wrapped so a cached None is still a hit
+        self.backend.set(key, (value,), timeout=self.default_timeout if timeout is None else timeout)
+        return value
+
+    def stats(self):
+        with self._lock:
+            namespaces = sorted(set(self._hits) | set(self._misses))
+            return {
+                'backend': type(self.backend).__name__,
+                'namespaces': {
+                    name: {'hits': self._hits[name], 'misses': self._misses[name]} for name in namespaces
+                },
+            }
+
+
+app_cache = AppCache()
+
+
+def cached(namespace, timeout=None, tags=None):
+    """Memoize a service function; ``tags`` is a list or a function of its arguments."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            entry_tags = tags(*args, **kwargs) if callable(tags) else tags
+            return app_cache.get_or_compute(namespace, fn, args, kwargs, timeout, tuple(entry_tags or ()))
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
+
+
+class TaggedSnapshot:
+    """A structure built from the database and kept in this process.
+
+    Only the version of ``tag`` is read from the shared backend on each
+    ``get``, so an invalidation committed by another worker (or a CLI
+    run) is picked up on the next call. ``ttl`` bounds staleness when the
+    backend is not shared between processes (``simple``).
+    """
+
+    def __init__(self, tag, build, ttl):
+        self.tag = tag
+        self._build = build
+        self.ttl = ttl
+        self._entry = None  # (value, tag version, expires_at)
+        self._lock = threading.Lock()
+
+    def _fresh(self, entry, version, now):
+        return entry is not None and entry[1] == version and entry[2] > now
+
+    def get(self):
+        version = app_cache.tag_version(self.tag)
+        now = time.monotonic()
+        entry = self._entry
+        if not self._fresh(entry, version, now):
+            with self._lock:
+                entry = self._entry
+                if not self._fresh(entry, version, now):
+                    # Version read before building: a write during the build triggers another one
+                    entry = self._entry = (self._build(), version, now + self.ttl)
+        return entry[0]
+
+    def invalidate(self):
+        self._entry = None
+
+
+def invalidate_on_commit(model, tags):
+    """Invalidate ``tags(instance)`` once a session that wrote ``model`` commits."""
+    def _mark(mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault('cache_tags', set()).update(tags(target))
+
+    for event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(model, event_name, _mark)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    # Only once the change is visible to other sessions and workers
+    tags = session.info.pop('cache_tags', None)
+    if tags:
+        app_cache.invalidate_tags(*tags)
+
+
+def init_cache(app):
+    app_cache.init_app(app)
@@ -0,0 +1,62 @@
+import click
+
+
+def register_commands(app):
+
+    @app.cli.command('import-centers')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'geojson']), default=None,
+                  help='Input format (detected from the file extension by default).')
+    @click.option('--batch-size', default=500, show_default=True, help='Rows per INSERT/commit.')
+    @click.option('--dedupe-metres', default=25.0, show_default=True,
+                  help='Treat similarly named centers closer than this as duplicates.')
+    def import_centers(path, fmt, batch_size, dedupe_metres):
+        """Bulk import recycling centers from a CSV or GeoJSON file."""
+        from services.recycling_import import detect_format, iter_records, import_recycling_centers
+
+        fmt = fmt or detect_format(path)
+        if fmt is None:
+            raise click.UsageError('Could not detect the file format; pass --format')
+
+        with open(path, 'rb') as f:
+            stats = import_recycling_centers(
+                iter_records(f, fmt),
+                batch_size=batch_size,
+                dedupe_metres=dedupe_metres
+            )
+
+        click.echo(
+            f"Read {stats['read']}, inserted {stats['inserted']}, "
+            f"skipped {stats['duplicates']} duplicates and {stats['invalid']} invalid rows"
+        )
+
+    @app.cli.command('seed')
+    @click.option('--users', default=1000, show_default=True, help='Users to add (each gets 0-2 goals).')
+    @click.option('--activities', default=100000, show_default=True,
+                  help='Activities to add, each with an energy or transport log.')
+    @click.option('--centers', default=0, show_default=True, help='Recycling centers to add.')
+    @click.option('--seed', 'seed_value', default=42, show_default=True, help='Random seed for reproducible data.')
+    @click.option('--batch-size', default=20000, show_default=True, help='Rows generated and sent per batch.')
+    @click.option('--commit-every', default=500000, show_default=True, help='Rows per transaction.')
+    def seed(users, activities, centers, seed_value, batch_size, commit_every):
+        """Bulk load synthetic users, activities and centers for load tests."""
+        from benchmarks.bulk_seed import seed_database
+
+        def progress(done, total):
+            click.echo(f"  {done:,}/{total:,} activities", err=True)
+
+        stats = seed_database(
+            users=users,
+            activities=activities,
+            centers=centers,
+            seed=seed_value,
+            batch_size=batch_size,
+            commit_every=commit_every,
+            progress=progress if activities >= 10 * batch_size else None
+        )
+        click.echo(
+            f"Inserted {stats['users']:,} users, {stats['goals']:,} goals, {stats['activities']:,} activities "
+            f"({stats['energy_logs']:,} energy / {stats['transport_logs']:,} transport logs) and "
+            f"{stats['centers']:,} centers: {stats['rows']:,} rows in {stats['seconds']}s "
+            f"({stats['rows_per_second']:,} rows/s)"
+        )
@@ -1,9 +1,12 @@
 import os
 from datetime import timedelta
 
+basedir = os.path.abspath(os.path.dirname(__file__))
+DEFAULT_SECRET_KEY = 'dev-secret-key-change-in-production'
+
 class Config:
     """Base configuration"""
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
+    SECRET_KEY = os.environ.get('SECRET_KEY') or DEFAULT_SECRET_KEY
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
     
@@ -12,12 +15,115 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     
+    # Shared secret for admin-only endpoints (X-Admin-Token); unset disables them
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    
+    # Prometheus metrics at /metrics (per worker process)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() != 'false'
+    
+    # Per-request SQL tracking: N+1 warnings and @query_budget checks
+    QUERY_TRACKER_ENABLED = False
+    QUERY_BUDGET_STRICT = False  # raise instead of logging when a budget is exceeded
+    QUERY_N_PLUS_ONE_THRESHOLD = 5  # identical statements with different parameters
+    
+    # Single-request profiling via a signed X-Profile-Token header; stays off
+    # until PROFILING_SECRET (never the public default key) signs the tokens
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'true').lower() != 'false'
+    PROFILING_SECRET = os.environ.get('PROFILING_SECRET')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(basedir, 'instance', 'profiles')
+    PROFILE_TOKEN_MAX_AGE = int(os.environ.get('PROFILE_TOKEN_MAX_AGE', 15 * 60))  # seconds
+    PROFILE_SAMPLE_INTERVAL = 0.001  # seconds between stack samples
+    
+    # Slow-query log: statements over the threshold, with their EXPLAIN plan
+    SLOW_QUERY_LOG_ENABLED = os.environ.get('SLOW_QUERY_LOG_ENABLED', 'true').lower() != 'false'
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+    SLOW_QUERY_LOG_PATH = os.environ.get('SLOW_QUERY_LOG_PATH') or os.path.join(basedir, 'instance', 'slow_queries.log')
+    SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS = 5
+    SLOW_QUERY_EXPLAIN = True
+    # PostgreSQL only; EXPLAIN ANALYZE re-runs the statement (rolled back afterwards)
+    SLOW_QUERY_EXPLAIN_ANALYZE = os.environ.get('SLOW_QUERY_EXPLAIN_ANALYZE', 'false').lower() == 'true'
+    
+    # Shared cache for service functions: 'sqlite' (shared by workers), 'filesystem', 'simple' or 'null'
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'sqlite')
+    CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH') or os.path.join(basedir, 'instance', 'app_cache.db')
+    CACHE_DIR = os.environ.get('CACHE_DIR') or os.path.join(basedir, 'instance', 'cache')
+    CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 300))  # seconds
+    CACHE_THRESHOLD = 10000  # max entries before the oldest are dropped
+    CACHE_KEY_PREFIX = 'ecotrack:'
+    # In-process recycling-center/cluster indexes: rebuilt when another process
+    # invalidates them through the shared cache, and at least this often (seconds)
+    DISCOVER_INDEX_TTL = int(os.environ.get('DISCOVER_INDEX_TTL', 300))
+    
     # CORS Configuration
     CORS_HEADERS = 'Content-Type'
     
     # Pagination
     ITEMS_PER_PAGE = 20
 
+    # Chatbot model backend: 'gemini', or 'stub' for offline benchmarks
+    CHAT_BACKEND = os.environ.get('CHAT_BACKEND', 'gemini')
+    CHAT_STUB_LATENCY = float(os.environ.get('CHAT_STUB_LATENCY', 0))  # seconds per reply
+    CHAT_STUB_CHUNK_DELAY = float(os.environ.get('CHAT_STUB_CHUNK_DELAY', 0))  # seconds per streamed chunk
+
+    # Chatbot session store
+    CHAT_MAX_SESSIONS = int(os.environ.get('CHAT_MAX_SESSIONS', 500))
+    CHAT_SESSION_IDLE_TTL = int(os.environ.get('CHAT_SESSION_IDLE_TTL', 30 * 60))  # seconds
+    CHAT_MAX_HISTORY_BYTES = int(os.environ.get('CHAT_MAX_HISTORY_BYTES', 64 * 1024))  # per session
+
+    # Chatbot calls run on a dedicated bounded pool
+    CHAT_EXECUTOR_WORKERS = int(os.environ.get('CHAT_EXECUTOR_WORKERS', 8))
+    CHAT_EXECUTOR_QUEUE = int(os.environ.get('CHAT_EXECUTOR_QUEUE', 16))
+    # Calls for one user share a chat session, which isn't thread-safe; ChatbotModel
+    # serialises them anyway, so a higher limit only lets them queue
+    CHAT_MAX_IN_FLIGHT_PER_USER = int(os.environ.get('CHAT_MAX_IN_FLIGHT_PER_USER', 1))
+    CHAT_REQUEST_TIMEOUT = float(os.environ.get('CHAT_REQUEST_TIMEOUT', 30))  # seconds
+
+    # Durable chat history (chat_turns), written in batches
+    CHAT_PERSIST_BATCH_SIZE = int(os.environ.get('CHAT_PERSIST_BATCH_SIZE', 50))
+    CHAT_PERSIST_FLUSH_INTERVAL = float(os.environ.get('CHAT_PERSIST_FLUSH_INTERVAL', 2.0))  # seconds
+    CHAT_PERSIST_MAX_PENDING = int(os.environ.get('CHAT_PERSIST_MAX_PENDING', 5000))
+    CHAT_REHYDRATE_TURNS = int(os.environ.get('CHAT_REHYDRATE_TURNS', 20))
+    CHAT_HISTORY_PAGE_SIZE = 20
+    CHAT_HISTORY_MAX_PAGE_SIZE = 100
+
+    # History compaction: keep the last turns verbatim, summarize the rest
+    CHAT_HISTORY_TOKEN_BUDGET = int(os.environ.get('CHAT_HISTORY_TOKEN_BUDGET', 3000))  # estimated tokens
+    CHAT_HISTORY_KEEP_TURNS = int(os.environ.get('CHAT_HISTORY_KEEP_TURNS', 4))
+    CHAT_SUMMARY_MAX_TOKENS = int(os.environ.get('CHAT_SUMMARY_MAX_TOKENS', 300))
+
+    # First-turn answer cache for repeated FAQ-style questions
+    CHAT_ANSWER_CACHE_SIZE = int(os.environ.get('CHAT_ANSWER_CACHE_SIZE', 1000))
+    CHAT_ANSWER_CACHE_TTL = int(os.environ.get('CHAT_ANSWER_CACHE_TTL', 24 * 3600))  # seconds
+    CHAT_ANSWER_CACHE_SIMILARITY = float(os.environ.get('CHAT_ANSWER_CACHE_SIMILARITY', 0.6))  # trigram Jaccard
+
+    # Per-user emissions digest injected into signed-in users' chat turns
+    CHAT_CONTEXT_TTL = int(os.environ.get('CHAT_CONTEXT_TTL', 15 * 60))  # seconds
+    CHAT_CONTEXT_MAX_USERS = int(os.environ.get('CHAT_CONTEXT_MAX_USERS', 2000))
+    CHAT_CONTEXT_WINDOW_DAYS = 30
+    CHAT_CONTEXT_TOP_SOURCES = 3
+
+    # Geocoding cache
+    GEOCODE_CACHE_PATH = os.environ.get('GEOCODE_CACHE_PATH') or \
+        os.path.join(basedir, 'instance', 'geocode_cache.db')
+    GEOCODE_CACHE_TTL = int(os.environ.get('GEOCODE_CACHE_TTL', 30 * 24 * 3600))  # 30 days
+    GEOCODE_NEGATIVE_TTL = int(os.environ.get('GEOCODE_NEGATIVE_TTL', 6 * 3600))  # 6 hours for misses
+    GEOCODE_CACHE_MAX_ENTRIES = int(os.environ.get('GEOCODE_CACHE_MAX_ENTRIES', 50000))
+    GEOCODE_REVERSE_PRECISION = 3  # decimal places, ~110 m grid
+
+    # Nominatim usage policy allows about 1 request per second
+    NOMINATIM_URL = os.environ.get('NOMINATIM_URL') or 'https://nominatim.openstreetmap.org'
+    NOMINATIM_RATE_LIMIT = float(os.environ.get('NOMINATIM_RATE_LIMIT', 1.0))  # requests/second
+    NOMINATIM_BURST = 1
+    NOMINATIM_MAX_QUEUE = int(os.environ.get('NOMINATIM_MAX_QUEUE', 5))
+    NOMINATIM_MAX_QUEUE_WAIT = float(os.environ.get('NOMINATIM_MAX_QUEUE_WAIT', 3.0))  # seconds
+    NOMINATIM_TIMEOUT = float(os.environ.get('NOMINATIM_TIMEOUT', 4.0))  # seconds per upstream call
+
+    # Offline gazetteer: answer locally at or above GAZETTEER_CONFIDENCE (1.0 is
+    # an exact name/alias hit); weaker matches always go to Nominatim
+    GAZETTEER_CONFIDENCE = float(os.environ.get('GAZETTEER_CONFIDENCE', 0.9))
+    GAZETTEER_MIN_SCORE = float(os.environ.get('GAZETTEER_MIN_SCORE', 0.45))
+
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -25,6 +131,7 @@ class DevelopmentConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///carbon_tracker_dev.db'
     SQLALCHEMY_ECHO = True  # Log SQL queries
+    QUERY_TRACKER_ENABLED = True
 
 
 class ProductionConfig(Config):
@@ -45,6 +152,10 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    QUERY_TRACKER_ENABLED = True
+    QUERY_BUDGET_STRICT = True
+    CACHE_TYPE = 'simple'
+    PROFILING_SECRET = 'testing-profiling-secret'
 
 
 # Configuration dictionary
@@ -0,0 +1,50 @@
+"""Flask JSON provider backed by msgspec.
+
+``jsonify`` and ``request.get_json`` go through msgspec's encoder/decoder,
+which also serializes the ``msgspec.Struct`` schemas in schemas.py
+directly. Differences from Flask's default provider: keys keep insertion
+order unless ``sort_keys`` is set, and dates encode as ISO 8601 rather
+than HTTP dates (every route already sends ``isoformat()`` strings).
+``compact`` works as in Flask: ``None`` pretty-prints only in debug mode.
+"""
+import msgspec
+from flask.json.provider import JSONProvider
+
+
+def _enc_hook(obj):
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class MsgspecJSONProvider(JSONProvider):
+    mimetype = 'application/json'
+    sort_keys = False
+    compact = None
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._encoder = msgspec.json.Encoder(enc_hook=_enc_hook)
+        self._sorted_encoder = msgspec.json.Encoder(enc_hook=_enc_hook, order='sorted')
+        self._decoder = msgspec.json.Decoder()
+
+    def _encode(self, obj, sort_keys=None):
+        encoder = self._sorted_encoder if (self.sort_keys if sort_keys is None else sort_keys) else self._encoder
+        return encoder.encode(obj)
+
+    def dumps(self, obj, **kwargs):
+        return self._encode(obj, kwargs.get('sort_keys')).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        try:
+            return self._decoder.decode(s)
+        except msgspec.DecodeError as e:
+            # Flask turns ValueError into a 400 (or None with silent=True)
+            raise ValueError(str(e)) from e
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self._encode(obj)
+        if self.compact is False or (self.compact is None and self._app.debug):
+            body = msgspec.json.format(body, indent=2) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,216 @@
+"""Request and SQL metrics exposed at /metrics in Prometheus text format.
+
+Every thread records into its own shard, so the request path never takes a
+lock; a scrape sums the shards. Numbers are per worker process, which is
+what Prometheus expects when each gunicorn worker is scraped (or labelled)
+separately.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, request
+
+from sql_timing import add_consumer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Shard:
+    __slots__ = ('latency', 'requests', 'in_flight', 'sql_per_request', 'sql_statements', 'sql_seconds')
+
+    def __init__(self):
+        self.latency = {}          # (blueprint, endpoint, method) -> [bucket counts..., sum, count]
+        self.requests = {}         # (blueprint, endpoint, method, status) -> count
+        self.in_flight = 0
+        self.sql_per_request = {}  # (blueprint, endpoint) -> [bucket counts..., sum, count]
+        self.sql_statements = {}   # endpoint -> count (None outside requests)
+        self.sql_seconds = {}      # endpoint -> seconds
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()  # taken once per thread, on its first record
+        self._collectors = ()
+
+    def add_collector(self, collector):
+        """Append ``collector()``'s exposition lines to every scrape."""
+        if collector not in self._collectors:
+            self._collectors = self._collectors + (collector,)
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    @staticmethod
+    def _observe(series, key, buckets, value):
+        values = series.get(key)
+        if values is None:
+            values = series[key] = [0] * (len(buckets) + 2)
+        values[bisect_left(buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    # Recording (request thread only)
+
+    def request_started(self):
+        self._shard().in_flight += 1
+
+    def request_finished(self, blueprint, endpoint, method, status, seconds, sql_count):
+        shard = self._shard()
+        shard.in_flight -= 1
+        self._observe(shard.latency, (blueprint, endpoint, method), LATENCY_BUCKETS, seconds)
+        key = (blueprint, endpoint, method, status)
+        shard.requests[key] = shard.requests.get(key, 0) + 1
+        self._observe(shard.sql_per_request, (blueprint, endpoint), SQL_COUNT_BUCKETS, sql_count)
+
+    def sql_executed(self, endpoint, seconds):
+        shard = self._shard()
+        shard.sql_statements[endpoint] = shard.sql_statements.get(endpoint, 0) + 1
+        shard.sql_seconds[endpoint] = shard.sql_seconds.get(endpoint, 0.0) + seconds
+
+    # Aggregation (scrape)
+
+    def _merged(self):
+        with self._shards_lock:
+            shards = list(self._shards)
+        latency, requests, sql_per_request, statements, seconds = {}, {}, {}, {}, {}
+        in_flight = 0
+
+        def add_series(target, source):
+            for key, values in list(source.items()):
+                merged = target.get(key)
+                if merged is None:
+                    target[key] = list(values)
+                else:
+                    for i, value in enumerate(values):
+                        merged[i] += value
+
+        def add_counts(target, source):
+            for key, value in list(source.items()):
+                target[key] = target.get(key, 0) + value
+
+        for shard in shards:
+            in_flight += shard.in_flight
+            add_series(latency, shard.latency)
+            add_counts(requests, shard.requests)
+            add_series(sql_per_request, shard.sql_per_request)
+            add_counts(statements, shard.sql_statements)
+            add_counts(seconds, shard.sql_seconds)
+        return latency, requests, in_flight, sql_per_request, statements, seconds
+
+    def render(self):
+        latency, requests, in_flight, sql_per_request, statements, seconds = self._merged()
+        lines = []
+
+        lines += _histogram(
+            'http_request_duration_seconds', 'Request latency by endpoint.',
+            ('blueprint', 'endpoint', 'method'), latency, LATENCY_BUCKETS
+        )
+        lines += ['# HELP http_requests_total Requests by endpoint and status.',
+                  '# TYPE http_requests_total counter']
+        for key, value in sorted(requests.items(), key=_sort_key):
+            lines.append(f"http_requests_total{_labels(('blueprint', 'endpoint', 'method', 'status'), key)} {value}")
+        lines += ['# HELP http_requests_in_flight Requests currently being handled.',
+                  '# TYPE http_requests_in_flight gauge',
+                  f'http_requests_in_flight {in_flight}']
+        lines += _histogram(
+            'db_statements_per_request', 'SQL statements executed per request.',
+            ('blueprint', 'endpoint'), sql_per_request, SQL_COUNT_BUCKETS
+        )
+        lines += ['# HELP db_statements_total SQL statements executed.',
+                  '# TYPE db_statements_total counter']
+        for key, value in sorted(statements.items(), key=_sort_key):
+            lines.append(f"db_statements_total{_labels(('endpoint',), (key or 'none',))} {value}")
+        lines += ['# HELP db_statement_duration_seconds_total Time spent in SQL statements.',
+                  '# TYPE db_statement_duration_seconds_total counter']
+        for key, value in sorted(seconds.items(), key=_sort_key):
+            lines.append(f"db_statement_duration_seconds_total{_labels(('endpoint',), (key or 'none',))} {value:.6f}")
+        for collector in self._collectors:
+            lines += collector()
+        return '\n'.join(lines) + '\n'
+
+
+def _sort_key(item):
+    key = item[0]
+    return tuple(str(k) for k in key) if isinstance(key, tuple) else (str(key),)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _histogram(name, help_text, label_names, series, buckets):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for key, values in sorted(series.items(), key=_sort_key):
+        cumulative = 0
+        for bound, count in zip(buckets + ('+Inf',), values[:-2]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(label_names + ('le',), key + (bound,))} {cumulative}")
+        lines.append(f"{name}_sum{_labels(label_names, key)} {values[-2]:.6f}")
+        lines.append(f"{name}_count{_labels(label_names, key)} {values[-1]}")
+    return lines
+
+
+registry = MetricsRegistry()
+_request_state = threading.local()
+
+
+def _record_sql(conn, statement, parameters, executemany, elapsed):
+    current = getattr(_request_state, 'current', None)
+    if current is not None:
+        current[1] += 1
+        current[2] += elapsed
+        registry.sql_executed(current[0], elapsed)
+    else:
+        registry.sql_executed(None, elapsed)
+
+
+add_consumer(_record_sql)
+
+
+def init_metrics(app):
+    """Register the timing hooks and the /metrics endpoint on ``app``."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+        _request_state.current = [request.endpoint or 'none', 0, 0.0]
+        registry.request_started()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('_metrics_start', None)
+        current = getattr(_request_state, 'current', None)
+        if start is not None:
+            _request_state.current = None
+            registry.request_finished(
+                request.blueprint or 'none',
+                request.endpoint or 'none',
+                request.method,
+                str(response.status_code),
+                time.perf_counter() - start,
+                current[1] if current else 0,
+            )
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), content_type=CONTENT_TYPE)
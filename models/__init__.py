@@ -3,6 +3,7 @@ from models.user import User
 from models.discover import Discover
 from models.activity import Activity, EnergyLog, TransportLog
 from models.chat import ChatbotModel
+from models.chat_turn import ChatTurn
 from models.goal import Goal
 
-__all__ = ['User', 'Discover', 'EnergyLog','TransportLog', 'Activity', 'ChatbotModel','Goal']
\ No newline at end of file
+__all__ = ['User', 'Discover', 'EnergyLog','TransportLog', 'Activity', 'ChatbotModel','ChatTurn','Goal']
\ No newline at end of file
@@ -1,51 +1,204 @@
-import google.generativeai as genai
+import re
+import threading
+import zlib
+
 from config import Config
+from models.chat_backends import LazyBackend, create_backend
+from models.chat_answer_cache import AnswerCache
+from models.chat_history import HistoryCompactor, history_turn_sizes
+from models.chat_store import ChatSessionStore
+
+CONTEXT_PREFIX = "[Context for this question only, from the user's own tracked data]\n"
+SESSION_LOCK_STRIPES = 64
+# A question that mentions any of these is about the asker's own data
+PERSONAL_WORDS = frozenset('i me my mine myself im ive we us our ours ourselves'.split())
+
+
+def is_personal_question(message):
+    """True when the question refers to the asker, so it needs their emissions digest."""
+    return any(word in PERSONAL_WORDS for word in re.findall(r"[a-z]+", message.lower()))
+
 
 class ChatbotModel:
-    def __init__(self):
-        genai.configure(api_key=Config.GEMINI_API_KEY)
-        
-        # System instruction to focus on carbon emissions
-        system_instruction = """
-        You are a specialized chatbot focused exclusively on carbon emissions and climate change.
+    def __init__(self, backend_factory=None, history_store=None):
+        # The model client is built on the first chat call, not at import time
+        self._backend = LazyBackend(backend_factory or (lambda: create_backend(Config)))
         
-        Your role:
-        - Answer questions about carbon emissions, greenhouse gases, and their impact
-        - Provide information about carbon footprints (personal, corporate, national)
-        - Explain carbon reduction strategies and sustainability practices
-        - Discuss carbon offsetting, carbon credits, and net-zero initiatives
-        - Share data about emission sources (transportation, energy, agriculture, industry)
-        - Explain climate policies and international agreements (Paris Agreement, etc.)
+        # Durable turns; sessions missing from memory are rebuilt from it
+        self.history_store = history_store
         
-        Important guidelines:
-        - If a question is NOT related to carbon emissions or climate change, politely redirect the user back to the topic
-        - Say something like: "I'm specialized in carbon emissions and climate topics. Could you ask me something about carbon footprints, greenhouse gases, or climate change?"
-        - Be informative, accurate, and helpful within your domain
-        - Use data and examples when possible
+        # Upstream calls give up on their own instead of holding a worker forever
+        self.request_options = {'timeout': Config.CHAT_REQUEST_TIMEOUT}
         
-        Stay focused on your specialty: carbon emissions and climate change.
-        """
-        self.model = genai.GenerativeModel(
-            'gemini-2.0-flash',
-            system_instruction=system_instruction
+        # Store chat sessions by user_id, bounded by count, idle time and history size
+        self.active_chats = ChatSessionStore(
+            max_sessions=Config.CHAT_MAX_SESSIONS,
+            idle_ttl=Config.CHAT_SESSION_IDLE_TTL,
+            max_history_bytes=Config.CHAT_MAX_HISTORY_BYTES
+        )
+        self.last_request_time = self.active_chats.last_request_time  # Track last request time per user (LRU order)
+        # Chat sessions aren't thread-safe: one call at a time per user (striped, so bounded)
+        self._session_locks = [threading.Lock() for _ in range(SESSION_LOCK_STRIPES)]
+        # Answers to first-turn questions, shared by every session in this worker
+        self.answer_cache = AnswerCache(
+            max_entries=Config.CHAT_ANSWER_CACHE_SIZE,
+            ttl=Config.CHAT_ANSWER_CACHE_TTL,
+            threshold=Config.CHAT_ANSWER_CACHE_SIMILARITY
+        )
+        # Keeps each request's history bounded by folding old turns into a summary
+        self.history_compactor = HistoryCompactor(
+            token_budget=Config.CHAT_HISTORY_TOKEN_BUDGET,
+            keep_turns=Config.CHAT_HISTORY_KEEP_TURNS,
+            summary_max_tokens=Config.CHAT_SUMMARY_MAX_TOKENS,
+            summarize=self._summarize
         )
         
-        self.active_chats = {}  # Store chat sessions by user_id
-        self.last_request_time = {}  # Track last request time per user
-        
+    @property
+    def model(self):
+        return self._backend.get()
+    
+    @model.setter
+    def model(self, backend):
+        self._backend.set(backend)
+    
+    def _session_lock(self, user_id):
+        return self._session_locks[zlib.crc32(str(user_id).encode('utf-8')) % SESSION_LOCK_STRIPES]
+    
     def get_or_create_chat(self, user_id):
         """Get existing chat or create new one for user"""
-        if user_id not in self.active_chats:
-            self.active_chats[user_id] = self.model.start_chat(history=[])
-        return self.active_chats[user_id]
+        chat = self.active_chats.get(user_id)
+        if chat is None:
+            history = self._load_history(user_id)
+            chat = self.active_chats.put(user_id, self.model.start_chat(history=history))
+            if history:
+                self.active_chats.resync(user_id, history_turn_sizes(history))
+        return chat
     
-    def send_message(self, user_id, message):
-        """Send message and get response"""
-        chat = self.get_or_create_chat(user_id)
-        response = chat.send_message(message)
-        return response.text
+    def _load_history(self, user_id):
+        """Rehydrate a session from durable storage (restart or another worker)."""
+        if self.history_store is None:
+            return []
+        try:
+            return self.history_store.recent_history(user_id)
+        except Exception as e:
+            print(f"Chat history load failed for {user_id}: {e}")
+            return []
+    
+    def _record_turn(self, user_id, message, reply):
+        self.active_chats.record_turn(user_id, message, reply)
+        if self.history_store is not None:
+            self.history_store.append(user_id, message, reply)
+    
+    def _cached_first_turn(self, user_id, chat, message):
+        """Answer a first-turn question from the cache, or return None."""
+        if chat.history:
+            return None
+        answer = self.answer_cache.get(message)
+        if answer is not None:
+            # Keep the turn in history so follow-up questions have context
+            chat.history = [
+                {'role': 'user', 'parts': [message]},
+                {'role': 'model', 'parts': [answer]}
+            ]
+            self._record_turn(user_id, message, answer)
+        return answer
+    
+    @staticmethod
+    def _with_context(message, context):
+        return f"{CONTEXT_PREFIX}{context}\n\n{message}" if context else message
+    
+    @staticmethod
+    def _strip_context(chat, message):
+        """Store the bare question in history so the digest isn't resent every turn."""
+        history = list(chat.history)
+        if len(history) >= 2:
+            history[-2] = {'role': 'user', 'parts': [message]}
+            chat.history = history
+    
+    def _summarize(self, prompt):
+        return self.model.generate_content(prompt, request_options=self.request_options).text
+    
+    def _compact_history(self, user_id, chat):
+        """Fold old turns into a summary once the session is over its token budget"""
+        if self.history_compactor.compact(chat):
+            self.active_chats.resync(user_id, history_turn_sizes(chat.history))
+    
+    def send_message(self, user_id, message, context=None):
+        """Send message and get response.
+
+        ``context`` (the user's emissions digest) is prepended to this turn
+        only; personalized answers bypass the shared answer cache, so callers
+        pass it only for personal questions (``is_personal_question``).
+        """
+        with self._session_lock(user_id):
+            chat = self.get_or_create_chat(user_id)
+            if not context:
+                cached = self._cached_first_turn(user_id, chat, message)
+                if cached is not None:
+                    return cached
+            first_turn = not chat.history and not context
+            self._compact_history(user_id, chat)
+            response = chat.send_message(self._with_context(message, context), request_options=self.request_options)
+            if context:
+                self._strip_context(chat, message)
+            self._record_turn(user_id, message, response.text)
+            if first_turn:
+                self.answer_cache.set(message, response.text)
+            return response.text
+    
+    def stream_message(self, user_id, message, context=None):
+        """Send message and yield the response text chunk by chunk.
+
+        If the caller stops iterating early (client disconnected), the
+        partial turn is rewound so the session history stays coherent.
+        """
+        with self._session_lock(user_id):
+            chat = self.get_or_create_chat(user_id)
+            if not context:
+                cached = self._cached_first_turn(user_id, chat, message)
+                if cached is not None:
+                    yield cached
+                    return
+            first_turn = not chat.history and not context
+            self._compact_history(user_id, chat)
+            response = chat.send_message(
+                self._with_context(message, context), stream=True, request_options=self.request_options
+            )
+            parts = []
+            completed = False
+            try:
+                for chunk in response:
+                    text = chunk.text
+                    if text:
+                        parts.append(text)
+                        yield text
+                completed = True
+            finally:
+                if completed:
+                    if context:
+                        self._strip_context(chat, message)
+                    self._record_turn(user_id, message, ''.join(parts))
+                    if first_turn:
+                        self.answer_cache.set(message, ''.join(parts))
+                else:
+                    try:
+                        chat.rewind()
+                    except Exception as e:
+                        # Can't trust a half-written history; start the session over
+                        print(f"Chat rewind failed for {user_id}: {e}")
+                        self.active_chats.remove(user_id)
     
     def clear_chat(self, user_id):
         """Clear chat history for user"""
-        if user_id in self.active_chats:
-            del self.active_chats[user_id]
\ No newline at end of file
+        self.active_chats.remove(user_id)
+        if self.history_store is not None:
+            self.history_store.delete_user(user_id)
+
+    def stats(self):
+        """Resident session, memory and answer cache metrics"""
+        stats = self.active_chats.stats()
+        stats['answer_cache'] = self.answer_cache.stats()
+        if self.history_store is not None:
+            stats['persistence'] = self.history_store.stats()
+        stats['backend'] = getattr(self.model, 'name', None) if self._backend.loaded else None
+        return stats
\ No newline at end of file
@@ -0,0 +1,160 @@
+import random
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict, defaultdict
+
+STOPWORDS = frozenset("""
+a an the is are was were be been being am do does did doing have has had
+i me my we our you your it its this that these those there here
+what whats which who whom how why when where can could should would will
+shall may might must please tell explain about of in on at to for from by
+with and or as into per s
+""".split())
+
+# Words a paraphrase must keep exactly: flipping one changes the question
+NEGATIONS = frozenset('not no never none nor without neither cannot'.split())
+UNITS = {
+    'km': 'km', 'kms': 'km', 'kilometer': 'km', 'kilometers': 'km', 'kilometre': 'km', 'kilometres': 'km',
+    'mi': 'mile', 'mile': 'mile', 'miles': 'mile',
+    'kg': 'kg', 'kgs': 'kg', 'kilogram': 'kg', 'kilograms': 'kg',
+    'g': 'g', 'gram': 'g', 'grams': 'g',
+    'lb': 'lb', 'lbs': 'lb', 'pound': 'lb', 'pounds': 'lb',
+    't': 'tonne', 'ton': 'tonne', 'tons': 'tonne', 'tonne': 'tonne', 'tonnes': 'tonne',
+    'kwh': 'kwh', 'mwh': 'mwh', 'gwh': 'gwh',
+    'l': 'litre', 'litre': 'litre', 'litres': 'litre', 'liter': 'litre', 'liters': 'litre',
+    'gallon': 'gallon', 'gallons': 'gallon',
+    'day': 'day', 'days': 'day', 'daily': 'day', 'week': 'week', 'weeks': 'week', 'weekly': 'week',
+    'month': 'month', 'months': 'month', 'monthly': 'month',
+    'year': 'year', 'years': 'year', 'yearly': 'year', 'annual': 'year', 'annually': 'year',
+    'hour': 'hour', 'hours': 'hour', 'percent': 'percent',
+}
+
+_MERSENNE = (1 << 61) - 1
+
+
+def _words(text):
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = text.replace('co₂', 'co2').replace('%', ' percent ')
+    text = re.sub(r"n['’]t\b", ' not', text)
+    return re.findall(r'[a-z0-9]+(?:\.[0-9]+)?', text)
+
+
+def normalize_question(text):
+    """Lowercase, strip accents/punctuation and drop stopwords."""
+    return ' '.join(w for w in _words(text) if w not in STOPWORDS)
+
+
+def key_terms(text):
+    """Numbers, units and negations in the question, which paraphrases must share."""
+    terms = set()
+    for word in _words(text):
+        if word in NEGATIONS:
+            terms.add('not')
+        elif word in UNITS:
+            terms.add(UNITS[word])
+        elif word[0].isdigit() and word != 'co2':
+            terms.add(word)
+    return frozenset(terms)
+
+
+def _shingles(normalized):
+    padded = f' {normalized} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AnswerCache:
+    """TTL + LRU cache of first-turn answers with near-duplicate matching.
+
+    Exact normalized questions hit a dict. Paraphrases are found through
+    MinHash signatures over character trigrams, bucketed with LSH bands;
+    candidates are confirmed by their true trigram Jaccard similarity and
+    must have the same numbers, units and negations (``key_terms``), so
+    "per km" never answers "per mile" and "what is not" never answers
+    "what is".
+    """
+
+    def __init__(self, max_entries, ttl, threshold, num_perm=64, bands=16, seed=7):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE), rng.randrange(0, _MERSENNE)) for _ in range(num_perm)]
+        self._entries = OrderedDict()  # normalized -> (answer, shingles, bands, expires_at, key terms)
+        self._buckets = defaultdict(set)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _signature(self, shingles):
+        hashes = [zlib.crc32(s.encode('utf-8')) for s in shingles]
+        return [min((a * h + b) % _MERSENNE for h in hashes) for a, b in self._perms]
+
+    def _band_keys(self, signature):
+        return [(i, tuple(signature[i * self.rows:(i + 1) * self.rows])) for i in range(self.bands)]
+
+    def get(self, question):
+        normalized = normalize_question(question)
+        if not normalized:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(normalized)
+            if entry is not None and entry[3] > now:
+                self._entries.move_to_end(normalized)
+                self.hits += 1
+                return entry[0]
+
+            shingles = _shingles(normalized)
+            terms = key_terms(question)
+            best_key, best_score = None, 0.0
+            for band in self._band_keys(self._signature(shingles)):
+                for key in self._buckets.get(band, ()):
+                    other, other_terms = self._entries[key][1], self._entries[key][4]
+                    if other_terms != terms:
+                        continue
+                    score = len(shingles & other) / len(shingles | other)
+                    if score > best_score:
+                        best_key, best_score = key, score
+
+            if best_key is not None and best_score >= self.threshold:
+                answer, _, _, expires_at, _ = self._entries[best_key]
+                if expires_at > now:
+                    self._entries.move_to_end(best_key)
+                    self.hits += 1
+                    return answer
+            self.misses += 1
+            return None
+
+    def set(self, question, answer):
+        normalized = normalize_question(question)
+        if not normalized or not answer:
+            return
+        shingles = _shingles(normalized)
+        bands = self._band_keys(self._signature(shingles))
+        with self._lock:
+            self._remove(normalized)
+            self._entries[normalized] = (answer, shingles, bands, time.time() + self.ttl, key_terms(question))
+            for band in bands:
+                self._buckets[band].add(normalized)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, normalized):
+        entry = self._entries.pop(normalized, None)
+        if entry is None:
+            return
+        for band in entry[2]:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(normalized)
+                if not bucket:
+                    del self._buckets[band]
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
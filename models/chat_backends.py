@@ -0,0 +1,173 @@
+import abc
+import threading
+import time
+import zlib
+
+SYSTEM_INSTRUCTION = """
+You are a specialized chatbot focused exclusively on carbon emissions and climate change.
+
+Your role:
+- Answer questions about carbon emissions, greenhouse gases, and their impact
+- Provide information about carbon footprints (personal, corporate, national)
+- Explain carbon reduction strategies and sustainability practices
+- Discuss carbon offsetting, carbon credits, and net-zero initiatives
+- Share data about emission sources (transportation, energy, agriculture, industry)
+- Explain climate policies and international agreements (Paris Agreement, etc.)
+
+Important guidelines:
+- If a question is NOT related to carbon emissions or climate change, politely redirect the user back to the topic
+- Say something like: "I'm specialized in carbon emissions and climate topics. Could you ask me something about carbon footprints, greenhouse gases, or climate change?"
+- Be informative, accurate, and helpful within your domain
+- Use data and examples when possible
+
+Stay focused on your specialty: carbon emissions and climate change.
+"""
+
+
+class ChatBackend(abc.ABC):
+    """What ChatbotModel needs from a model provider.
+
+    ``start_chat(history)`` returns a session with a ``history`` list,
+    ``send_message(message, stream=False, request_options=None)`` and
+    ``rewind()``; ``generate_content(prompt)`` is a one-off completion.
+    Responses expose ``.text`` and, when streamed, iterate as chunks that
+    each have ``.text``.
+    """
+
+    name = None
+
+    @abc.abstractmethod
+    def start_chat(self, history=None):
+        """A new chat session seeded with ``history``."""
+
+    @abc.abstractmethod
+    def generate_content(self, prompt, request_options=None):
+        """A one-off completion for ``prompt``."""
+
+
+class GeminiBackend(ChatBackend):
+    name = 'gemini'
+
+    def __init__(self, api_key, model_name='gemini-2.0-flash'):
+        # Imported here so workers that never chat don't pay for the SDK
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name, system_instruction=SYSTEM_INSTRUCTION)
+
+    def start_chat(self, history=None):
+        return self.model.start_chat(history=history or [])
+
+    def generate_content(self, prompt, request_options=None):
+        return self.model.generate_content(prompt, request_options=request_options)
+
+
+class _StubResponse:
+    def __init__(self, text, chunk_words, chunk_delay):
+        self.text = text
+        self._chunk_words = chunk_words
+        self._chunk_delay = chunk_delay
+
+    def __iter__(self):
+        words = self.text.split(' ')
+        for i in range(0, len(words), self._chunk_words):
+            if self._chunk_delay:
+                time.sleep(self._chunk_delay)
+            chunk = ' '.join(words[i:i + self._chunk_words])
+            yield _StubResponse(chunk if i + self._chunk_words >= len(words) else chunk + ' ', 0, 0)
+
+
+class _StubChat:
+    def __init__(self, backend, history):
+        self._backend = backend
+        self.history = list(history or [])
+
+    def send_message(self, message, stream=False, request_options=None):
+        text = self._backend.reply(message, len(self.history) // 2)
+        if not stream and self._backend.latency:
+            time.sleep(self._backend.latency)
+        self.history = self.history + [
+            {'role': 'user', 'parts': [message]},
+            {'role': 'model', 'parts': [text]},
+        ]
+        return _StubResponse(text, self._backend.chunk_words, self._backend.chunk_delay)
+
+    def rewind(self):
+        if len(self.history) < 2:
+            raise ValueError('Nothing to rewind')
+        self.history = self.history[:-2]
+
+
+class LocalStubBackend(ChatBackend):
+    """Deterministic offline backend for benchmarks and local development.
+
+    Replies depend only on the message and turn number, so runs are
+    repeatable. ``latency`` simulates time to a full reply and
+    ``chunk_delay`` the gap between streamed chunks.
+    """
+
+    name = 'stub'
+
+    SENTENCES = (
+        'Transport is one of the largest sources of personal carbon emissions.',
+        'Switching to public transport or cycling can cut commuting emissions sharply.',
+        'Household electricity emissions depend on how the grid generates its power.',
+        "Kenya's grid is largely geothermal and hydro, so its carbon intensity is low.",
+        'Reducing meat consumption lowers the methane footprint of your diet.',
+        'Recycling and composting keep waste out of landfills that emit methane.',
+        'Carbon offsets should complement, not replace, direct emission cuts.',
+        'Tracking your activities weekly makes it easier to spot the biggest savings.',
+    )
+
+    def __init__(self, latency=0.0, chunk_delay=0.0, reply_sentences=3, chunk_words=4):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.reply_sentences = reply_sentences
+        self.chunk_words = chunk_words
+
+    def reply(self, message, turn=0):
+        seed = zlib.crc32(f'{turn}:{message}'.encode('utf-8'))
+        picks = [self.SENTENCES[(seed + i * 7) % len(self.SENTENCES)] for i in range(self.reply_sentences)]
+        return f'You asked: "{message[:80]}". ' + ' '.join(picks)
+
+    def start_chat(self, history=None):
+        return _StubChat(self, history)
+
+    def generate_content(self, prompt, request_options=None):
+        if self.latency:
+            time.sleep(self.latency)
+        return _StubResponse('Summary: ' + self.reply(prompt[-200:]), self.chunk_words, 0)
+
+
+def create_backend(config):
+    """Build the backend named by ``config.CHAT_BACKEND``."""
+    name = (config.CHAT_BACKEND or 'gemini').lower()
+    if name == 'gemini':
+        return GeminiBackend(config.GEMINI_API_KEY)
+    if name == 'stub':
+        return LocalStubBackend(latency=config.CHAT_STUB_LATENCY, chunk_delay=config.CHAT_STUB_CHUNK_DELAY)
+    raise ValueError(f"Unknown CHAT_BACKEND: {name}")
+
+
+class LazyBackend:
+    """Builds the configured backend on first use, once per process."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._backend = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._backend is not None
+
+    def get(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = self._factory()
+        return self._backend
+
+    def set(self, backend):
+        with self._lock:
+            self._backend = backend
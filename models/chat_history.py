@@ -0,0 +1,120 @@
+import math
+
+SUMMARY_PREFIX = 'Summary of our conversation so far: '
+SUMMARY_ACK = "Got it, I'll keep that context in mind."
+
+SUMMARY_PROMPT = """Summarize the conversation below between a user and a carbon-emissions
+assistant in at most {max_words} words. Keep facts, numbers, the user's
+situation and any open questions; drop greetings and filler.
+
+{previous}Conversation:
+{transcript}
+"""
+
+
+def content_text(content):
+    """Plain text of a history entry (SDK Content object or role/parts dict)."""
+    parts = content.get('parts', []) if isinstance(content, dict) else getattr(content, 'parts', [])
+    texts = []
+    for part in parts:
+        if isinstance(part, str):
+            texts.append(part)
+        else:
+            texts.append(getattr(part, 'text', '') or '')
+    return ''.join(texts)
+
+
+def content_role(content):
+    return content.get('role') if isinstance(content, dict) else getattr(content, 'role', None)
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English text is close enough for budgeting
+    return math.ceil(len(text) / 4)
+
+
+def history_turn_sizes(history):
+    """Byte size of each request/response pair in the history."""
+    sizes = []
+    for i in range(0, len(history) - 1, 2):
+        sizes.append(len(content_text(history[i]).encode('utf-8')) +
+                     len(content_text(history[i + 1]).encode('utf-8')))
+    return sizes
+
+
+class HistoryCompactor:
+    """Keeps a session's history under a token budget.
+
+    Once the history exceeds ``token_budget`` the last ``keep_turns`` turns
+    stay verbatim and everything older is folded into a rolling summary,
+    stored as the first turn of the history.
+    """
+
+    def __init__(self, token_budget, keep_turns, summary_max_tokens, summarize=None):
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.summary_max_tokens = summary_max_tokens
+        self.summarize = summarize
+
+    def history_tokens(self, history):
+        return sum(estimate_tokens(content_text(c)) for c in history)
+
+    def compact(self, chat):
+        """Compact ``chat.history`` in place; returns True if it changed."""
+        history = list(chat.history)
+        if self.history_tokens(history) <= self.token_budget:
+            return False
+
+        keep = 2 * self.keep_turns
+        if len(history) <= keep:
+            return False
+
+        previous_summary = ''
+        start = 0
+        first = content_text(history[0]) if history else ''
+        if first.startswith(SUMMARY_PREFIX):
+            previous_summary = first[len(SUMMARY_PREFIX):]
+            start = 2
+
+        older, recent = history[start:-keep], history[-keep:]
+        if not older:
+            return False
+
+        summary = self._summarize(previous_summary, older)
+        chat.history = [
+            {'role': 'user', 'parts': [SUMMARY_PREFIX + summary]},
+            {'role': 'model', 'parts': [SUMMARY_ACK]},
+        ] + recent
+        return True
+
+    def _summarize(self, previous_summary, older):
+        transcript = '\n'.join(
+            f"{'User' if content_role(c) == 'user' else 'Assistant'}: {content_text(c)}" for c in older
+        )
+        max_words = int(self.summary_max_tokens * 0.75)
+        if self.summarize is not None:
+            previous = f"Earlier summary:\n{previous_summary}\n\n" if previous_summary else ''
+            try:
+                summary = self.summarize(SUMMARY_PROMPT.format(
+                    max_words=max_words, previous=previous, transcript=transcript
+                ))
+                if summary:
+                    return self._truncate(summary.strip())
+            except Exception as e:
+                print(f"History summarization failed, using extractive fallback: {e}")
+        return self._truncate(self._extractive(previous_summary, older))
+
+    @staticmethod
+    def _extractive(previous_summary, older):
+        # First sentence of every message is a cheap, model-free digest
+        lines = [previous_summary] if previous_summary else []
+        for c in older:
+            text = content_text(c).strip().replace('\n', ' ')
+            sentence = text.split('. ')[0][:200]
+            if sentence:
+                lines.append(f"{'User' if content_role(c) == 'user' else 'Assistant'}: {sentence}")
+        return ' | '.join(lines)
+
+    def _truncate(self, text):
+        max_chars = self.summary_max_tokens * 4
+        return text if len(text) <= max_chars else text[:max_chars].rsplit(' ', 1)[0] + '...'
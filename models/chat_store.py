@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class _SessionEntry:
+    __slots__ = ('chat', 'bytes', 'turn_sizes')
+
+    def __init__(self, chat):
+        self.chat = chat
+        self.bytes = 0
+        self.turn_sizes = deque()
+
+
+class ChatSessionStore:
+    """Bounded store for live chat sessions.
+
+    Sessions are kept in least-recently-used order (``last_request_time``)
+    and are evicted when the store is full, when they sit idle longer than
+    ``idle_ttl`` seconds, or trimmed turn by turn when their history grows
+    past ``max_history_bytes``.
+    """
+
+    def __init__(self, max_sessions, idle_ttl, max_history_bytes):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_history_bytes = max_history_bytes
+        self.last_request_time = OrderedDict()  # user_id -> monotonic time, oldest first
+        self._sessions = {}
+        self._bytes = 0
+        self._evictions = {'capacity': 0, 'idle': 0, 'trimmed_turns': 0}
+        self._lock = threading.RLock()
+
+    def __contains__(self, user_id):
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            return user_id in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, user_id):
+        """Return the session's chat (marking it as used) or None."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._sessions.get(user_id)
+            if entry is None:
+                return None
+            self._touch(user_id, now)
+            return entry.chat
+
+    def put(self, user_id, chat):
+        now = time.monotonic()
+        with self._lock:
+            self._drop(user_id)
+            self._evict_idle(now)
+            while len(self._sessions) >= self.max_sessions:
+                oldest = next(iter(self.last_request_time))
+                self._drop(oldest)
+                self._evictions['capacity'] += 1
+            self._sessions[user_id] = _SessionEntry(chat)
+            self._touch(user_id, now)
+        return chat
+
+    def record_turn(self, user_id, message, reply):
+        """Account for one request/response pair and enforce the byte cap."""
+        size = len(message.encode('utf-8')) + len((reply or '').encode('utf-8'))
+        with self._lock:
+            entry = self._sessions.get(user_id)
+            if entry is None:
+                return
+            entry.turn_sizes.append(size)
+            entry.bytes += size
+            self._bytes += size
+            trimmed = 0
+            while entry.bytes > self.max_history_bytes and len(entry.turn_sizes) > 1:
+                dropped = entry.turn_sizes.popleft()
+                entry.bytes -= dropped
+                self._bytes -= dropped
+                trimmed += 1
+            if trimmed:
+                # Each turn is a user message plus a model reply
+                entry.chat.history = entry.chat.history[2 * trimmed:]
+                self._evictions['trimmed_turns'] += trimmed
+
+    def resync(self, user_id, turn_sizes):
+        """Reset a session's byte accounting after its history was rewritten."""
+        with self._lock:
+            entry = self._sessions.get(user_id)
+            if entry is None:
+                return
+            self._bytes -= entry.bytes
+            entry.turn_sizes = deque(turn_sizes)
+            entry.bytes = sum(turn_sizes)
+            self._bytes += entry.bytes
+
+    def remove(self, user_id):
+        with self._lock:
+            self._drop(user_id)
+
+    def _touch(self, user_id, now):
+        self.last_request_time[user_id] = now
+        self.last_request_time.move_to_end(user_id)
+
+    def _drop(self, user_id):
+        entry = self._sessions.pop(user_id, None)
+        self.last_request_time.pop(user_id, None)
+        if entry is not None:
+            self._bytes -= entry.bytes
+
+    def _evict_idle(self, now):
+        # Oldest first, so stop at the first session that is still fresh
+        while self.last_request_time:
+            user_id, last_seen = next(iter(self.last_request_time.items()))
+            if now - last_seen < self.idle_ttl:
+                break
+            self._drop(user_id)
+            self._evictions['idle'] += 1
+
+    def stats(self):
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            return {
+                'resident_sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'resident_history_bytes': self._bytes,
+                'max_history_bytes_per_session': self.max_history_bytes,
+                'idle_ttl_seconds': self.idle_ttl,
+                'evictions': dict(self._evictions),
+            }
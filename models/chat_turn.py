@@ -0,0 +1,26 @@
+from app import db
+from datetime import datetime
+
+class ChatTurn(db.Model):
+    """One chatbot exchange (user message + model reply), append-only."""
+    __tablename__ = 'chat_turns'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # The signed-in user's JWT identity (email), not users.id
+    user_id = db.Column(db.String(128), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    reply = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Serves both keyset pagination and "latest N turns" for rehydration
+    __table_args__ = (
+        db.Index('ix_chat_turns_user_id_id', 'user_id', 'id'),
+    )
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'message': self.message,
+            'reply': self.reply,
+            'created_at': self.created_at.isoformat()
+        }
@@ -14,6 +14,10 @@ class User(db.Model):
     name = db.Column(db.String(80), nullable=True)  # Short name/display name
     bio = db.Column(db.Text, nullable=True)
     location = db.Column(db.String(200), nullable=True)
+    # Geocoded once from `location` in the background (see UserService.update_profile)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    location_geocoded_at = db.Column(db.DateTime, nullable=True)
     lifestyle_type = db.Column(db.String(50), nullable=True)  # 'urban', 'suburban', 'rural', etc.
     carbon_goal = db.Column(db.Float, nullable=True, default=0)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
@@ -21,6 +25,9 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     last_login = db.Column(db.DateTime, nullable=True)
+    # Bumped by activity writes only; versions the activity list/summary ETags
+    # (the profile's ETag uses updated_at, so logins don't invalidate these)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     #carbon = db.relationship('Carbon', backref='user', lazy='dynamic', cascade='all, delete-orphan')
@@ -59,6 +66,10 @@ class User(db.Model):
     def update_last_login(self):
         self.last_login = datetime.utcnow()
     
+    def bump_data_version(self):
+        # Incremented in SQL so concurrent writers can't lose a bump
+        self.data_version = User.data_version + 1
+    
     def get_total_emissions(self, days=30):
         from datetime import timedelta
         start_date = datetime.now().date() - timedelta(days=days)
@@ -121,6 +132,8 @@ class User(db.Model):
             'display_name': self.display_name,
             'bio': self.bio,
             'location': self.location,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
             'lifestyle_type': self.lifestyle_type,
             'carbon_goal': self.carbon_goal,  # Legacy field
             'is_active': self.is_active,
@@ -148,4 +161,5 @@ class User(db.Model):
         return f'<User {self.username} ({self.email})>'
     
     def __str__(self):
-        return f'{self.display_name} (@{self.username})'
\ No newline at end of file
+        return f'{self.display_name} (@{self.username})'
+
@@ -0,0 +1,224 @@
+"""Opt-in profiling of single requests.
+
+An admin mints a short-lived token signed with PROFILING_SECRET (POST
+/api/admin/profile-token) and sends it back in the ``X-Profile-Token``
+header. That one request then
+runs under cProfile or a stack sampler, its SQL statements are timed, and
+the results are written to PROFILE_DIR. Requests without the header only
+pay for one environ lookup.
+"""
+import cProfile
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from cache import app_cache
+from config import DEFAULT_SECRET_KEY
+from sql_timing import add_consumer, remove_consumer
+
+HEADER = 'X-Profile-Token'
+MODES = ('cprofile', 'sample')
+_SALT = 'request-profile'
+
+
+def _serializer(secret_key):
+    return URLSafeTimedSerializer(secret_key, salt=_SALT)
+
+
+def make_profile_token(secret_key, mode='cprofile'):
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+    return _serializer(secret_key).dumps({'mode': mode, 'nonce': secrets.token_hex(8)})
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's stack every ``interval`` seconds into folded stacks."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def folded(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class _SQLRecorder:
+    """Times the statements run on one thread while attached."""
+
+    MAX_STATEMENTS = 2000
+
+    def __init__(self, thread_id):
+        self.thread_id = thread_id
+        self.statements = []
+
+    def _record(self, conn, statement, parameters, executemany, elapsed):
+        if threading.get_ident() != self.thread_id:
+            return
+        if len(self.statements) < self.MAX_STATEMENTS:
+            self.statements.append({
+                'statement': ' '.join(statement.split()),
+                'parameters': repr(parameters)[:300],
+                'duration_ms': round(elapsed * 1000, 3),
+            })
+
+    def __enter__(self):
+        add_consumer(self._record)
+        return self
+
+    def __exit__(self, *exc):
+        remove_consumer(self._record)
+        return False
+
+
+class ProfilingMiddleware:
+    """WSGI wrapper that profiles requests carrying a valid profile token."""
+
+    def __init__(self, wsgi_app, app):
+        self.wsgi_app = wsgi_app
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        token = environ.get('HTTP_X_PROFILE_TOKEN')
+        if token is None:
+            return self.wsgi_app(environ, start_response)
+        options = self._verify(token)
+        if options is None:
+            return self.wsgi_app(environ, start_response)
+        return self._profile(environ, start_response, options['mode'])
+
+    def _verify(self, token):
+        config = self.app.config
+        max_age = config['PROFILE_TOKEN_MAX_AGE']
+        try:
+            options, signed_at = _serializer(config['PROFILING_SECRET']).loads(
+                token, max_age=max_age, return_timestamp=True
+            )
+        except BadSignature:
+            self.app.logger.warning('Ignoring invalid or expired profile token')
+            return None
+        if options.get('mode') not in MODES or not options.get('nonce'):
+            return None
+        # One profiled request per token across all workers; a nonce only
+        # needs remembering until its token would be rejected as expired anyway
+        remaining = signed_at.timestamp() + max_age - time.time()
+        if not app_cache.claim(f"profile-nonce:{options['nonce']}", remaining):
+            self.app.logger.warning('Ignoring a profile token that was already used')
+            return None
+        return options
+
+    def _profile(self, environ, start_response, mode):
+        config = self.app.config
+        profile_id = self._profile_id(environ)
+        captured = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            captured['status'] = status
+            headers = list(headers) + [('X-Profile-Id', profile_id)]
+            return start_response(status, headers, exc_info)
+
+        thread_id = threading.get_ident()
+        profiler = sampler = None
+        if mode == 'sample':
+            sampler = StackSampler(thread_id, config['PROFILE_SAMPLE_INTERVAL'])
+            sampler.start()
+        else:
+            profiler = cProfile.Profile()
+
+        started = time.perf_counter()
+        with _SQLRecorder(thread_id) as sql:
+            if profiler:
+                profiler.enable()
+            try:
+                # Drain the body here so streamed work is inside the profile too
+                result = self.wsgi_app(environ, capture_start_response)
+                try:
+                    body = list(result)
+                finally:
+                    if hasattr(result, 'close'):
+                        result.close()
+            finally:
+                if profiler:
+                    profiler.disable()
+                if sampler:
+                    sampler.stop()
+        elapsed = time.perf_counter() - started
+
+        self._write(profile_id, environ, captured.get('status'), elapsed, profiler, sampler, sql.statements)
+        return body
+
+    @staticmethod
+    def _profile_id(environ):
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', environ.get('PATH_INFO', '')).strip('-')[:60] or 'root'
+        return f"{datetime.utcnow():%Y%m%dT%H%M%S}-{environ.get('REQUEST_METHOD', 'GET')}-{slug}-{secrets.token_hex(3)}"
+
+    def _write(self, profile_id, environ, status, elapsed, profiler, sampler, statements):
+        directory = self.app.config['PROFILE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, profile_id)
+        try:
+            if profiler:
+                # Load with snakeviz, or flameprof/gprof2dot for a flamegraph
+                profiler.dump_stats(base + '.prof')
+            if sampler:
+                # Brendan Gregg's folded format: flamegraph.pl, speedscope, inferno
+                with open(base + '.folded', 'w') as f:
+                    f.write(sampler.folded())
+            with open(base + '.json', 'w') as f:
+                json.dump({
+                    'id': profile_id,
+                    'method': environ.get('REQUEST_METHOD'),
+                    'path': environ.get('PATH_INFO'),
+                    'query_string': environ.get('QUERY_STRING'),
+                    'status': status,
+                    'mode': 'cprofile' if profiler else 'sample',
+                    'wall_ms': round(elapsed * 1000, 3),
+                    'sql_count': len(statements),
+                    'sql_ms': round(sum(s['duration_ms'] for s in statements), 3),
+                    'sql': statements,
+                }, f, indent=2)
+        except OSError as e:
+            self.app.logger.error(f"Could not write profile {profile_id}: {e}")
+        else:
+            self.app.logger.info(f"Request profile written to {base}.*")
+
+
+def init_profiling(app):
+    """Wrap the WSGI app so requests can opt in to profiling.
+
+    Refused unless PROFILING_SECRET is set to something other than the
+    public default key, since anyone could mint tokens with that one.
+    """
+    if not app.config.get('PROFILING_ENABLED', True):
+        return
+    secret = app.config.get('PROFILING_SECRET')
+    if not secret or secret == DEFAULT_SECRET_KEY:
+        app.logger.warning('Request profiling disabled: set PROFILING_SECRET to a private value')
+        return
+    app.wsgi_app = ProfilingMiddleware(app.wsgi_app, app)
+    app.extensions['profiling'] = app.wsgi_app
@@ -0,0 +1,142 @@
+"""Per-request SQL statement counting, N+1 detection and query budgets.
+
+In development every request is tracked and offenders are logged; under
+testing (QUERY_BUDGET_STRICT) an endpoint that exceeds the budget declared
+with ``@query_budget`` fails the request outright, so the test fails too.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, request
+
+from sql_timing import add_consumer
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryTracker:
+    """Collects the statements run on this thread while it is active."""
+
+    MAX_PARAM_SAMPLES = 20
+
+    def __init__(self):
+        self.count = 0
+        self.statements = {}  # SQL text -> [executions, set of distinct parameter reprs]
+
+    def record(self, statement, parameters):
+        self.count += 1
+        entry = self.statements.get(statement)
+        if entry is None:
+            entry = self.statements[statement] = [0, set()]
+        entry[0] += 1
+        if len(entry[1]) < self.MAX_PARAM_SAMPLES:
+            entry[1].add(repr(parameters))
+
+    def repeated(self, threshold):
+        """Statements run ``threshold``+ times with differing parameters (N+1 suspects)."""
+        return [
+            (statement, executions)
+            for statement, (executions, params) in self.statements.items()
+            if executions >= threshold and len(params) > 1
+        ]
+
+    def __enter__(self):
+        stack = getattr(_local, 'trackers', None)
+        if stack is None:
+            stack = _local.trackers = []
+        stack.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        stack = getattr(_local, 'trackers', [])
+        if self in stack:
+            stack.remove(self)
+        return False
+
+
+def _track_statement(conn, statement, parameters, executemany, elapsed):
+    for tracker in getattr(_local, 'trackers', ()):
+        tracker.record(statement, parameters)
+
+
+add_consumer(_track_statement)
+
+
+def query_budget(max_queries):
+    """Declare the most SQL statements a view may run per request."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            return fn(*args, **kwargs)
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def assert_max_queries(max_queries, n_plus_one_threshold=None):
+    """Fail if the block runs more than ``max_queries`` statements (or an N+1)."""
+    with QueryTracker() as tracker:
+        yield tracker
+    if tracker.count > max_queries:
+        raise QueryBudgetExceeded(_describe(tracker, f"{tracker.count} queries, budget is {max_queries}"))
+    if n_plus_one_threshold:
+        repeated = tracker.repeated(n_plus_one_threshold)
+        if repeated:
+            raise QueryBudgetExceeded(_describe(tracker, f"possible N+1: {repeated[0][1]}x {repeated[0][0]}"))
+
+
+def _describe(tracker, headline):
+    top = sorted(tracker.statements.items(), key=lambda item: item[1][0], reverse=True)[:5]
+    return headline + ''.join(f"\n  {executions}x {' '.join(statement.split())[:200]}"
+                              for statement, (executions, _) in top)
+
+
+def init_query_tracker(app):
+    """Track every request's statements when QUERY_TRACKER_ENABLED is set."""
+    if not app.config.get('QUERY_TRACKER_ENABLED'):
+        return
+
+    @app.before_request
+    def _start_tracking():
+        g._query_tracker = QueryTracker().__enter__()
+
+    @app.teardown_request
+    def _stop_tracking(exc):
+        # after_request is skipped on some error paths; never leave a tracker behind
+        tracker = g.pop('_query_tracker', None)
+        if tracker is not None:
+            tracker.__exit__(None, None, None)
+
+    @app.after_request
+    def _check_queries(response):
+        tracker = g.pop('_query_tracker', None)
+        if tracker is None:
+            return response
+        tracker.__exit__(None, None, None)
+
+        config = current_app.config
+        view = current_app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', None)
+        where = f"{request.method} {request.path}"
+        if config.get('DEBUG') or config.get('TESTING'):
+            response.headers['X-Query-Count'] = str(tracker.count)
+
+        for statement, executions in tracker.repeated(config.get('QUERY_N_PLUS_ONE_THRESHOLD', 5)):
+            logger.warning("Possible N+1 in %s: %dx %s", where, executions, ' '.join(statement.split())[:200])
+
+        if budget is not None and tracker.count > budget:
+            message = _describe(tracker, f"{where} ran {tracker.count} queries, budget is {budget}")
+            if config.get('QUERY_BUDGET_STRICT'):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
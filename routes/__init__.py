@@ -3,6 +3,7 @@ from routes.discover_routes import discover_bp
 #from routes.dashboard_routes import dashboard_bp
 from routes.activity_routes import activity_bp
 from routes.chatbot_routes import chatbot_bp
+from routes.admin_routes import admin_bp
 
 
 def register_blueprints(app):
@@ -12,4 +13,5 @@ def register_blueprints(app):
     app.register_blueprint(chatbot_bp, url_prefix='/api/chatbot')
     #app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
     app.register_blueprint(discover_bp, url_prefix='/api/discover')
-    app.register_blueprint(user_bp, url_prefix='/api/user')
\ No newline at end of file
+    app.register_blueprint(user_bp, url_prefix='/api/user')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
\ No newline at end of file
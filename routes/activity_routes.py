@@ -4,6 +4,10 @@ from models.activity import Activity, EnergyLog, TransportLog
 from models.user import User
 from app import db
 from helper import ENERGY_EMISSIONS, TRANSPORT_EMISSIONS
+from query_tracker import query_budget
+from schemas import ActivityOut, columnar, list_options
+from services.activity_service import list_activities, summarize_activities
+from utils import etag_by_data_version
 
 activity_bp = Blueprint('activity_bp', __name__)
 
@@ -117,6 +121,7 @@ def log_activity():
             )
             db.session.add(transport_log)
 
+        user.bump_data_version()
         db.session.commit()
         
         # ✅ Return format matching frontend expectations
@@ -144,8 +149,13 @@ def log_activity():
 
 @activity_bp.route('/activities', methods=['GET'])
 @jwt_required()  # ✅ Add authentication
+@etag_by_data_version
+@query_budget(3)
 def get_activities():
-    """Get all activities for current user"""
+    """Get all activities for current user
+
+    Optional: ?fields=id,title,co2 to select fields, ?format=compact for parallel arrays
+    """
     try:
         # Get current user
         current_user_email = get_jwt_identity()
@@ -157,55 +167,24 @@ def get_activities():
                 'message': 'User not found'
             }), 404
 
-        # Filter by user and optionally by category
-        category = request.args.get('category')
-        
-        query = Activity.query.filter_by(user_id=user.id)
-        
-        if category and category != 'all':
-            query = query.filter_by(category=category.capitalize())
-        
-        activities = query.order_by(Activity.timestamp.desc()).all()
+        try:
+            fields, compact = list_options(request.args, ActivityOut)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+
+        # Flat column rows encoded straight to JSON, no ORM objects or dicts
+        data = list_activities(user.id, request.args.get('category'), fields)
         
-        data = []
-        for act in activities:
-            co2 = 0
-            title = act.notes or act.category
-            
-            # Get CO2 from related logs
-            if act.energy_log:
-                co2 = act.energy_log.co2_emission
-                title = act.notes or act.energy_log.energy_type
-            elif act.transport_log:
-                co2 = act.transport_log.co2_emission
-                title = act.notes or act.transport_log.vehicle_type
-            
-            entry = {
-                "id": act.id,
-                "title": title,
-                "category": act.category.lower(),  # ✅ Return lowercase to match frontend
-                "co2": co2,
-                "time": act.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                "notes": act.notes,
-                "timestamp": act.timestamp.isoformat(),
-            }
-            
-            # Add detailed info
-            if act.energy_log:
-                entry["details"] = {
-                    "energy_type": act.energy_log.energy_type,
-                    "energy_amount": act.energy_log.energy_amount,
-                    "energy_unit": act.energy_log.energy_unit,
-                    "co2_emission": act.energy_log.co2_emission
-                }
-            elif act.transport_log:
-                entry["details"] = {
-                    "vehicle_type": act.transport_log.vehicle_type,
-                    "distance": act.transport_log.distance,
-                    "co2_emission": act.transport_log.co2_emission
-                }
-            
-            data.append(entry)
+        if compact:
+            return jsonify({
+                'success': True,
+                'format': 'compact',
+                'count': len(data),
+                'data': columnar(data, fields or ActivityOut.__struct_fields__)
+            }), 200
         
         return jsonify({
             'success': True,
@@ -247,6 +226,7 @@ def delete_activity(activity_id):
             }), 404
 
         db.session.delete(activity)
+        user.bump_data_version()
         db.session.commit()
         
         return jsonify({
@@ -267,6 +247,8 @@ def delete_activity(activity_id):
 
 @activity_bp.route('/summary', methods=['GET'])
 @jwt_required()  # ✅ Add authentication
+@etag_by_data_version
+@query_budget(3)
 def get_summary():
     """Get activity summary for current user"""
     try:
@@ -280,26 +262,9 @@ def get_summary():
                 'message': 'User not found'
             }), 404
 
-        # Get all activities for user
-        activities = Activity.query.filter_by(user_id=user.id).all()
-        
-        total_emissions = 0
-        for act in activities:
-            if act.energy_log:
-                total_emissions += act.energy_log.co2_emission or 0
-            elif act.transport_log:
-                total_emissions += act.transport_log.co2_emission or 0
-        
-        count = len(activities)
-        average = total_emissions / count if count > 0 else 0
-        
         return jsonify({
             'success': True,
-            'data': {
-                'total_emissions': round(total_emissions, 2),
-                'activities_logged': count,
-                'average_impact': round(average, 2)
-            }
+            'data': summarize_activities(user.id)
         }), 200
         
     except Exception as e:
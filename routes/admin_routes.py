@@ -0,0 +1,79 @@
+import json
+import os
+from cache import app_cache
+from flask import Blueprint, current_app, request, jsonify
+from profiling import HEADER, MODES, make_profile_token
+from slow_query_log import slow_query_log
+from utils import admin_required
+
+admin_bp = Blueprint('admin_bp', __name__)
+
+@admin_bp.route('/profile-token', methods=['POST'])
+@admin_required
+def create_profile_token():
+    """Mint a single-use token that profiles the request sending it"""
+    if 'profiling' not in current_app.extensions:
+        return jsonify({'success': False, 'message': 'Request profiling is not enabled'}), 503
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode', 'cprofile')
+    if mode not in MODES:
+        return jsonify({'success': False, 'message': f"mode must be one of {', '.join(MODES)}"}), 400
+
+    return jsonify({
+        'success': True,
+        'header': HEADER,
+        'token': make_profile_token(current_app.config['PROFILING_SECRET'], mode),
+        'expires_in': current_app.config['PROFILE_TOKEN_MAX_AGE']
+    }), 201
+
+@admin_bp.route('/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    """Summaries of the most recent request profiles"""
+    directory = current_app.config['PROFILE_DIR']
+    limit = min(request.args.get('limit', 20, type=int), 200)
+    try:
+        names = sorted((n for n in os.listdir(directory) if n.endswith('.json')), reverse=True)[:limit]
+    except FileNotFoundError:
+        names = []
+
+    profiles = []
+    for name in names:
+        try:
+            with open(os.path.join(directory, name)) as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue
+        summary.pop('sql', None)
+        profiles.append(summary)
+
+    return jsonify({'success': True, 'data': profiles}), 200
+
+@admin_bp.route('/slow-queries', methods=['GET'])
+@admin_required
+def slow_queries():
+    """Slowest statements by fingerprint, with their query plans"""
+    sort = request.args.get('sort', 'total_ms')
+    if sort not in ('total_ms', 'max_ms', 'count'):
+        return jsonify({'success': False, 'message': 'sort must be one of total_ms, max_ms, count'}), 400
+    limit = min(request.args.get('limit', 20, type=int), 200)
+
+    return jsonify({'success': True, 'data': slow_query_log.summary(limit=limit, sort=sort)}), 200
+
+@admin_bp.route('/cache', methods=['GET'])
+@admin_required
+def cache_stats():
+    """Hit and miss counts per cached namespace (this worker)"""
+    return jsonify({'success': True, 'data': app_cache.stats()}), 200
+
+@admin_bp.route('/cache/invalidate', methods=['POST'])
+@admin_required
+def invalidate_cache():
+    """Drop every cached entry carrying one of the given tags"""
+    data = request.get_json(silent=True) or {}
+    tags = data.get('tags')
+    if not tags or not isinstance(tags, list) or not all(isinstance(t, str) for t in tags):
+        return jsonify({'success': False, 'message': 'tags must be a non-empty list of strings'}), 400
+
+    app_cache.invalidate_tags(*tags)
+    return jsonify({'success': True, 'message': f"Invalidated {len(tags)} tag(s)"}), 200
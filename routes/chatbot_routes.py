@@ -1,22 +1,51 @@
-from flask import Blueprint, request, jsonify
-from models.chat import ChatbotModel
+import json
+from contextlib import closing
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from config import Config
+from models.chat import ChatbotModel, is_personal_question
+from services.chat_executor import ChatRejected, chat_executor
+from services.chat_history_service import chat_history
+from services.emissions_context import emissions_context
 
 chatbot_bp = Blueprint('chatbot', __name__)
-chatbot_model = ChatbotModel()
+chatbot_model = ChatbotModel(history_store=chat_history)
+
+@chatbot_bp.record_once
+def _bind_history(state):
+    chat_history.init_app(state.app)
+
+def _personal_context(identity, message):
+    """Emissions digest for the identity that owns the chat session.
+
+    Only questions about the user's own data get it; generic ones stay
+    answerable from the shared first-turn cache.
+    """
+    if not is_personal_question(message):
+        return None
+    try:
+        return emissions_context.get_for_identity(identity)
+    except Exception as e:
+        # Missing context shouldn't break the chat itself
+        print(f"Chat context unavailable: {str(e)}")
+        return None
 
 @chatbot_bp.route('/chat', methods=['POST'])
+@jwt_required()
 def chat():
     """Send message to chatbot"""
     try:
         data = request.get_json()
-        user_id = data.get('user_id')
+        # Sessions and stored history belong to the signed-in user
+        user_id = get_jwt_identity()
         message = data.get('message')
         
-        if not user_id or not message:
-            return jsonify({'error': 'user_id and message required'}), 400
+        if not message:
+            return jsonify({'error': 'message required'}), 400
         
-        # Get response from chatbot
-        response = chatbot_model.send_message(user_id, message)
+        # Get response from chatbot on the bounded pool, not this request worker
+        context = _personal_context(user_id, message)
+        response = chat_executor.run(user_id, chatbot_model.send_message, user_id, message, context)
         
         # Additional cleaning if needed (already done in model)
         # But we can add extra validation here
@@ -26,6 +55,8 @@ def chat():
             'response': response
         }), 200
         
+    except ChatRejected as e:
+        return _rejected(e)
     except Exception as e:
         print(f"Chatbot error: {str(e)}")  # Log error
         return jsonify({
@@ -34,16 +65,63 @@ def chat():
             'message': str(e)
         }), 500
 
+def _rejected(e):
+    response = jsonify({'success': False, 'error': str(e)})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, e.status_code
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@chatbot_bp.route('/chat/stream', methods=['POST'])
+@jwt_required()
+def chat_stream():
+    """Stream the chatbot reply as Server-Sent Events (message, done, error)"""
+    data = request.get_json(silent=True) or {}
+    user_id = get_jwt_identity()
+    message = data.get('message')
+    
+    if not message:
+        return jsonify({'error': 'message required'}), 400
+
+    context = _personal_context(user_id, message)
+
+    # Admit before the response starts so overload is a plain 429/503
+    try:
+        stream = chat_executor.stream(user_id, lambda: chatbot_model.stream_message(user_id, message, context))
+    except ChatRejected as e:
+        return _rejected(e)
+
+    def events():
+        # Closing the stream on disconnect stops the worker and rewinds the partial turn
+        with closing(stream) as chunks:
+            try:
+                yield ": stream open\n\n"
+                for chunk in chunks:
+                    yield _sse('message', {'text': chunk})
+                yield _sse('done', {'success': True})
+            except GeneratorExit:
+                raise
+            except Exception as e:
+                print(f"Chatbot stream error: {str(e)}")
+                yield _sse('error', {
+                    'success': False,
+                    'error': 'Failed to get response from chatbot',
+                    'message': str(e)
+                })
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @chatbot_bp.route('/chat/clear', methods=['POST'])
+@jwt_required()
 def clear_chat():
     """Clear chat history"""
     try:
-        data = request.get_json()
-        user_id = data.get('user_id')
-        
-        if not user_id:
-            return jsonify({'error': 'user_id required'}), 400
-        
+        user_id = get_jwt_identity()
         chatbot_model.clear_chat(user_id)
         
         return jsonify({
@@ -58,24 +136,42 @@ def clear_chat():
         }), 500
 
 @chatbot_bp.route('/chat/history', methods=['GET'])
+@jwt_required()
 def get_chat_history():
-    """Get chat history for a user (optional endpoint)"""
+    """Get the signed-in user's stored chat turns, newest first (keyset paginated via ?before=)"""
     try:
-        user_id = request.args.get('user_id')
+        user_id = get_jwt_identity()
         
-        if not user_id:
-            return jsonify({'error': 'user_id required'}), 400
+        try:
+            limit = int(request.args.get('limit', Config.CHAT_HISTORY_PAGE_SIZE))
+            before = request.args.get('before', type=int)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        limit = max(1, min(limit, Config.CHAT_HISTORY_MAX_PAGE_SIZE))
         
-        # Check if chat exists
-        has_history = user_id in chatbot_model.active_chats
+        turns, next_cursor = chat_history.page(user_id, limit, before)
         
         return jsonify({
             'success': True,
-            'has_history': has_history
+            'has_history': bool(turns) or before is not None or user_id in chatbot_model.active_chats,
+            'turns': [turn.serialize() for turn in turns],
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+@chatbot_bp.route('/chat/stats', methods=['GET'])
+def get_chat_stats():
+    """Resident chat sessions, history bytes and executor load for this worker"""
+    return jsonify({
+        'success': True,
+        'data': {
+            **chatbot_model.stats(),
+            'executor': chat_executor.stats(),
+            'emissions_context': emissions_context.stats()
+        }
+    }), 200
@@ -1,22 +1,20 @@
-from flask import Blueprint, request, jsonify
-import os
-import json
-from services.discover_service import geocode_place, find_nearby_recycling_centers
-from utils import haversine_distance
-from geopy.geocoders import Nominatim
-
-geolocator = Nominatim(user_agent="ecotrack-ai-application")
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.user import User
+from services.discover_service import ALL_PLACES, geocode_place, search_places as search_places_near, reverse_geocode as reverse_geocode_place, find_nearby_recycling_centers
+from services.cluster_service import cluster_index
+from services.geocode_client import GeocoderBusyError
+from services.user_service import schedule_geocode
+from services.recycling_import import detect_format, iter_records, import_recycling_centers
+from schemas import PlaceOut, columnar, list_options
+from utils import admin_required
 
 discover_bp = Blueprint('discover_bp', __name__, url_prefix='/api')
 
-DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
-PLACES_FILE = os.path.join(DATA_DIR, 'places.json')
-
-try:
-    with open(PLACES_FILE) as f:
-        ALL_PLACES = json.load(f)
-except FileNotFoundError:
-    ALL_PLACES = []
+def _geocoder_busy(error):
+    response = jsonify({'error': 'Geocoding service is busy, please retry shortly'})
+    response.headers['Retry-After'] = str(max(1, round(error.retry_after)))
+    return response, 503
 
 @discover_bp.route('/', methods=['GET'])
 def health():
@@ -27,7 +25,10 @@ def geocode():
     place = request.args.get('place', '').strip()
     if not place:
         return jsonify({"error": "The 'place' query parameter is required."}), 400
-    coords = geocode_place(place)
+    try:
+        coords = geocode_place(place)
+    except GeocoderBusyError as e:
+        return _geocoder_busy(e)
     if not coords:
         return jsonify({"error": "Location not found"}), 404
     return jsonify({
@@ -37,42 +38,94 @@ def geocode():
 
 @discover_bp.route('/search', methods=['GET'])
 def search_places():
+    """?q=&lat=&lng=, optionally &fields=id,name,distance_km and &format=compact"""
     query = request.args.get('q', '').lower().strip()
     user_lat = request.args.get('lat', type=float)
     user_lng = request.args.get('lng', type=float)
     if user_lat is None or user_lng is None:
         return jsonify({"error": "User coordinates (lat, lng) are required"}), 400
+    try:
+        fields, compact = list_options(request.args, PlaceOut)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    results = []
-    for place in ALL_PLACES:
-        searchable = (place.get("name", "").lower() + " " +
-                      place.get("category", "").lower() + " " +
-                      " ".join(place.get("keywords", [])).lower())
-        if query in searchable or not query:
-            dist = haversine_distance(user_lat, user_lng, place.get("lat", 0), place.get("lng", 0))
-            results.append({
-                "id": place.get("id"),
-                "name": place.get("name"),
-                "category": place.get("category"),
-                "rating": place.get("rating", 0),
-                "distance_km": dist,
-                "coordinates": [place.get("lng", 0), place.get("lat", 0)]
-            })
+    results = search_places_near(query, user_lat, user_lng, fields)
+    if compact:
+        return jsonify(columnar(results, fields or PlaceOut.__struct_fields__))
+    return jsonify(results)
 
-    if not results and query:
-        coords = geocode_place(query)
-        if coords:
-            results.append({
-                "id": 0,
-                "name": coords['display_name'],
-                "category": "Unknown",
-                "rating": 0,
-                "distance_km": 0,
-                "coordinates": [coords['lng'], coords['lat']]
-            })
+@discover_bp.route('/nearby/me', methods=['GET'])
+@jwt_required()
+def nearby_me():
+    """Recycling centers near the user's stored (pre-geocoded) location"""
+    user = User.query.filter_by(email=get_jwt_identity()).first()
+    if not user:
+        return jsonify({'success': False, 'message': 'User not found'}), 404
+    if user.latitude is None or user.longitude is None:
+        if user.location and not user.location_geocoded_at:
+            # An earlier lookup hit a busy or unreachable geocoder; try again
+            schedule_geocode(current_app._get_current_object(), user.id, user.location)
+            message = 'Location is still being resolved'
+        else:
+            message = 'Set a recognisable location on your profile first'
+        return jsonify({'success': False, 'message': message}), 404
 
-    results.sort(key=lambda x: x["distance_km"])
-    return jsonify(results)
+    radius_km = min(max(request.args.get('radius_km', 5, type=float), 0.1), 50)
+    centers = find_nearby_recycling_centers(user.latitude, user.longitude, radius_km)
+    return jsonify({
+        'success': True,
+        'location': {'name': user.location, 'lat': user.latitude, 'lng': user.longitude},
+        'data': centers
+    })
+
+@discover_bp.route('/clusters', methods=['GET'])
+def get_clusters():
+    """Pre-aggregated map clusters for a viewport: ?bbox=minLng,minLat,maxLng,maxLat&zoom=12"""
+    bbox = request.args.get('bbox', '')
+    zoom = request.args.get('zoom', type=int)
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(','))
+    except ValueError:
+        return jsonify({"error": "bbox must be 'minLng,minLat,maxLng,maxLat'"}), 400
+    if zoom is None:
+        return jsonify({"error": "The 'zoom' query parameter is required."}), 400
+    if min_lat > max_lat:
+        return jsonify({"error": "bbox minLat must not exceed maxLat"}), 400
+
+    clusters = cluster_index.query((min_lng, min_lat, max_lng, max_lat), zoom)
+    return jsonify({
+        "zoom": zoom,
+        "count": len(clusters),
+        "clusters": clusters
+    })
+
+@discover_bp.route('/admin/import', methods=['POST'])
+@admin_required
+def import_centers():
+    """Bulk import recycling centers from an uploaded CSV or GeoJSON file"""
+    upload = request.files.get('file')
+    if upload:
+        stream, filename, content_type = upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, content_type = request.stream, None, request.mimetype
+
+    fmt = request.args.get('format') or detect_format(filename, content_type)
+    if fmt not in ('csv', 'geojson'):
+        return jsonify({'success': False, 'message': "format must be 'csv' or 'geojson'"}), 400
+
+    try:
+        stats = import_recycling_centers(
+            iter_records(stream, fmt),
+            batch_size=request.args.get('batch_size', 500, type=int),
+            dedupe_metres=request.args.get('dedupe_metres', 25.0, type=float)
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        print(f"Recycling center import error: {e}")
+        return jsonify({'success': False, 'message': f'Import failed: {str(e)}'}), 500
+
+    return jsonify({'success': True, 'data': stats}), 201
 
 @discover_bp.route('/places/fallback', methods=['GET'])
 def fallback_places():
@@ -99,15 +152,17 @@ def reverse_geocode():
         return jsonify({'error': 'Longitude and latitude parameters are required'}), 400
     
     try:
-        # Reverse geocode: coordinates to place name
-        location = geolocator.reverse(f"{lat}, {lng}")
+        # Reverse geocode: coordinates to place name (cached on a coordinate grid)
+        location = reverse_geocode_place(float(lat), float(lng))
         
         if location:
             return jsonify({
-                'place_name': location.address,
+                'place_name': location['place_name'],
                 'coordinates': [float(lng), float(lat)]
             })
         else:
             return jsonify({'error': 'Location not found'}), 404
+    except GeocoderBusyError as e:
+        return _geocoder_busy(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
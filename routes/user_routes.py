@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
 from services.user_service import UserService
 from datetime import timedelta
+from schemas import UserOut, parse_fields
+from utils import etag_by_user_version
 
 user_bp = Blueprint('user', __name__)
 user_service = UserService()
@@ -129,10 +131,20 @@ def login():
 
 @user_bp.route('/profile', methods=['GET'])
 @jwt_required()
+@etag_by_user_version('updated_at')  # every profile write, login and geocode touches it
 def get_profile():
+    """Optional: ?fields=username,display_name to select fields"""
+    try:
+        fields = parse_fields(request.args.get('fields'), UserOut)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
     try:
         current_user_email = get_jwt_identity()
-        user_data = user_service.get_user_by_email(current_user_email)
+        user_data = user_service.get_user_by_email(current_user_email, fields)
         
         if not user_data:
             return jsonify({
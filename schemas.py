@@ -0,0 +1,157 @@
+"""Typed response schemas, encoded directly by MsgspecJSONProvider.
+
+Field order matches the dicts these replace, so responses keep their
+shape. Build them with ``from_row`` / ``from_model`` straight from query
+rows or ORM objects; ``jsonify`` accepts them anywhere a dict would go.
+``fields=`` requests get a generated Struct with just those fields
+(``sparse_schema``), and ``format=compact`` lists become parallel arrays
+(``columnar``).
+"""
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Union
+
+import msgspec
+
+FORMATS = ('objects', 'compact')
+
+
+def parse_fields(value, schema):
+    """``fields=a,b`` as a tuple in schema order, or None for every field."""
+    if not value:
+        return None
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    known = schema.__struct_fields__
+    unknown = requested.difference(known)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}. Available: {', '.join(known)}")
+    return tuple(name for name in known if name in requested) or None
+
+
+@lru_cache(maxsize=256)
+def sparse_schema(schema, fields):
+    """A Struct type with only ``fields`` of ``schema`` (``schema`` itself for None)."""
+    if fields is None or fields == schema.__struct_fields__:
+        return schema
+    info = {field.name: field for field in msgspec.structs.fields(schema)}
+    definitions = [
+        (name, info[name].type) if info[name].default is msgspec.NODEFAULT
+        else (name, info[name].type, info[name].default)
+        for name in fields
+    ]
+    return msgspec.defstruct(f"{schema.__name__}_{'_'.join(fields)}", definitions,
+                             omit_defaults=schema.__struct_config__.omit_defaults)
+
+
+def list_options(args, schema):
+    """``(fields, compact)`` from the ``fields=`` and ``format=`` query args; ValueError if invalid."""
+    fields = parse_fields(args.get('fields'), schema)
+    output_format = args.get('format') or 'objects'
+    if output_format not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    return fields, output_format == 'compact'
+
+
+def columnar(items, fields):
+    """Parallel arrays, one per field, instead of a list of objects."""
+    return {name: [getattr(item, name) for item in items] for name in fields}
+
+
+class EnergyDetails(msgspec.Struct):
+    energy_type: str
+    energy_amount: float
+    energy_unit: str
+    co2_emission: Optional[float]
+
+
+class TransportDetails(msgspec.Struct):
+    vehicle_type: str
+    distance: float
+    co2_emission: Optional[float]
+
+
+class ActivityOut(msgspec.Struct, omit_defaults=True):
+    id: int
+    title: str
+    category: str
+    co2: Optional[float]
+    time: str
+    notes: Optional[str]
+    timestamp: datetime
+    details: Union[EnergyDetails, TransportDetails, None] = None
+
+    @classmethod
+    def from_row(cls, row, fields=None):
+        """From a services.activity_service query row holding the columns ``fields`` need."""
+        schema = sparse_schema(cls, fields)
+        return schema(*[_ACTIVITY_VALUES[name](row) for name in schema.__struct_fields__])
+
+
+def _activity_co2(row):
+    if row.energy_type is not None:
+        return row.energy_co2
+    if row.vehicle_type is not None:
+        return row.transport_co2
+    return 0.0
+
+
+def _activity_details(row):
+    if row.energy_type is not None:
+        return EnergyDetails(row.energy_type, row.energy_amount, row.energy_unit, row.energy_co2)
+    if row.vehicle_type is not None:
+        return TransportDetails(row.vehicle_type, row.distance, row.transport_co2)
+    return None
+
+
+# energy_type/vehicle_type are NOT NULL, so they tell which log (if any) joined
+_ACTIVITY_VALUES = {
+    'id': lambda row: row.id,
+    'title': lambda row: row.notes or row.energy_type or row.vehicle_type or row.category,
+    'category': lambda row: row.category.lower(),
+    'co2': _activity_co2,
+    'time': lambda row: row.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+    'notes': lambda row: row.notes,
+    'timestamp': lambda row: row.timestamp,
+    'details': _activity_details,
+}
+
+
+class PlaceOut(msgspec.Struct):
+    id: Optional[int]
+    name: str
+    category: str
+    rating: float
+    distance_km: float
+    coordinates: List[float]  # [lng, lat]
+
+
+class UserOut(msgspec.Struct):
+    id: int
+    username: str
+    email: str
+    name: Optional[str]
+    display_name: str
+    bio: Optional[str]
+    location: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    lifestyle_type: Optional[str]
+    carbon_goal: Optional[float]  # Legacy field
+    is_active: bool
+    is_verified: bool
+    created_at: datetime
+    updated_at: datetime
+    last_login: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, row, fields=None):
+        """From a User or a row of the columns ``fields`` need (see UserService)."""
+        schema = sparse_schema(cls, fields)
+        return schema(*[
+            (row.name or row.username) if name == 'display_name' else getattr(row, name)
+            for name in schema.__struct_fields__
+        ])
+
+    @classmethod
+    def from_model(cls, user):
+        return cls.from_row(user)
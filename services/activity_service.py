@@ -0,0 +1,90 @@
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from app import db
+from cache import cached, invalidate_on_commit
+from models.activity import Activity, EnergyLog, TransportLog
+from schemas import ActivityOut
+
+# Flat query columns, by the attribute name ActivityOut.from_row reads
+ACTIVITY_COLUMNS = {
+    'id': Activity.id,
+    'category': Activity.category,
+    'notes': Activity.notes,
+    'timestamp': Activity.timestamp,
+    'energy_type': EnergyLog.energy_type,
+    'energy_amount': EnergyLog.energy_amount,
+    'energy_unit': EnergyLog.energy_unit,
+    'energy_co2': EnergyLog.co2_emission.label('energy_co2'),
+    'vehicle_type': TransportLog.vehicle_type,
+    'distance': TransportLog.distance,
+    'transport_co2': TransportLog.co2_emission.label('transport_co2'),
+}
+ENERGY_COLUMNS = {'energy_type', 'energy_amount', 'energy_unit', 'energy_co2'}
+TRANSPORT_COLUMNS = {'vehicle_type', 'distance', 'transport_co2'}
+
+# Columns each ActivityOut field is computed from
+FIELD_COLUMNS = {
+    'id': ('id',),
+    'title': ('notes', 'category', 'energy_type', 'vehicle_type'),
+    'category': ('category',),
+    'co2': ('energy_type', 'vehicle_type', 'energy_co2', 'transport_co2'),
+    'time': ('timestamp',),
+    'notes': ('notes',),
+    'timestamp': ('timestamp',),
+    'details': ('energy_type', 'energy_amount', 'energy_unit', 'energy_co2',
+                'vehicle_type', 'distance', 'transport_co2'),
+}
+
+
+def user_activities_tag(user_id):
+    return f"activities:user:{user_id}"
+
+
+def list_activities(user_id, category=None, fields=None):
+    """A user's activities, newest first, as ActivityOut structs.
+
+    Only the columns behind ``fields`` are selected, and a log table is
+    joined only when one of its columns is needed.
+    """
+    names = []
+    for field in fields or ActivityOut.__struct_fields__:
+        names.extend(name for name in FIELD_COLUMNS[field] if name not in names)
+
+    query = select(*(ACTIVITY_COLUMNS[name] for name in names)).select_from(Activity)
+    if ENERGY_COLUMNS.intersection(names):
+        query = query.outerjoin(EnergyLog, EnergyLog.activity_id == Activity.id)
+    if TRANSPORT_COLUMNS.intersection(names):
+        query = query.outerjoin(TransportLog, TransportLog.activity_id == Activity.id)
+    query = query.where(Activity.user_id == user_id)
+    if category and category != 'all':
+        query = query.where(Activity.category == category.capitalize())
+    rows = db.session.execute(query.order_by(Activity.timestamp.desc()))
+    return [ActivityOut.from_row(row, fields) for row in rows]
+
+
+@cached('activity_summary', tags=lambda user_id: [user_activities_tag(user_id)])
+def summarize_activities(user_id):
+    """Total, count and average emissions over all of a user's activities."""
+    activities = Activity.query.filter_by(user_id=user_id).options(
+        joinedload(Activity.energy_log), joinedload(Activity.transport_log)
+    ).all()
+
+    total_emissions = 0
+    for act in activities:
+        if act.energy_log:
+            total_emissions += act.energy_log.co2_emission or 0
+        elif act.transport_log:
+            total_emissions += act.transport_log.co2_emission or 0
+
+    count = len(activities)
+    average = total_emissions / count if count > 0 else 0
+
+    return {
+        'total_emissions': round(total_emissions, 2),
+        'activities_logged': count,
+        'average_impact': round(average, 2)
+    }
+
+
+# Energy/transport logs are always written together with their Activity
+invalidate_on_commit(Activity, lambda activity: [user_activities_tag(activity.user_id)])
@@ -0,0 +1,268 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+from config import Config
+from metrics import LATENCY_BUCKETS, MetricsRegistry, _histogram, registry
+
+
+class ChatRejected(Exception):
+    """Base class for calls refused or abandoned by the chat executor."""
+    status_code = 503
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ChatQueueFull(ChatRejected):
+    status_code = 503
+
+
+class ChatUserLimit(ChatRejected):
+    status_code = 429
+
+
+class ChatDeadlineExceeded(ChatRejected):
+    status_code = 504
+
+
+_DONE = object()
+
+
+class _ChunkStream:
+    """Iterator over a streamed call whose ``close`` always reaches the producer.
+
+    Closing a generator that never started skips its ``finally``, so the
+    cancel flag is set here rather than inside the consumer.
+    """
+
+    def __init__(self, chunks, cancelled):
+        self._chunks = chunks
+        self._cancelled = cancelled
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._chunks)
+
+    def close(self):
+        self._cancelled.set()
+        self._chunks.close()
+
+
+class BoundedChatExecutor:
+    """Runs chatbot calls on a dedicated, bounded thread pool.
+
+    At most ``max_workers + max_queue`` calls are admitted at once and each
+    user may hold ``per_user_limit`` of them; anything beyond that is
+    rejected immediately instead of tying up a request worker. Callers wait
+    at most ``timeout`` seconds for a result. Queue depth, queue wait and
+    outcomes are also exported at /metrics (see ``metric_lines``).
+    """
+
+    LATENCY_WINDOW = 512
+
+    def __init__(self, max_workers, max_queue, per_user_limit, timeout):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.per_user_limit = per_user_limit
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chatbot')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._per_user = Counter()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._counters = Counter()
+        self._latencies = deque(maxlen=self.LATENCY_WINDOW)
+        self._wait_histogram = {}  # same layout as the metrics registry's histograms
+        self._upstream_histogram = {}
+
+    # Admission
+
+    def _admit(self, user_id):
+        with self._lock:
+            if self._per_user[user_id] >= self.per_user_limit:
+                self._counters['rejected_user_limit'] += 1
+                raise ChatUserLimit('Too many chat requests in flight for this user')
+            if not self._slots.acquire(blocking=False):
+                self._counters['rejected_queue_full'] += 1
+                raise ChatQueueFull('Chatbot is at capacity, please retry shortly')
+            self._per_user[user_id] += 1
+            self._queued += 1
+
+    def _release(self, user_id):
+        with self._lock:
+            self._per_user[user_id] -= 1
+            if self._per_user[user_id] <= 0:
+                del self._per_user[user_id]
+        self._slots.release()
+
+    def _started(self, admitted_at):
+        now = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            MetricsRegistry._observe(self._wait_histogram, (), LATENCY_BUCKETS, now - admitted_at)
+        return now
+
+    def _finished(self, started_at, ok):
+        elapsed = time.perf_counter() - started_at
+        with self._lock:
+            self._running -= 1
+            self._latencies.append(elapsed)
+            MetricsRegistry._observe(self._upstream_histogram, (), LATENCY_BUCKETS, elapsed)
+            self._counters['completed' if ok else 'failed'] += 1
+
+    # Execution
+
+    def run(self, user_id, fn, *args, **kwargs):
+        """Run ``fn`` on the pool and wait for its result up to the deadline."""
+        self._admit(user_id)
+        admitted_at = time.perf_counter()
+
+        def task():
+            started_at = self._started(admitted_at)
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                self._finished(started_at, ok)
+                self._release(user_id)
+
+        future = self._pool.submit(task)
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeout:
+            # A call that never left the queue gives its slot back now; a
+            # running one keeps it until the upstream call returns
+            cancelled = future.cancel()
+            with self._lock:
+                self._counters['deadline_exceeded'] += 1
+                if cancelled:
+                    self._queued -= 1
+                    self._counters['cancelled_in_queue'] += 1
+            if cancelled:
+                self._release(user_id)
+            raise ChatDeadlineExceeded('Chatbot took too long to respond')
+
+    def stream(self, user_id, make_generator):
+        """Admit a streaming call now and return a generator of its chunks.
+
+        The upstream generator is driven on the pool and chunks are handed
+        over through a queue; each chunk must arrive within ``timeout`` of
+        the previous one. Closing the returned generator (client disconnect)
+        stops the producer and closes the upstream one.
+        """
+        self._admit(user_id)
+        admitted_at = time.perf_counter()
+        chunks = queue.Queue()
+        cancelled = threading.Event()
+
+        def producer():
+            started_at = self._started(admitted_at)
+            ok = False
+            upstream = None
+            try:
+                # The client may have gone away while this call was queued
+                if cancelled.is_set():
+                    with self._lock:
+                        self._counters['cancelled_in_queue'] += 1
+                    return
+                upstream = make_generator()
+                for chunk in upstream:
+                    if cancelled.is_set():
+                        break
+                    chunks.put(chunk)
+                ok = not cancelled.is_set()
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                if upstream is not None:
+                    upstream.close()
+                chunks.put(_DONE)
+                self._finished(started_at, ok)
+                self._release(user_id)
+
+        self._pool.submit(producer)
+
+        def consume():
+            deadline = time.monotonic() + self.timeout
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        item = chunks.get(timeout=max(remaining, 0))
+                    except queue.Empty:
+                        with self._lock:
+                            self._counters['deadline_exceeded'] += 1
+                        raise ChatDeadlineExceeded('Chatbot took too long to respond')
+                    if item is _DONE:
+                        return
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+                    deadline = time.monotonic() + self.timeout
+            finally:
+                cancelled.set()
+
+        return _ChunkStream(consume(), cancelled)
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counters = dict(self._counters)
+            stats = {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'queue_depth': self._queued,
+                'running': self._running,
+                'users_in_flight': len(self._per_user),
+                **counters,
+            }
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 4) if latencies else None
+
+        stats['upstream_latency_seconds'] = {
+            'samples': len(latencies),
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'max': round(latencies[-1], 4) if latencies else None,
+        }
+        return stats
+
+    def metric_lines(self):
+        """Prometheus lines for the metrics registry's /metrics scrape."""
+        with self._lock:
+            gauges = {'queue_depth': self._queued, 'running': self._running, 'users_in_flight': len(self._per_user)}
+            counters = dict(self._counters)
+            wait = {key: list(values) for key, values in self._wait_histogram.items()}
+            upstream = {key: list(values) for key, values in self._upstream_histogram.items()}
+        lines = []
+        for name, value in gauges.items():
+            lines += [f'# TYPE chat_executor_{name} gauge', f'chat_executor_{name} {value}']
+        lines += ['# HELP chat_executor_calls_total Chat calls by outcome.',
+                  '# TYPE chat_executor_calls_total counter']
+        for outcome, value in sorted(counters.items()):
+            lines.append(f'chat_executor_calls_total{{outcome="{outcome}"}} {value}')
+        lines += _histogram('chat_executor_queue_wait_seconds', 'Time chat calls spent queued before a worker took them.',
+                            (), wait, LATENCY_BUCKETS)
+        lines += _histogram('chat_executor_upstream_seconds', 'Time chat calls spent running upstream.',
+                            (), upstream, LATENCY_BUCKETS)
+        return lines
+
+
+chat_executor = BoundedChatExecutor(
+    max_workers=Config.CHAT_EXECUTOR_WORKERS,
+    max_queue=Config.CHAT_EXECUTOR_QUEUE,
+    per_user_limit=Config.CHAT_MAX_IN_FLIGHT_PER_USER,
+    timeout=Config.CHAT_REQUEST_TIMEOUT,
+)
+registry.add_collector(chat_executor.metric_lines)
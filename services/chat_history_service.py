@@ -0,0 +1,156 @@
+import atexit
+import threading
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select
+
+from app import db
+from config import Config
+from models.chat_turn import ChatTurn
+
+
+class ChatHistoryService:
+    """Durable chat history shared by every worker.
+
+    Turns are buffered in memory and appended to ``chat_turns`` in batches,
+    either once ``batch_size`` turns are pending or every ``flush_interval``
+    seconds. Reads flush the local buffer first so a worker always sees its
+    own writes. Until ``init_app`` binds an app the service is a no-op.
+    """
+
+    def __init__(self, batch_size, flush_interval, rehydrate_turns, max_rehydrate_bytes, max_pending):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rehydrate_turns = rehydrate_turns
+        self.max_rehydrate_bytes = max_rehydrate_bytes
+        self.max_pending = max_pending
+        self.app = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._counters = {'written': 0, 'flushes': 0, 'failed_flushes': 0, 'dropped': 0}
+
+    def init_app(self, app):
+        if self.app is None:
+            atexit.register(self.flush)
+        self.app = app
+
+    # Writes
+
+    def append(self, user_id, message, reply):
+        if self.app is None:
+            return
+        row = {'user_id': user_id, 'message': message, 'reply': reply or '', 'created_at': datetime.utcnow()}
+        with self._lock:
+            self._pending.append(row)
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                # The database is unreachable; keep the newest turns
+                del self._pending[:overflow]
+                self._counters['dropped'] += overflow
+            full = len(self._pending) >= self.batch_size
+            self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='chat-history-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write all pending turns in one INSERT; returns how many were written."""
+        if self.app is None:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            with self.app.app_context():
+                try:
+                    db.session.execute(insert(ChatTurn), rows)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Chat history flush failed, will retry: {e}")
+                    with self._lock:
+                        self._pending[:0] = rows
+                        self._counters['failed_flushes'] += 1
+                    return 0
+            with self._lock:
+                self._counters['written'] += len(rows)
+                self._counters['flushes'] += 1
+            return len(rows)
+
+    def delete_user(self, user_id):
+        if self.app is None:
+            return
+        with self._flush_lock:
+            with self._lock:
+                self._pending = [row for row in self._pending if row['user_id'] != user_id]
+            with self.app.app_context():
+                try:
+                    db.session.execute(delete(ChatTurn).where(ChatTurn.user_id == user_id))
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+
+    # Reads
+
+    def recent_history(self, user_id):
+        """Latest turns (oldest first) as role/parts dicts, bounded by count and bytes."""
+        if self.app is None:
+            return []
+        self.flush()
+        with self.app.app_context():
+            rows = db.session.execute(
+                select(ChatTurn.message, ChatTurn.reply)
+                .where(ChatTurn.user_id == user_id)
+                .order_by(ChatTurn.id.desc())
+                .limit(self.rehydrate_turns)
+            ).all()
+
+        history = []
+        size = 0
+        for message, reply in rows:
+            size += len(message.encode('utf-8')) + len(reply.encode('utf-8'))
+            if history and size > self.max_rehydrate_bytes:
+                break
+            history[:0] = [
+                {'role': 'user', 'parts': [message]},
+                {'role': 'model', 'parts': [reply]},
+            ]
+        return history
+
+    def page(self, user_id, limit, before=None):
+        """Keyset page of turns, newest first; returns (turns, next_cursor)."""
+        self.flush()
+        query = select(ChatTurn).where(ChatTurn.user_id == user_id)
+        if before is not None:
+            query = query.where(ChatTurn.id < before)
+        rows = db.session.execute(query.order_by(ChatTurn.id.desc()).limit(limit + 1)).scalars().all()
+        next_cursor = rows[limit - 1].id if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self._pending), **self._counters}
+
+
+chat_history = ChatHistoryService(
+    batch_size=Config.CHAT_PERSIST_BATCH_SIZE,
+    flush_interval=Config.CHAT_PERSIST_FLUSH_INTERVAL,
+    rehydrate_turns=Config.CHAT_REHYDRATE_TURNS,
+    max_rehydrate_bytes=Config.CHAT_MAX_HISTORY_BYTES,
+    max_pending=Config.CHAT_PERSIST_MAX_PENDING,
+)
@@ -0,0 +1,154 @@
+import math
+from collections import Counter
+
+from cache import TaggedSnapshot
+from config import Config
+from models.discover import Discover
+from services.discover_service import ALL_PLACES, DISCOVER_TAG
+
+MAX_ZOOM = 18
+# Cells per map tile side; 4 gives ~64px cells on 256px tiles
+CELLS_PER_TILE = 4
+MAX_LAT = 85.05112878
+RECYCLING_CATEGORY = 'Recycling Center'
+
+
+def _cell(lat, lng, zoom):
+    """Web-mercator grid cell containing the point at the given zoom."""
+    n = (2 ** zoom) * CELLS_PER_TILE
+    lat = max(-MAX_LAT, min(MAX_LAT, lat))
+    x = int((lng + 180.0) / 360.0 * n)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+class _Bucket:
+    __slots__ = ('count', 'sum_lat', 'sum_lng', 'categories', 'sample')
+
+    def __init__(self):
+        self.count = 0
+        self.sum_lat = 0.0
+        self.sum_lng = 0.0
+        self.categories = Counter()
+        self.sample = None
+
+    def add_point(self, point):
+        self.count += 1
+        self.sum_lat += point['lat']
+        self.sum_lng += point['lng']
+        self.categories[point['category']] += 1
+        self.sample = point
+
+    def merge(self, other):
+        self.count += other.count
+        self.sum_lat += other.sum_lat
+        self.sum_lng += other.sum_lng
+        self.categories.update(other.categories)
+        self.sample = other.sample
+
+    def serialize(self):
+        result = {
+            'count': self.count,
+            'centroid': [round(self.sum_lng / self.count, 6), round(self.sum_lat / self.count, 6)],
+            'category': self.categories.most_common(1)[0][0],
+        }
+        if self.count == 1:
+            # A lone point renders as a normal marker
+            result['id'] = self.sample['id']
+            result['name'] = self.sample['name']
+            result['source'] = self.sample['source']
+        return result
+
+
+class ClusterIndex:
+    """Hierarchical grid of pre-aggregated map clusters.
+
+    Points are bucketed once at MAX_ZOOM and each coarser level is folded
+    from its children, so a viewport query only touches the cells it
+    returns. The index is rebuilt lazily once the Discover tag moves (see
+    discover_service) or ``ttl`` passes.
+    """
+
+    def __init__(self, places, ttl):
+        self._places = places
+        self._levels = TaggedSnapshot(DISCOVER_TAG, self.build, ttl)
+
+    def _points(self):
+        for place in self._places:
+            if place.get('lat') is None or place.get('lng') is None:
+                continue
+            yield {
+                'id': place.get('id'),
+                'name': place.get('name'),
+                'lat': float(place['lat']),
+                'lng': float(place['lng']),
+                'category': place.get('category') or 'Unknown',
+                'source': 'place',
+            }
+        rows = Discover.query.with_entities(
+            Discover.id, Discover.name, Discover.latitude, Discover.longitude
+        ).all()
+        for row in rows:
+            yield {
+                'id': row.id,
+                'name': row.name,
+                'lat': row.latitude,
+                'lng': row.longitude,
+                'category': RECYCLING_CATEGORY,
+                'source': 'recycling_center',
+            }
+
+    def build(self):
+        leaves = {}
+        for point in self._points():
+            key = _cell(point['lat'], point['lng'], MAX_ZOOM)
+            bucket = leaves.get(key)
+            if bucket is None:
+                bucket = leaves[key] = _Bucket()
+            bucket.add_point(point)
+
+        levels = {MAX_ZOOM: leaves}
+        for zoom in range(MAX_ZOOM - 1, -1, -1):
+            parents = {}
+            for (x, y), child in levels[zoom + 1].items():
+                key = (x >> 1, y >> 1)
+                bucket = parents.get(key)
+                if bucket is None:
+                    bucket = parents[key] = _Bucket()
+                bucket.merge(child)
+            levels[zoom] = parents
+        return levels
+
+    def query(self, bbox, zoom):
+        """Clusters intersecting ``bbox`` = (min_lng, min_lat, max_lng, max_lat)."""
+        zoom = max(0, min(MAX_ZOOM, int(zoom)))
+        cells = self._levels.get()[zoom]
+        min_lng, min_lat, max_lng, max_lat = bbox
+
+        if min_lng > max_lng:
+            # Viewport crosses the antimeridian
+            ranges = [(min_lng, 180.0), (-180.0, max_lng)]
+        else:
+            ranges = [(min_lng, max_lng)]
+
+        results = []
+        for lo_lng, hi_lng in ranges:
+            x0, y0 = _cell(max_lat, lo_lng, zoom)
+            x1, y1 = _cell(min_lat, hi_lng, zoom)
+            area = (x1 - x0 + 1) * (y1 - y0 + 1)
+            if area <= len(cells):
+                for x in range(x0, x1 + 1):
+                    for y in range(y0, y1 + 1):
+                        bucket = cells.get((x, y))
+                        if bucket is not None:
+                            results.append(bucket.serialize())
+            else:
+                # Viewport covers more cells than exist; scan the populated ones
+                for (x, y), bucket in cells.items():
+                    if x0 <= x <= x1 and y0 <= y <= y1:
+                        results.append(bucket.serialize())
+        return results
+
+
+cluster_index = ClusterIndex(ALL_PLACES, Config.DISCOVER_INDEX_TTL)
@@ -1,42 +1,145 @@
+import json
+import os
+from cache import TaggedSnapshot, app_cache, invalidate_on_commit
+from config import Config
+from schemas import PlaceOut, sparse_schema
 from models.discover import Discover
+from services.gazetteer import gazetteer
+from services.geocode_cache import geocode_cache
+from services.geocode_client import nominatim_client, GeocoderBusyError
+from services.spatial_index import SpatialGrid
 from utils import haversine_distance
 
-def geocode_place(place_name):
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+PLACES_FILE = os.path.join(DATA_DIR, 'places.json')
+
+try:
+    with open(PLACES_FILE) as f:
+        ALL_PLACES = json.load(f)
+except FileNotFoundError:
+    ALL_PLACES = []
+
+def geocode_place(place_name, raise_errors=False):
+    """Forward geocode a place name.
+
+    Exact or near-exact gazetteer matches are answered locally; anything
+    else goes to Nominatim. Weaker fuzzy matches are never used as a
+    fallback: "Mombasa Road" is not Mombasa. Raises GeocoderBusyError when
+    the upstream queue is full. With ``raise_errors``, transport failures
+    are raised too, so None always means "not found".
+    """
     if not place_name or not isinstance(place_name, str):
         return None
-    from geopy.geocoders import Nominatim
-    geolocator = Nominatim(user_agent="EcoTrack-AI/1.0")
+    local, score = gazetteer.lookup(place_name)
+    if local and score >= Config.GAZETTEER_CONFIDENCE:
+        return local
+    hit, cached = geocode_cache.get_forward(place_name)
+    if hit:
+        return cached
     try:
-        location = geolocator.geocode(place_name, timeout=10)
-        if location:
-            return {
-                'lat': location.latitude,
-                'lng': location.longitude,
-                'display_name': location.address
-            }
-        return None
+        result = nominatim_client.geocode(place_name)
+    except GeocoderBusyError:
+        raise
     except Exception as e:
+        # Transient failures are not cached
         print(f"Geocoding error for '{place_name}': {e}")
+        if raise_errors:
+            raise
         return None
+    geocode_cache.set_forward(place_name, result)
+    return result
+
+def reverse_geocode(lat, lng):
+    hit, cached = geocode_cache.get_reverse(lat, lng)
+    if hit:
+        return cached
+    try:
+        result = nominatim_client.reverse(lat, lng)
+    except GeocoderBusyError:
+        raise
+    except Exception as e:
+        print(f"Reverse geocoding error for '{lat}, {lng}': {e}")
+        raise
+    geocode_cache.set_reverse(lat, lng, result)
+    return result
+
+# Shared cache tag bumped whenever Discover rows change, in any process
+DISCOVER_TAG = 'discover'
+CENTER_CELL_KM = 1.0
+
+def _build_center_grid():
+    """Spatial grid over all Discover rows for nearby lookups."""
+    grid = SpatialGrid(CENTER_CELL_KM)
+    rows = Discover.query.with_entities(
+        Discover.id, Discover.name, Discover.address, Discover.latitude, Discover.longitude
+    ).all()
+    for row in rows:
+        grid.insert(row.latitude, row.longitude, {
+            'id': row.id,
+            'name': row.name,
+            'address': row.address,
+            'latitude': row.latitude,
+            'longitude': row.longitude,
+        })
+    return grid
+
+
+center_index = TaggedSnapshot(DISCOVER_TAG, _build_center_grid, Config.DISCOVER_INDEX_TTL)
+
+def invalidate_discover_indexes(rebuild=False):
+    """Mark the lookup structures derived from Discover rows stale in every process."""
+    app_cache.invalidate_tags(DISCOVER_TAG)
+    if rebuild:
+        center_index.get()
+
+# ORM writes invalidate after commit; bulk loaders call invalidate_discover_indexes()
+invalidate_on_commit(Discover, lambda center: [DISCOVER_TAG])
 
 def find_nearby_recycling_centers(lat, lng, radius_km=5):
     if lat is None or lng is None:
         return []
 
-    centers = Discover.query.all()
     nearby = []
-
-    for center in centers:
-        dist = haversine_distance(lat, lng, center.latitude, center.longitude)
-        if dist <= radius_km:
-            nearby.append({
-                'id': center.id,
-                'name': center.name,
-                'address': center.address,
-                'latitude': center.latitude,
-                'longitude': center.longitude,
-                'distance_km': dist
-            })
+    for center, dist in center_index.get().nearby(lat, lng, radius_km):
+        nearby.append({**center, 'distance_km': dist})
 
     nearby.sort(key=lambda x: x['distance_km'])
-    return nearby
\ No newline at end of file
+    return nearby
+
+def _matching_places(query):
+    """Places whose name, category or keywords contain ``query`` (all of them when empty)."""
+    matches = []
+    for place in ALL_PLACES:
+        searchable = (place.get("name", "").lower() + " " +
+                      place.get("category", "").lower() + " " +
+                      " ".join(place.get("keywords", [])).lower())
+        if query in searchable or not query:
+            matches.append((place.get("id"), place.get("name"), place.get("category"),
+                            place.get("rating", 0), place.get("lat", 0), place.get("lng", 0)))
+    return matches
+
+def search_places(query, user_lat, user_lng, fields=None):
+    """Text search over the places list, nearest first, as PlaceOut structs.
+
+    ``fields`` picks a subset of PlaceOut's fields.
+    """
+    results = [
+        (place_id, name, category, rating, haversine_distance(user_lat, user_lng, lat, lng), [lng, lat])
+        for place_id, name, category, rating, lat, lng in _matching_places(query)
+    ]
+
+    if not results and query:
+        try:
+            coords = geocode_place(query)
+        except GeocoderBusyError:
+            # Local results are still useful; skip the fallback instead of failing
+            coords = None
+        if coords:
+            results.append((0, coords['display_name'], "Unknown", 0, 0, [coords['lng'], coords['lat']]))
+
+    results.sort(key=lambda place: place[4])
+    if fields is None:
+        return [PlaceOut(*place) for place in results]
+    schema = sparse_schema(PlaceOut, fields)
+    positions = [PlaceOut.__struct_fields__.index(name) for name in fields]
+    return [schema(*[place[i] for i in positions]) for place in results]
@@ -0,0 +1,157 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from app import db
+from cache import app_cache, cached, invalidate_on_commit
+from config import Config
+from models.activity import Activity, EnergyLog, TransportLog
+from models.goal import Goal
+from models.user import User
+from services.activity_service import user_activities_tag
+
+GOAL_WINDOWS = {'daily': 1, 'weekly': 7, 'monthly': 30}
+
+
+def _kg(value):
+    return f"{value:.1f} kg"
+
+
+def build_digest(user_id, window_days=30, top_sources=3, now=None):
+    """Compact plain-text summary of a user's recent emissions and goals.
+
+    One grouped query covers the whole window (per day and source) and one
+    reads the active goals; the text stays within a few hundred tokens.
+    """
+    now = now or datetime.utcnow()
+    since = now - timedelta(days=window_days)
+    source = func.coalesce(EnergyLog.energy_type, TransportLog.vehicle_type, Activity.category)
+    co2 = func.coalesce(EnergyLog.co2_emission, TransportLog.co2_emission, 0)
+    day = func.date(Activity.timestamp)
+    rows = (
+        db.session.query(day, Activity.category, source, func.sum(co2), func.count(Activity.id))
+        .outerjoin(EnergyLog, EnergyLog.activity_id == Activity.id)
+        .outerjoin(TransportLog, TransportLog.activity_id == Activity.id)
+        .filter(Activity.user_id == user_id, Activity.timestamp >= since)
+        .group_by(day, Activity.category, source)
+        .all()
+    )
+    goals = (
+        db.session.query(Goal.goal_type, Goal.target_value, Goal.category)
+        .filter(Goal.user_id == user_id, Goal.is_active.is_(True))
+        .all()
+    )
+
+    today = now.date()
+    total = 0.0
+    count = 0
+    by_source = {}
+    by_age = []  # (days ago, category, kg)
+    for day_value, category, source_name, kg, n in rows:
+        kg = kg or 0.0
+        total += kg
+        count += n
+        key = (str(source_name).lower(), str(category).lower())
+        by_source[key] = by_source.get(key, 0.0) + kg
+        day_date = day_value if not isinstance(day_value, str) else datetime.strptime(day_value, '%Y-%m-%d').date()
+        by_age.append(((today - day_date).days, str(category).lower(), kg))
+
+    def emitted_within(days, category=None):
+        return sum(kg for age, cat, kg in by_age if age < days and (category is None or cat == category))
+
+    lines = [f"Emissions data for this user as of {today.isoformat()} (kg CO2e):"]
+    if not count:
+        lines.append(f"- No activities logged in the last {window_days} days.")
+    else:
+        lines.append(
+            f"- Last {window_days} days: {_kg(total)} from {count} activities "
+            f"(about {_kg(total / window_days)} per day)."
+        )
+        lines.append(f"- Last 7 days: {_kg(emitted_within(7))}; today: {_kg(emitted_within(1))}.")
+        top = sorted(by_source.items(), key=lambda item: item[1], reverse=True)[:top_sources]
+        lines.append('- Top sources: ' + ', '.join(
+            f"{name} ({category}) {_kg(kg)}" for (name, category), kg in top
+        ) + '.')
+    for goal_type, target, category in goals:
+        days = GOAL_WINDOWS.get(goal_type)
+        if days is None:
+            continue
+        scoped = category.lower() if category and category.lower() != 'all' else None
+        so_far = emitted_within(days, scoped)
+        status = 'on track' if so_far <= target else 'over target'
+        scope = f" for {category}" if scoped else ''
+        lines.append(
+            f"- {goal_type.capitalize()} goal{scope}: stay under {_kg(target)}; "
+            f"{_kg(so_far)} in the last {days} day{'s' if days > 1 else ''} ({status})."
+        )
+    return '\n'.join(lines)
+
+
+def user_goals_tag(user_id):
+    return f"goals:user:{user_id}"
+
+
+def _digest_tags(user_id, window_days, top_sources):
+    return [user_activities_tag(user_id), user_goals_tag(user_id)]
+
+
+@cached('emissions_digest', timeout=Config.CHAT_CONTEXT_TTL, tags=_digest_tags)
+def cached_digest(user_id, window_days, top_sources):
+    return build_digest(user_id, window_days, top_sources)
+
+
+class EmissionsContextCache:
+    """Per-user emissions digests for the chatbot, kept in the shared app cache.
+
+    Digests are tagged with the user's activities and goals, so a commit
+    that changes either (in any worker) invalidates them everywhere;
+    ``CHAT_CONTEXT_TTL`` bounds how stale the "today"/"last 7 days" figures
+    get. A chat turn costs a cache read rather than a round of activity
+    queries.
+    """
+
+    NAMESPACE = 'emissions_digest'
+
+    def __init__(self, max_users, window_days, top_sources):
+        self.max_users = max_users
+        self.window_days = window_days
+        self.top_sources = top_sources
+        self._user_ids = OrderedDict()  # JWT identity (email) -> user id
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """Return the user's digest, building it (needs an app context) on a miss."""
+        return cached_digest(user_id, self.window_days, self.top_sources)
+
+    def get_for_identity(self, email):
+        """Digest for a JWT identity; the email -> id lookup is cached in this process."""
+        with self._lock:
+            user_id = self._user_ids.get(email)
+        if user_id is None:
+            user_id = db.session.query(User.id).filter_by(email=email).scalar()
+            if user_id is None:
+                return None
+            with self._lock:
+                self._user_ids[email] = user_id
+                while len(self._user_ids) > self.max_users:
+                    self._user_ids.popitem(last=False)
+        return self.get(user_id)
+
+    def invalidate(self, user_id):
+        app_cache.invalidate_tags(*_digest_tags(user_id, self.window_days, self.top_sources))
+
+    def stats(self):
+        counts = app_cache.stats()['namespaces'].get(self.NAMESPACE, {'hits': 0, 'misses': 0})
+        return {'identities': len(self._user_ids), **counts}
+
+
+emissions_context = EmissionsContextCache(
+    max_users=Config.CHAT_CONTEXT_MAX_USERS,
+    window_days=Config.CHAT_CONTEXT_WINDOW_DAYS,
+    top_sources=Config.CHAT_CONTEXT_TOP_SOURCES,
+)
+
+# Activity writes already invalidate user_activities_tag (see activity_service)
+invalidate_on_commit(Goal, lambda goal: [user_goals_tag(goal.user_id)])
@@ -0,0 +1,133 @@
+import csv
+import os
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+from config import Config
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+GAZETTEER_FILE = os.path.join(DATA_DIR, 'kenya_gazetteer.csv')
+
+# Trailing qualifiers users add that don't help pick a place
+_NOISE_SUFFIXES = ('kenya', 'nairobi county', 'county')
+
+
+def normalize_name(text):
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"['’`]", '', text.casefold())
+    text = re.sub(r'[^\w]+', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Gazetteer:
+    """In-memory index over the bundled Kenyan gazetteer.
+
+    Exact (normalized) names and aliases resolve through a dict; anything
+    else is scored by trigram overlap (Dice coefficient) against an inverted
+    trigram index, which tolerates typos and missing words.
+    """
+
+    def __init__(self, path, min_score):
+        self.path = path
+        self.min_score = min_score
+        self._entries = []
+        self._exact = {}
+        self._names = []          # (normalized name, entry index, trigram count)
+        self._postings = defaultdict(list)
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                with open(self.path, newline='', encoding='utf-8') as f:
+                    for row in csv.DictReader(f):
+                        self._add(row)
+            except FileNotFoundError:
+                print(f"Gazetteer file not found: {self.path}")
+            self._loaded = True
+
+    def _add(self, row):
+        index = len(self._entries)
+        self._entries.append({
+            'lat': float(row['lat']),
+            'lng': float(row['lng']),
+            'display_name': f"{row['name']}, {row['county']}, Kenya",
+            'kind': row['kind'],
+        })
+        aliases = [a for a in (row.get('aliases') or '').split('|') if a]
+        for name in [row['name']] + aliases:
+            norm = normalize_name(name)
+            if not norm:
+                continue
+            self._exact.setdefault(norm, index)
+            name_id = len(self._names)
+            grams = trigrams(norm)
+            self._names.append((norm, index, len(grams)))
+            for gram in grams:
+                self._postings[gram].append(name_id)
+
+    def __len__(self):
+        self._load()
+        return len(self._entries)
+
+    def lookup(self, query):
+        """Return ``(result, score)`` for the best match, or ``(None, 0.0)``.
+
+        ``score`` is 1.0 for exact name/alias hits and the trigram Dice
+        coefficient otherwise; matches below ``min_score`` are dropped.
+        """
+        self._load()
+        norm = normalize_name(query or '')
+        if not norm:
+            return None, 0.0
+
+        candidates = [norm]
+        # "Westlands, Nairobi" -> also try the leading part on its own
+        head = normalize_name(query.split(',')[0])
+        if head and head != norm:
+            candidates.append(head)
+        for suffix in _NOISE_SUFFIXES:
+            if norm.endswith(' ' + suffix):
+                candidates.append(norm[:-len(suffix) - 1])
+
+        for candidate in candidates:
+            index = self._exact.get(candidate)
+            if index is not None:
+                return self._result(index), 1.0
+
+        best_index, best_score = None, 0.0
+        for candidate in candidates:
+            grams = trigrams(candidate)
+            shared = defaultdict(int)
+            for gram in grams:
+                for name_id in self._postings.get(gram, ()):
+                    shared[name_id] += 1
+            for name_id, count in shared.items():
+                _, index, name_grams = self._names[name_id]
+                score = 2.0 * count / (len(grams) + name_grams)
+                if score > best_score:
+                    best_index, best_score = index, score
+
+        if best_index is None or best_score < self.min_score:
+            return None, 0.0
+        return self._result(best_index), round(best_score, 3)
+
+    def _result(self, index):
+        entry = self._entries[index]
+        return {'lat': entry['lat'], 'lng': entry['lng'], 'display_name': entry['display_name']}
+
+
+gazetteer = Gazetteer(GAZETTEER_FILE, min_score=Config.GAZETTEER_MIN_SCORE)
@@ -0,0 +1,146 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from config import Config
+
+
+class GeocodeCache:
+    """Persistent SQLite cache for forward and reverse geocoding results.
+
+    Entries expire after a TTL, misses are cached for a shorter negative TTL,
+    and the table is trimmed back to ``max_entries`` by least-recent use.
+    """
+
+    # Only rewrite last_used when it is older than this, so hot keys
+    # don't turn every cache hit into a write.
+    TOUCH_INTERVAL = 60
+    # Check the table size once every this many writes.
+    EVICT_EVERY = 50
+
+    def __init__(self, path, ttl, negative_ttl, max_entries, reverse_precision):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.reverse_precision = reverse_precision
+        self._conn = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connection(self):
+        # sqlite3 connections can't be shared across fork(), so each process opens its own here
+        if self._conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            if self.path != ':memory:':
+                conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS geocode_cache ('
+                ' key TEXT PRIMARY KEY,'
+                ' payload TEXT,'
+                ' expires_at REAL NOT NULL,'
+                ' last_used REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_geocode_cache_last_used ON geocode_cache (last_used)')
+            self._conn = conn
+        return self._conn
+
+    # Keys
+
+    @staticmethod
+    def normalize_query(query):
+        """Fold case, accents, punctuation and whitespace so equivalent queries share a key."""
+        text = unicodedata.normalize('NFKD', query)
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+        text = re.sub(r'[^\w\s,]', ' ', text.casefold())
+        text = re.sub(r'\s*,\s*', ', ', text)
+        return re.sub(r'\s+', ' ', text).strip(' ,')
+
+    def forward_key(self, query):
+        return 'fwd:' + self.normalize_query(query)
+
+    def reverse_key(self, lat, lng):
+        """Snap coordinates to a grid so nearby taps share one entry."""
+        step = 10 ** -self.reverse_precision
+        lat = round(float(lat) / step) * step
+        lng = round(float(lng) / step) * step
+        return f'rev:{lat:.{self.reverse_precision}f},{lng:.{self.reverse_precision}f}'
+
+    # Storage
+
+    def get(self, key):
+        """Return ``(hit, value)``; a hit with ``None`` is a cached miss."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                'SELECT payload, expires_at, last_used FROM geocode_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return False, None
+            payload, expires_at, last_used = row
+            if expires_at <= now:
+                conn.execute('DELETE FROM geocode_cache WHERE key = ?', (key,))
+                return False, None
+            if now - last_used > self.TOUCH_INTERVAL:
+                conn.execute('UPDATE geocode_cache SET last_used = ? WHERE key = ?', (now, key))
+        return True, (json.loads(payload) if payload is not None else None)
+
+    def set(self, key, value):
+        now = time.time()
+        ttl = self.ttl if value is not None else self.negative_ttl
+        payload = json.dumps(value) if value is not None else None
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO geocode_cache (key, payload, expires_at, last_used) VALUES (?, ?, ?, ?)',
+                (key, payload, now + ttl, now)
+            )
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute('DELETE FROM geocode_cache WHERE expires_at <= ?', (now,))
+        (count,) = conn.execute('SELECT COUNT(*) FROM geocode_cache').fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                'DELETE FROM geocode_cache WHERE key IN ('
+                ' SELECT key FROM geocode_cache ORDER BY last_used ASC LIMIT ?)',
+                (excess,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._connection().execute('DELETE FROM geocode_cache')
+
+    # Convenience wrappers
+
+    def get_forward(self, query):
+        return self.get(self.forward_key(query))
+
+    def set_forward(self, query, value):
+        self.set(self.forward_key(query), value)
+
+    def get_reverse(self, lat, lng):
+        return self.get(self.reverse_key(lat, lng))
+
+    def set_reverse(self, lat, lng, value):
+        self.set(self.reverse_key(lat, lng), value)
+
+
+geocode_cache = GeocodeCache(
+    path=Config.GEOCODE_CACHE_PATH,
+    ttl=Config.GEOCODE_CACHE_TTL,
+    negative_ttl=Config.GEOCODE_NEGATIVE_TTL,
+    max_entries=Config.GEOCODE_CACHE_MAX_ENTRIES,
+    reverse_precision=Config.GEOCODE_REVERSE_PRECISION,
+)
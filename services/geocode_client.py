@@ -0,0 +1,246 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+
+import httpx
+
+from config import Config
+from services.geocode_cache import geocode_cache
+
+
+class GeocoderBusyError(Exception):
+    """Raised when an upstream slot can't be had within the queue deadline."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Geocoder is busy, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Process-wide token bucket where callers reserve a future slot.
+
+    ``reserve`` never sleeps itself: it returns how long the caller must wait
+    for its slot, or raises ``GeocoderBusyError`` if that wait would exceed
+    ``max_wait`` or too many callers are already queued.
+    """
+
+    def __init__(self, rate, burst, max_wait, max_queue):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens, elapsed):
+        """Refill ``tokens`` for ``elapsed`` seconds and take one: ``(tokens left, wait)``."""
+        tokens = min(self.burst, tokens + elapsed * self.rate)
+        if tokens >= 1:
+            return tokens - 1, 0.0
+        # Tokens go negative while callers are queued for future slots
+        wait = (1 - tokens) / self.rate
+        queued = math.ceil(-tokens)
+        if wait > self.max_wait or queued >= self.max_queue:
+            raise GeocoderBusyError(wait)
+        return tokens - 1, wait
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, wait = self._take(self._tokens, now - self._updated)
+            self._updated = now
+            return wait
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+
+class SharedTokenBucket(TokenBucket):
+    """TokenBucket whose state lives in a SQLite file.
+
+    Every worker process on the host draws from the same row, so N gunicorn
+    workers together stay within Nominatim's rate instead of N times it.
+    """
+
+    def __init__(self, path, name, rate, burst, max_wait, max_queue):
+        super().__init__(rate, burst, max_wait, max_queue)
+        self.path = path
+        self.name = name
+        self._conn = None
+
+    def _connection(self):
+        # Created on first use, never inherited across a fork
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limits ('
+                ' name TEXT PRIMARY KEY,'
+                ' tokens REAL NOT NULL,'
+                ' updated REAL NOT NULL)'
+            )
+            self._conn = conn
+        return self._conn
+
+    def reserve(self):
+        with self._lock:
+            conn = self._connection()
+            # IMMEDIATE takes the write lock up front, so the read-modify-write is atomic across processes
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                now = time.time()
+                row = conn.execute('SELECT tokens, updated FROM rate_limits WHERE name = ?', (self.name,)).fetchone()
+                tokens, updated = row if row else (self.burst, now)
+                tokens, wait = self._take(tokens, max(0.0, now - updated))
+                conn.execute('INSERT OR REPLACE INTO rate_limits (name, tokens, updated) VALUES (?, ?, ?)',
+                             (self.name, tokens, now))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            return wait
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        return len(self._calls)
+
+
+class NominatimClient:
+    """Rate-limited, coalescing Nominatim client over a pooled httpx connection.
+
+    Identical lookups in flight share one upstream request, and every
+    upstream request takes a slot from the token bucket first. With
+    ``bucket_path`` the bucket is shared by every process using that file.
+    """
+
+    def __init__(self, base_url, user_agent, rate, burst, max_wait, max_queue, timeout, bucket_path=None):
+        self.base_url = base_url.rstrip('/')
+        self.headers = {'User-Agent': user_agent, 'Accept': 'application/json'}
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 2.0))
+        self.limits = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=30)
+        if bucket_path:
+            self.bucket = SharedTokenBucket(bucket_path, 'nominatim', rate, burst, max_wait, max_queue)
+        else:
+            self.bucket = TokenBucket(rate, burst, max_wait, max_queue)
+        self.flight = SingleFlight()
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        base_url=self.base_url, headers=self.headers, timeout=self.timeout, limits=self.limits
+                    )
+        return self._client
+
+    # Request/response shapes
+
+    @staticmethod
+    def _search_params(query):
+        return {'q': query, 'format': 'jsonv2', 'limit': 1}
+
+    @staticmethod
+    def _reverse_params(lat, lng):
+        return {'lat': lat, 'lon': lng, 'format': 'jsonv2'}
+
+    @staticmethod
+    def _parse_search(response):
+        response.raise_for_status()
+        results = response.json()
+        if not results:
+            return None
+        top = results[0]
+        return {
+            'lat': float(top['lat']),
+            'lng': float(top['lon']),
+            'display_name': top['display_name']
+        }
+
+    @staticmethod
+    def _parse_reverse(response):
+        response.raise_for_status()
+        data = response.json()
+        if not data or 'error' in data:
+            return None
+        return {'place_name': data['display_name']}
+
+    # Lookups
+
+    def geocode(self, query):
+        """Return ``{'lat', 'lng', 'display_name'}`` or None."""
+        return self.flight.do(geocode_cache.forward_key(query), lambda: self._geocode(query))
+
+    def reverse(self, lat, lng):
+        """Return ``{'place_name'}`` or None."""
+        return self.flight.do(geocode_cache.reverse_key(lat, lng), lambda: self._reverse(lat, lng))
+
+    def _geocode(self, query):
+        self.bucket.acquire()
+        return self._parse_search(self.client.get('/search', params=self._search_params(query)))
+
+    def _reverse(self, lat, lng):
+        self.bucket.acquire()
+        return self._parse_reverse(self.client.get('/reverse', params=self._reverse_params(lat, lng)))
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+nominatim_client = NominatimClient(
+    base_url=Config.NOMINATIM_URL,
+    user_agent="EcoTrack-AI/1.0",
+    rate=Config.NOMINATIM_RATE_LIMIT,
+    burst=Config.NOMINATIM_BURST,
+    max_wait=Config.NOMINATIM_MAX_QUEUE_WAIT,
+    max_queue=Config.NOMINATIM_MAX_QUEUE,
+    timeout=Config.NOMINATIM_TIMEOUT,
+    bucket_path=Config.GEOCODE_CACHE_PATH,
+)
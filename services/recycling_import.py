@@ -0,0 +1,192 @@
+import codecs
+import csv
+import io
+import json
+import re
+from datetime import datetime
+from difflib import SequenceMatcher
+
+from sqlalchemy import insert
+
+from app import db
+from models.discover import Discover
+from services.discover_service import invalidate_discover_indexes
+from services.spatial_index import SpatialGrid
+
+LAT_FIELDS = ('latitude', 'lat')
+LNG_FIELDS = ('longitude', 'lng', 'lon')
+
+
+def _as_text(stream):
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    if hasattr(stream, 'readable'):
+        return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    # Upload streams (e.g. SpooledTemporaryFile) aren't full io objects
+    return codecs.getreader('utf-8-sig')(stream)
+
+
+def _first(record, keys):
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def iter_csv(stream):
+    """Yield raw center records from a CSV with name/address/lat/lng columns."""
+    for row in csv.DictReader(_as_text(stream)):
+        row = {(k or '').strip().lower(): (v or '').strip() for k, v in row.items()}
+        yield {
+            'name': row.get('name'),
+            'address': row.get('address'),
+            'latitude': _first(row, LAT_FIELDS),
+            'longitude': _first(row, LNG_FIELDS),
+        }
+
+
+def iter_geojson(stream, chunk_size=65536):
+    """Yield raw center records from a GeoJSON FeatureCollection of Points.
+
+    Features are decoded one at a time from a rolling buffer, so the whole
+    document is never held in memory.
+    """
+    text = _as_text(stream)
+    decoder = json.JSONDecoder()
+    buffer = ''
+    while True:
+        chunk = text.read(chunk_size)
+        buffer += chunk
+        match = re.search(r'"features"\s*:\s*\[', buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        if not chunk:
+            return
+        # Keep a tail in case the key straddles two chunks
+        buffer = buffer[-32:]
+
+    eof = False
+    while True:
+        buffer = buffer.lstrip(' \t\r\n,')
+        if buffer.startswith(']'):
+            return
+        try:
+            feature, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError('Malformed GeoJSON feature collection')
+            chunk = text.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        buffer = buffer[end:]
+
+        geometry = feature.get('geometry') or {}
+        properties = feature.get('properties') or {}
+        coordinates = geometry.get('coordinates') or [None, None]
+        if geometry.get('type') != 'Point':
+            coordinates = [None, None]
+        yield {
+            'name': properties.get('name'),
+            'address': properties.get('address'),
+            'latitude': coordinates[1],
+            'longitude': coordinates[0],
+        }
+
+
+def _normalize_name(name):
+    return re.sub(r'[^a-z0-9]+', ' ', name.lower()).strip()
+
+
+def _similar(a, b, threshold):
+    if a == b or a in b or b in a:
+        return True
+    return SequenceMatcher(None, a, b).ratio() >= threshold
+
+
+def _clean(record):
+    name = (record.get('name') or '').strip()
+    try:
+        lat = float(record.get('latitude'))
+        lng = float(record.get('longitude'))
+    except (TypeError, ValueError):
+        return None
+    if not name or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    address = (record.get('address') or '').strip() or None
+    return {'name': name[:200], 'address': address[:300] if address else None, 'latitude': lat, 'longitude': lng}
+
+
+def import_recycling_centers(records, batch_size=500, dedupe_metres=25.0, name_similarity=0.8):
+    """Insert recycling centers from an iterable of records in batches.
+
+    A record is skipped as a duplicate when an existing or already imported
+    center lies within ``dedupe_metres`` and has a similar name. Candidates
+    come from a spatial grid, so each record is compared only with its
+    neighbours. Returns counts of read, inserted, duplicate and invalid rows.
+    """
+    radius_km = dedupe_metres / 1000.0
+    grid = SpatialGrid(cell_km=max(radius_km, 0.001))
+    existing = Discover.query.with_entities(Discover.name, Discover.latitude, Discover.longitude)
+    for row in existing.yield_per(5000):
+        grid.insert(row.latitude, row.longitude, _normalize_name(row.name))
+
+    stats = {'read': 0, 'inserted': 0, 'duplicates': 0, 'invalid': 0}
+    batch = []
+    now = datetime.utcnow()
+
+    def flush():
+        if batch:
+            db.session.execute(insert(Discover), batch)
+            db.session.commit()
+            stats['inserted'] += len(batch)
+            batch.clear()
+
+    try:
+        for record in records:
+            stats['read'] += 1
+            center = _clean(record)
+            if center is None:
+                stats['invalid'] += 1
+                continue
+
+            name = _normalize_name(center['name'])
+            neighbours = grid.nearby(center['latitude'], center['longitude'], radius_km)
+            if any(_similar(name, other, name_similarity) for other, _ in neighbours):
+                stats['duplicates'] += 1
+                continue
+
+            grid.insert(center['latitude'], center['longitude'], name)
+            batch.append({**center, 'created_at': now})
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        # Bulk inserts skip ORM events, so rebuild the lookup structures once here
+        if stats['inserted']:
+            invalidate_discover_indexes(rebuild=True)
+
+    return stats
+
+
+def detect_format(filename=None, content_type=None):
+    filename = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    if filename.endswith(('.geojson', '.json')) or 'json' in content_type:
+        return 'geojson'
+    if filename.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    return None
+
+
+def iter_records(stream, fmt):
+    if fmt == 'csv':
+        return iter_csv(stream)
+    if fmt == 'geojson':
+        return iter_geojson(stream)
+    raise ValueError(f"Unsupported format: {fmt}")
@@ -0,0 +1,43 @@
+import math
+from collections import defaultdict
+
+from utils import haversine_distance
+
+KM_PER_DEGREE = 111.32
+
+
+class SpatialGrid:
+    """Uniform lat/lng grid for radius lookups without scanning every point.
+
+    Points are bucketed into square cells of ``cell_km`` (measured along a
+    meridian); a radius query only visits the cells the radius can reach.
+    """
+
+    def __init__(self, cell_km):
+        self.cell_deg = cell_km / KM_PER_DEGREE
+        self._cells = defaultdict(list)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _key(self, lat, lng):
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def insert(self, lat, lng, item):
+        self._cells[self._key(lat, lng)].append((lat, lng, item))
+        self._size += 1
+
+    def nearby(self, lat, lng, radius_km):
+        """Yield ``(item, distance_km)`` for points within ``radius_km``."""
+        row, col = self._key(lat, lng)
+        lat_span = math.ceil(radius_km / KM_PER_DEGREE / self.cell_deg)
+        # Longitude degrees shrink with latitude, so more columns are needed
+        cos_lat = max(math.cos(math.radians(lat)), 0.01)
+        lng_span = math.ceil(radius_km / (KM_PER_DEGREE * cos_lat) / self.cell_deg)
+        for r in range(row - lat_span, row + lat_span + 1):
+            for c in range(col - lng_span, col + lng_span + 1):
+                for point_lat, point_lng, item in self._cells.get((r, c), ()):
+                    dist = haversine_distance(lat, lng, point_lat, point_lng)
+                    if dist <= radius_km:
+                        yield item, dist
@@ -1,5 +1,91 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select
 from app import db
 from models.user import User
+from schemas import UserOut
+
+# Profile geocoding runs off the request path
+_geocode_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='profile-geocode')
+_geocode_pending = set()  # (user id, location) jobs queued, running or waiting to retry
+_geocode_lock = threading.Lock()
+GEOCODE_ATTEMPTS = 3
+
+
+def schedule_geocode(app, user_id, location):
+    """Queue geocode_user_location unless the same lookup is already queued.
+
+    Keyed on the location as well as the user, so changing A -> B while A
+    is pending still geocodes B. A busy geocoder re-queues the job after
+    its ``retry_after`` instead of sleeping on a worker thread.
+    """
+    key = (user_id, location)
+    with _geocode_lock:
+        if key in _geocode_pending:
+            return False
+        _geocode_pending.add(key)
+    _submit_geocode(app, key, GEOCODE_ATTEMPTS)
+    return True
+
+
+def _submit_geocode(app, key, attempts_left, delay=0):
+    if not delay:
+        _geocode_executor.submit(_run_geocode, app, key, attempts_left)
+        return
+    timer = threading.Timer(delay, _geocode_executor.submit, (_run_geocode, app, key, attempts_left))
+    timer.daemon = True
+    timer.start()
+
+
+def _run_geocode(app, key, attempts_left):
+    user_id, location = key
+    retry_after = None
+    try:
+        retry_after = geocode_user_location(app, user_id, location)
+    finally:
+        if retry_after is not None and attempts_left > 1:
+            _submit_geocode(app, key, attempts_left - 1, retry_after)
+        else:
+            with _geocode_lock:
+                _geocode_pending.discard(key)
+
+
+def geocode_user_location(app, user_id, location):
+    """Geocode a user's free-text location once and store the coordinates.
+
+    ``location_geocoded_at`` is only stamped on a definitive answer
+    (coordinates or "not found"). Returns the geocoder's ``retry_after``
+    when it was busy, else None; an unreachable geocoder is left for a
+    later ``schedule_geocode``.
+    """
+    from services.discover_service import geocode_place
+    from services.geocode_client import GeocoderBusyError
+
+    with app.app_context():
+        try:
+            coords = geocode_place(location, raise_errors=True)
+        except GeocoderBusyError as e:
+            return e.retry_after
+        except Exception as e:
+            print(f"Could not geocode location for user {user_id}: {e}")
+            return None
+        try:
+            user = db.session.get(User, user_id)
+            # Skip if the location changed again while we were geocoding
+            if not user or user.location != location:
+                return None
+            user.latitude = coords['lat'] if coords else None
+            user.longitude = coords['lng'] if coords else None
+            user.location_geocoded_at = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Failed to store coordinates for user {user_id}: {e}")
+        finally:
+            db.session.remove()
+    return None
 
 
 class UserService:
@@ -51,10 +137,20 @@ class UserService:
 
         return {"message": "Login successful", "status": 200}
 
-    def get_user_by_email(self, email):
-        """Retrieve a user's details by email."""
-        user = User.query.filter_by(email=email).first()
-        return user.to_dict() if user else None  
+    def get_user_by_email(self, email, fields=None):
+        """Retrieve a user's details by email, selecting only the columns ``fields`` need."""
+        if fields is None:
+            user = User.query.filter_by(email=email).first()
+            return UserOut.from_model(user) if user else None
+        columns = []
+        for field in fields:
+            for name in (('name', 'username') if field == 'display_name' else (field,)):
+                if name not in columns:
+                    columns.append(name)
+        row = db.session.execute(
+            select(*(getattr(User, name) for name in columns)).where(User.email == email)
+        ).first()
+        return UserOut.from_row(row, fields) if row else None
     
     def update_profile(self, email, data):
         """Update user profile information."""
@@ -68,8 +164,12 @@ class UserService:
             user.name = data['name']
         if 'bio' in data:
             user.bio = data['bio']
-        if 'location' in data:
+        location_changed = 'location' in data and data['location'] != user.location
+        if location_changed:
             user.location = data['location']
+            user.latitude = None
+            user.longitude = None
+            user.location_geocoded_at = None
         if 'lifestyle_type' in data:
             user.lifestyle_type = data['lifestyle_type']
         if 'carbon_goal' in data:
@@ -77,6 +177,8 @@ class UserService:
         
         try:
             db.session.commit()
+            if location_changed and user.location:
+                schedule_geocode(current_app._get_current_object(), user.id, user.location)
             return {"message": "Profile updated successfully", "status": 200}
         except Exception as e:
             db.session.rollback()
@@ -0,0 +1,238 @@
+"""Slow-query log with out-of-band EXPLAIN capture.
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS are fingerprinted (literals
+and IN-lists normalized away) and handed to a background thread. That thread
+runs EXPLAIN once per fingerprint on its own connection, appends a JSON line
+to a rotating log file, and keeps the per-fingerprint aggregates served by
+GET /api/admin/slow-queries. The request thread only pays for the timing
+and, for slow statements, building the record.
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import traceback
+from collections import Counter
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from flask import has_request_context, request
+
+from sql_timing import add_consumer
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|:\w+|\$\d+')
+_EXPLAINABLE = ('select', 'with')
+
+_PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+_SKIP_PATHS = (os.sep + 'site-packages' + os.sep, os.sep + 'venv' + os.sep, os.path.abspath(__file__),
+               os.path.join(_PROJECT_ROOT, 'sql_timing.py'))
+
+
+def normalize_sql(statement):
+    """Collapse whitespace, literals and IN-lists so similar statements share a fingerprint."""
+    sql = ' '.join(statement.split())
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+def parameters_shape(parameters, executemany=False):
+    """Parameter types without values, e.g. ``(int, str, NoneType)`` or ``500 x (...)``."""
+    if executemany and parameters:
+        return f"{len(parameters)} x {parameters_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + '}'
+    if isinstance(parameters, (list, tuple)):
+        return '(' + ', '.join(type(v).__name__ for v in parameters) + ')'
+    return type(parameters).__name__
+
+
+def _call_site():
+    # Innermost frame that belongs to this project rather than a library
+    for frame in reversed(traceback.extract_stack(limit=60)[:-3]):
+        if frame.filename.startswith('<'):
+            continue
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(_PROJECT_ROOT) and not any(part in filename for part in _SKIP_PATHS):
+            return f"{os.path.relpath(filename, _PROJECT_ROOT)}:{frame.lineno} in {frame.name}"
+    return None
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self.threshold = None
+        self.explain = True
+        self.explain_analyze = False
+        self._queue = queue.Queue(maxsize=1000)
+        self._stats = {}  # fingerprint -> aggregate
+        self._plans = {}  # fingerprint -> plan lines
+        self._lock = threading.Lock()
+        self._logger = None
+        self.engine = None
+        self._thread = None
+        self.dropped = 0
+
+    def init_app(self, app, engine):
+        config = app.config
+        self.threshold = config['SLOW_QUERY_THRESHOLD_MS'] / 1000.0
+        self.explain = config.get('SLOW_QUERY_EXPLAIN', True)
+        self.explain_analyze = config.get('SLOW_QUERY_EXPLAIN_ANALYZE', False)
+        self._logger = self._file_logger(
+            config['SLOW_QUERY_LOG_PATH'], config['SLOW_QUERY_LOG_MAX_BYTES'], config['SLOW_QUERY_LOG_BACKUPS']
+        )
+        self.engine = engine
+        add_consumer(self._record)
+
+    @staticmethod
+    def _file_logger(path, max_bytes, backups):
+        logger = logging.getLogger('slow_queries')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        if not any(getattr(h, 'baseFilename', None) == os.path.abspath(path) for h in logger.handlers):
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+        return logger
+
+    # Timed statements (request thread), via sql_timing
+
+    def _record(self, conn, statement, parameters, executemany, elapsed):
+        if elapsed < self.threshold or conn.engine is not self.engine or conn.info.get('slow_query_explaining'):
+            return
+        record = {
+            'time': datetime.utcnow().isoformat(timespec='milliseconds'),
+            'duration_ms': round(elapsed * 1000, 3),
+            'statement': statement,
+            'parameters': parameters[0] if executemany and parameters else parameters,
+            'shape': parameters_shape(parameters, executemany),
+            'endpoint': request.endpoint if has_request_context() else None,
+            'call_site': _call_site(),
+        }
+        try:
+            self._queue.put_nowait((conn.engine, record))
+        except queue.Full:
+            self.dropped += 1
+            return
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='slow-query-log', daemon=True)
+                    self._thread.start()
+
+    # Background worker
+
+    def _run(self):
+        while True:
+            engine, record = self._queue.get()
+            try:
+                self._process(engine, record)
+            except Exception as e:
+                print(f"Slow query log failed: {e}")
+
+    def _process(self, engine, record):
+        statement = record.pop('statement')
+        parameters = record.pop('parameters')
+        normalized = normalize_sql(statement)
+        fingerprint = hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+
+        if self.explain and fingerprint not in self._plans:
+            self._plans[fingerprint] = self._explain(engine, statement, parameters)
+        plan = self._plans.get(fingerprint)
+
+        record.update({'fingerprint': fingerprint, 'sql': normalized, 'plan': plan})
+        if self._logger:
+            self._logger.info(json.dumps(record, default=str))
+
+        with self._lock:
+            stats = self._stats.get(fingerprint)
+            if stats is None:
+                stats = self._stats[fingerprint] = {
+                    'fingerprint': fingerprint, 'sql': normalized, 'shape': record['shape'],
+                    'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'call_sites': Counter(), 'endpoints': Counter(),
+                }
+            stats['count'] += 1
+            stats['total_ms'] += record['duration_ms']
+            stats['max_ms'] = max(stats['max_ms'], record['duration_ms'])
+            stats['last_seen'] = record['time']
+            if record['call_site']:
+                stats['call_sites'][record['call_site']] += 1
+            if record['endpoint']:
+                stats['endpoints'][record['endpoint']] += 1
+
+    def _explain(self, engine, statement, parameters):
+        if not statement.lstrip().lower().startswith(_EXPLAINABLE):
+            return None
+        dialect = engine.dialect.name
+        if dialect == 'sqlite':
+            if engine.url.database in (None, '', ':memory:'):
+                return None  # a second connection would see a different, empty database
+            prefix = 'EXPLAIN QUERY PLAN '
+        elif dialect == 'postgresql':
+            prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if self.explain_analyze else 'EXPLAIN '
+        else:
+            prefix = 'EXPLAIN '
+        try:
+            with engine.connect() as conn:
+                conn.info['slow_query_explaining'] = True
+                try:
+                    rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+                finally:
+                    conn.info.pop('slow_query_explaining', None)
+                    conn.rollback()  # EXPLAIN ANALYZE really runs the statement
+        except Exception as e:
+            return [f"EXPLAIN failed: {e}"]
+        if dialect == 'sqlite':
+            return [row[-1] for row in rows]
+        return [str(row[0]) for row in rows]
+
+    # Reporting
+
+    def summary(self, limit=20, sort='total_ms'):
+        with self._lock:
+            items = [dict(stats) for stats in self._stats.values()]
+        items.sort(key=lambda s: s.get(sort, 0), reverse=True)
+        result = []
+        for stats in items[:limit]:
+            plan = self._plans.get(stats['fingerprint'])
+            result.append({
+                **stats,
+                'total_ms': round(stats['total_ms'], 3),
+                'mean_ms': round(stats['total_ms'] / stats['count'], 3),
+                'call_sites': [site for site, _ in stats['call_sites'].most_common(3)],
+                'endpoints': [name for name, _ in stats['endpoints'].most_common(3)],
+                'plan': plan,
+                # SQLite "SCAN <table>" (without USING INDEX) / PostgreSQL "Seq Scan"
+                'full_scan': bool(plan) and any(
+                    ('SCAN' in line and 'INDEX' not in line) or 'Seq Scan' in line for line in plan
+                ),
+            })
+        return {
+            'threshold_ms': round(self.threshold * 1000, 3) if self.threshold is not None else None,
+            'fingerprints': len(self._stats),
+            'pending': self._queue.qsize(),
+            'dropped': self.dropped,
+            'queries': result,
+        }
+
+
+slow_query_log = SlowQueryLog()
+
+
+def init_slow_query_log(app):
+    """Attach the slow-query hooks to this app's engine."""
+    if not app.config.get('SLOW_QUERY_LOG_ENABLED', True):
+        return
+    from app import db
+    with app.app_context():
+        slow_query_log.init_app(app, db.engine)
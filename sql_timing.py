@@ -0,0 +1,54 @@
+"""The one SQL timing hook shared by metrics, query tracking, profiling and the slow-query log.
+
+A single before/after_cursor_execute pair on every Engine times each
+statement once and hands it to the registered consumers, so adding a
+consumer costs a function call rather than another pair of listeners and
+another start-time stack on the connection.
+"""
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_consumers = ()  # replaced, never mutated, so the hot path needs no lock
+_lock = threading.Lock()
+
+
+def add_consumer(consumer):
+    """Call ``consumer(conn, statement, parameters, executemany, elapsed)`` after every statement."""
+    global _consumers
+    with _lock:
+        if consumer not in _consumers:
+            _consumers = _consumers + (consumer,)
+
+
+def remove_consumer(consumer):
+    global _consumers
+    with _lock:
+        _consumers = tuple(c for c in _consumers if c is not consumer)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    for consumer in _consumers:
+        consumer(conn, statement, parameters, executemany, elapsed)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    if conn is not None:
+        starts = conn.info.get('query_start')
+        if starts:
+            starts.pop()
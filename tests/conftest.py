@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+# Module-level singletons read these at import time, so set them before importing the app
+_tmp = tempfile.mkdtemp(prefix='ecotrack-tests-')
+os.environ.setdefault('GEOCODE_CACHE_PATH', os.path.join(_tmp, 'geocode_cache.db'))
+os.environ.setdefault('SLOW_QUERY_LOG_PATH', os.path.join(_tmp, 'slow_queries.log'))
+os.environ.setdefault('PROFILE_DIR', os.path.join(_tmp, 'profiles'))
+os.environ.setdefault('CHAT_BACKEND', 'stub')
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app, db
+from query_tracker import assert_max_queries
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app, client):
+    """Register a user and return ``(headers, email)`` for its bearer token."""
+    email = 'tester@example.com'
+    client.post('/api/user/register', json={'email': email, 'username': 'tester', 'password': 'Secret123!'})
+    with app.app_context():
+        token = create_access_token(identity=email)
+    return {'Authorization': f"Bearer {token}"}, email
+
+
+@pytest.fixture
+def query_counter():
+    """Fixture form of ``assert_max_queries``: ``with query_counter(3): client.get(...)``."""
+    return assert_max_queries
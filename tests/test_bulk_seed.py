@@ -0,0 +1,15 @@
+from sqlalchemy import func, select
+
+from app import db
+from benchmarks.bulk_seed import seed_database
+from models.activity import Activity
+from models.user import User
+
+
+def test_seed_database_fills_defaulted_columns(app):
+    with app.app_context():
+        stats = seed_database(users=5, activities=50, centers=2, batch_size=20, commit_every=40)
+        assert stats['users'] == 5
+        assert db.session.execute(select(func.count(Activity.id))).scalar() == 50
+        versions = db.session.execute(select(User.data_version)).scalars().all()
+        assert versions == [0] * 5
@@ -0,0 +1,85 @@
+import sqlite3
+import time
+
+from cachelib import SimpleCache
+
+from cache import AppCache, SQLiteCache, app_cache
+
+
+def _summary(client, headers):
+    response = client.get('/api/activity/summary', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['data']
+
+
+def test_summary_is_invalidated_by_activity_writes(client, auth_headers):
+    headers, _ = auth_headers
+    assert _summary(client, headers)['activities_logged'] == 0
+    hits = app_cache.stats()['namespaces']['activity_summary']['hits']
+    assert _summary(client, headers)['activities_logged'] == 0
+    assert app_cache.stats()['namespaces']['activity_summary']['hits'] == hits + 1
+
+    created = client.post('/api/activity/activities', headers=headers,
+                          json={'category': 'transport', 'vehicle_type': 'petrol', 'distance_km': 10})
+    assert created.status_code == 201
+    summary = _summary(client, headers)
+    assert summary['activities_logged'] == 1
+    assert summary['total_emissions'] == created.get_json()['emission_kg']
+
+    activity_id = created.get_json()['activity']['id']
+    assert client.delete(f"/api/activity/activities/{activity_id}", headers=headers).status_code == 200
+    assert _summary(client, headers) == {'total_emissions': 0, 'activities_logged': 0, 'average_impact': 0}
+
+
+def test_invalidating_a_tag_leaves_other_tags_cached():
+    cache = AppCache()
+    cache.backend = SimpleCache(default_timeout=0)
+    calls = []
+
+    def compute(user_id):
+        calls.append(user_id)
+        return user_id * 10
+
+    for user_id in (1, 2, 1, 2):
+        assert cache.get_or_compute('sum', compute, (user_id,), {}, tags=(f"user:{user_id}",)) == user_id * 10
+    assert calls == [1, 2]
+
+    cache.invalidate_tags('user:1')
+    for user_id in (1, 2):
+        cache.get_or_compute('sum', compute, (user_id,), {}, tags=(f"user:{user_id}",))
+    assert calls == [1, 2, 1]
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first, second = AppCache(), AppCache()
+    first.backend, second.backend = SQLiteCache(path, default_timeout=0), SQLiteCache(path, default_timeout=0)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'total': len(calls)}
+
+    assert first.get_or_compute('totals', compute, (), {}, tags=('shared',)) == {'total': 1}
+    assert second.get_or_compute('totals', compute, (), {}, tags=('shared',)) == {'total': 1}
+    assert len(calls) == 1
+
+    # An invalidation by one worker is seen by the other
+    first.invalidate_tags('shared')
+    assert second.get_or_compute('totals', compute, (), {}, tags=('shared',)) == {'total': 2}
+
+
+def test_sqlite_cache_prunes_expired_and_oldest_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(SQLiteCache, 'PRUNE_EVERY', 10)
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), default_timeout=0, threshold=5)
+    for i in range(3):
+        cache.set(f"expiring-{i}", i, timeout=1)
+    monkeypatch.setattr(time, 'time', lambda real=time.time: real() + 5)
+    for i in range(7):
+        cache.set(f"kept-{i}", i)
+
+    # The 10th write swept the three expired rows and trimmed the rest to the threshold
+    keys = [row[0] for row in sqlite3.connect(cache.path).execute('SELECT key FROM app_cache ORDER BY rowid')]
+    assert keys == [f"kept-{i}" for i in range(2, 7)]
+    assert cache.get('kept-6') == 6
+    assert cache.get('kept-0') is None
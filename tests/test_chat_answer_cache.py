@@ -0,0 +1,32 @@
+import pytest
+
+from models.chat_answer_cache import AnswerCache
+
+
+@pytest.fixture
+def cache():
+    cache = AnswerCache(max_entries=100, ttl=60, threshold=0.6)
+    cache.set('How much CO2 does a car emit per km?', 'About 170 g per km.')
+    cache.set('What is a carbon footprint?', 'The total greenhouse gases caused by ...')
+    return cache
+
+
+@pytest.mark.parametrize('question, answer', [
+    ('how much co2 does a car emit per km', 'About 170 g per km.'),
+    ('How much CO₂ does a car emit per kilometre?', 'About 170 g per km.'),
+    ("What's a carbon footprint?", 'The total greenhouse gases caused by ...'),
+    ('Explain carbon footprints', 'The total greenhouse gases caused by ...'),
+])
+def test_paraphrases_hit(cache, question, answer):
+    assert cache.get(question) == answer
+
+
+@pytest.mark.parametrize('question', [
+    'How much CO2 does a car emit per mile?',
+    'How much CO2 does a car emit per 100 km?',
+    'What is not a carbon footprint?',
+    "What isn't a carbon footprint?",
+])
+def test_different_numbers_units_or_negation_miss(cache, question):
+    assert cache.get(question) is None
+    assert cache.stats()['hits'] == 0
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from services.chat_executor import BoundedChatExecutor, ChatDeadlineExceeded, ChatQueueFull, ChatUserLimit
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_timeout_while_queued_releases_slot_and_user_count():
+    executor = BoundedChatExecutor(max_workers=1, max_queue=2, per_user_limit=5, timeout=0.3)
+    errors = []
+
+    def call(user_id):
+        try:
+            executor.run(user_id, time.sleep, 1.0)
+        except ChatDeadlineExceeded as e:
+            errors.append(e)
+
+    callers = [threading.Thread(target=call, args=(f"user-{i}",)) for i in range(3)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    # All three time out; the two still queued were cancelled and released at once
+    assert len(errors) == 3
+    stats = executor.stats()
+    assert stats['cancelled_in_queue'] == 2
+    assert stats['queue_depth'] == 0
+
+    assert _wait_for(lambda: executor.stats()['running'] == 0)
+    stats = executor.stats()
+    assert stats['users_in_flight'] == 0
+    assert stats['completed'] == 1
+
+    # Every slot is free again
+    for _ in range(3):
+        assert executor._slots.acquire(blocking=False)
+
+
+def test_run_returns_the_result():
+    executor = BoundedChatExecutor(max_workers=1, max_queue=1, per_user_limit=1, timeout=1.0)
+    assert executor.run('user', lambda a, b: a + b, 1, 2) == 3
+    stats = executor.stats()
+    assert stats['completed'] == 1
+    assert stats['users_in_flight'] == 0
+
+
+def test_per_user_limit_and_full_queue_are_rejected():
+    executor = BoundedChatExecutor(max_workers=1, max_queue=1, per_user_limit=1, timeout=2.0)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait(2)
+
+    first = threading.Thread(target=executor.run, args=('alice', blocker))
+    first.start()
+    assert started.wait(2)
+    second = None
+    try:
+        with pytest.raises(ChatUserLimit):
+            executor.run('alice', lambda: 'ok')
+        second = threading.Thread(target=executor.run, args=('bob', release.wait, 2))
+        second.start()
+        assert _wait_for(lambda: executor.stats()['queue_depth'] == 1)
+        with pytest.raises(ChatQueueFull):
+            executor.run('carol', lambda: 'ok')
+    finally:
+        release.set()
+        first.join()
+        if second is not None:
+            second.join()
+    stats = executor.stats()
+    assert stats['rejected_user_limit'] == 1
+    assert stats['rejected_queue_full'] == 1
+    assert stats['users_in_flight'] == 0
+
+
+def test_stream_closed_while_queued_never_starts_upstream():
+    executor = BoundedChatExecutor(max_workers=1, max_queue=1, per_user_limit=1, timeout=2.0)
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+
+    def blocker():
+        started.set()
+        release.wait(2)
+
+    def make_generator():
+        calls.append(1)
+        yield 'chunk'
+
+    first = threading.Thread(target=executor.run, args=('alice', blocker))
+    first.start()
+    assert started.wait(2)
+    stream = executor.stream('bob', make_generator)
+    stream.close()
+    release.set()
+    first.join()
+
+    assert _wait_for(lambda: executor.stats()['users_in_flight'] == 0)
+    assert calls == []
+    assert executor.stats()['cancelled_in_queue'] == 1
+
+
+def test_queue_metrics_are_exported_at_metrics(app, client):
+    from services.chat_executor import chat_executor
+
+    chat_executor.run('metrics-user', lambda: 'ok')
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'chat_executor_queue_depth 0' in body
+    assert 'chat_executor_calls_total{outcome="completed"}' in body
+    assert 'chat_executor_queue_wait_seconds_count ' in body
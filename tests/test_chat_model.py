@@ -0,0 +1,45 @@
+import threading
+import time
+
+from models.chat import ChatbotModel
+from models.chat_backends import LocalStubBackend
+
+
+class _CountingBackend(LocalStubBackend):
+    """Stub backend that records how many calls overlap on one chat."""
+
+    def __init__(self):
+        super().__init__(latency=0.05)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def reply(self, message, turn=0):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        return super().reply(message, turn)
+
+
+def test_calls_for_one_user_are_serialised():
+    backend = _CountingBackend()
+    model = ChatbotModel(backend_factory=lambda: backend)
+    model.get_or_create_chat('alice').history = [
+        {'role': 'user', 'parts': ['hello']},
+        {'role': 'model', 'parts': ['hi']},
+    ]
+    callers = [
+        threading.Thread(target=model.send_message, args=('alice', f'question {i}'))
+        for i in range(3)
+    ]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    assert backend.max_active == 1
+    history = model.get_or_create_chat('alice').history
+    assert sorted(turn['parts'][0] for turn in history[2::2]) == ['question 0', 'question 1', 'question 2']
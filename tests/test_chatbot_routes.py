@@ -0,0 +1,61 @@
+from flask_jwt_extended import create_access_token
+
+from services.chat_history_service import chat_history
+
+
+def _headers(app, email):
+    with app.app_context():
+        return {'Authorization': f"Bearer {create_access_token(identity=email)}"}
+
+
+def test_chat_endpoints_require_a_token(client):
+    assert client.post('/api/chatbot/chat', json={'user_id': 'x', 'message': 'hi'}).status_code == 401
+    assert client.post('/api/chatbot/chat/stream', json={'user_id': 'x', 'message': 'hi'}).status_code == 401
+    assert client.post('/api/chatbot/chat/clear', json={'user_id': 'x'}).status_code == 401
+    assert client.get('/api/chatbot/chat/history?user_id=x').status_code == 401
+
+
+def test_history_is_keyed_by_the_token_not_the_query(app, client):
+    alice, bob = _headers(app, 'alice@example.com'), _headers(app, 'bob@example.com')
+    response = client.post('/api/chatbot/chat', headers=alice,
+                           json={'user_id': 'bob@example.com', 'message': 'What is a carbon footprint?'})
+    assert response.status_code == 200
+    chat_history.flush()
+
+    own = client.get('/api/chatbot/chat/history', headers=alice).get_json()
+    assert [turn['message'] for turn in own['turns']] == ['What is a carbon footprint?']
+
+    spoofed = client.get('/api/chatbot/chat/history?user_id=alice@example.com', headers=bob).get_json()
+    assert spoofed['turns'] == []
+
+
+def _register(client, app, email):
+    client.post('/api/user/register', json={'email': email, 'username': email.split('@')[0], 'password': 'Secret123!'})
+    return _headers(app, email)
+
+
+def test_identical_generic_first_turns_share_the_answer_cache(app, client):
+    from routes.chatbot_routes import chatbot_model
+
+    alice = _register(client, app, 'cache-alice@example.com')
+    bob = _register(client, app, 'cache-bob@example.com')
+    question = 'Which household appliances use the most electricity?'
+
+    first = client.post('/api/chatbot/chat', headers=alice, json={'message': question}).get_json()
+    hits = chatbot_model.answer_cache.stats()['hits']
+    second = client.post('/api/chatbot/chat', headers=bob, json={'message': question}).get_json()
+
+    assert chatbot_model.answer_cache.stats()['hits'] == hits + 1
+    assert second['response'] == first['response']
+
+
+def test_personal_questions_get_the_digest_and_skip_the_cache(app, client):
+    from routes.chatbot_routes import chatbot_model
+
+    alice = _register(client, app, 'digest-alice@example.com')
+    before = chatbot_model.answer_cache.stats()
+    response = client.post('/api/chatbot/chat', headers=alice, json={'message': 'How much CO2 did I emit this week?'})
+
+    assert response.status_code == 200
+    after = chatbot_model.answer_cache.stats()
+    assert after['hits'] == before['hits'] and after['entries'] == before['entries']
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+from sqlalchemy import insert
+
+from app import db
+from cache import AppCache, SQLiteCache, app_cache
+from models.discover import Discover
+from services.cluster_service import cluster_index
+from services.discover_service import center_index, find_nearby_recycling_centers
+
+NAIROBI = (-1.2921, 36.8219)
+BBOX = (36.7, -1.4, 36.9, -1.2)
+
+
+def _names(lat=NAIROBI[0], lng=NAIROBI[1]):
+    return [center['name'] for center in find_nearby_recycling_centers(lat, lng, radius_km=2)]
+
+
+def _cluster_total():
+    return sum(cluster['count'] for cluster in cluster_index.query(BBOX, 12))
+
+
+def _raw_insert(name):
+    # Like the bulk importer or seeder: no ORM events fire
+    db.session.execute(insert(Discover), [{'name': name, 'latitude': NAIROBI[0], 'longitude': NAIROBI[1]}])
+    db.session.commit()
+
+
+def test_orm_writes_refresh_the_indexes(app):
+    with app.app_context():
+        assert _names() == []
+        before = _cluster_total()
+        db.session.add(Discover(name='CBD Recycling', latitude=NAIROBI[0], longitude=NAIROBI[1]))
+        db.session.commit()
+        assert _names() == ['CBD Recycling']
+        assert _cluster_total() == before + 1
+
+
+@pytest.fixture
+def shared_backend(tmp_path, monkeypatch):
+    """Point app_cache at a SQLite file and return a second 'worker' on the same file."""
+    path = str(tmp_path / 'app_cache.db')
+    monkeypatch.setattr(app_cache, 'backend', SQLiteCache(path, default_timeout=0))
+    other = AppCache()
+    other.backend = SQLiteCache(path, default_timeout=0)
+    other.prefix = app_cache.prefix
+    return other
+
+
+def test_invalidation_from_another_process_is_seen(app, shared_backend):
+    with app.app_context():
+        assert _names() == []
+        before = _cluster_total()
+        _raw_insert('Westlands Depot')
+        # This process never saw the write
+        assert _names() == []
+
+        shared_backend.invalidate_tags('discover')
+        assert _names() == ['Westlands Depot']
+        assert _cluster_total() == before + 1
+
+
+def test_indexes_expire_after_the_ttl(app, monkeypatch):
+    with app.app_context():
+        assert _names() == []
+        _raw_insert('Kilimani Drop-off')
+        assert _names() == []
+        real_monotonic = time.monotonic
+        monkeypatch.setattr(time, 'monotonic', lambda: real_monotonic() + center_index.ttl + 1)
+        assert _names() == ['Kilimani Drop-off']
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+from app import db
+from models.activity import Activity, EnergyLog, TransportLog
+from models.goal import Goal
+from models.user import User
+from services.emissions_context import build_digest
+
+
+def test_goal_status_only_counts_the_goal_category(app):
+    now = datetime(2026, 10, 19, 12, 0)
+    with app.app_context():
+        user = User(email='digest@example.com', username='digest')
+        user.set_password('Secret123!')
+        db.session.add(user)
+        db.session.flush()
+        energy = Activity(user_id=user.id, category='Energy', timestamp=now - timedelta(days=1))
+        transport = Activity(user_id=user.id, category='Transport', timestamp=now - timedelta(days=1))
+        db.session.add_all([energy, transport])
+        db.session.flush()
+        db.session.add_all([
+            EnergyLog(activity_id=energy.id, energy_type='electricity', energy_amount=100,
+                      energy_unit='kWh', co2_emission=40.0),
+            TransportLog(activity_id=transport.id, vehicle_type='car', distance=20, co2_emission=5.0),
+            Goal(user_id=user.id, goal_type='weekly', target_value=10.0, category='transport',
+                 start_date=now.date() - timedelta(days=3)),
+            Goal(user_id=user.id, goal_type='monthly', target_value=30.0, category='all',
+                 start_date=now.date() - timedelta(days=3)),
+        ])
+        db.session.commit()
+
+        digest = build_digest(user.id, now=now)
+
+    assert "Weekly goal for transport: stay under 10.0 kg; 5.0 kg in the last 7 days (on track)." in digest
+    assert "Monthly goal: stay under 30.0 kg; 45.0 kg in the last 30 days (over target)." in digest
+
+
+def test_digest_is_cached_until_the_users_activities_or_goals_change(app, query_counter):
+    from services.emissions_context import emissions_context
+
+    with app.app_context():
+        user = User(email='cached-digest@example.com', username='cached')
+        user.set_password('Secret123!')
+        db.session.add(user)
+        db.session.commit()
+
+        first = emissions_context.get(user.id)
+        with query_counter(0):
+            assert emissions_context.get(user.id) == first
+
+        activity = Activity(user_id=user.id, category='Transport')
+        db.session.add(activity)
+        db.session.flush()
+        db.session.add(TransportLog(activity_id=activity.id, vehicle_type='car', distance=10, co2_emission=2.0))
+        db.session.commit()
+        with_activity = emissions_context.get(user.id)
+        assert 'from 1 activities' in with_activity
+
+        db.session.add(Goal(user_id=user.id, goal_type='weekly', target_value=10.0, category='all',
+                            start_date=datetime.utcnow().date()))
+        db.session.commit()
+        assert 'Weekly goal' in emissions_context.get(user.id)
+        assert emissions_context.stats()['hits'] >= 1
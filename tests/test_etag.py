@@ -0,0 +1,56 @@
+def test_etag_depends_on_the_query_string(client, auth_headers):
+    headers, _ = auth_headers
+    full = client.get('/api/activity/activities', headers=headers)
+    assert full.status_code == 200
+    etag = full.headers['ETag']
+
+    assert client.get('/api/activity/activities', headers={**headers, 'If-None-Match': etag}).status_code == 304
+
+    sparse = client.get('/api/activity/activities?fields=id,co2', headers={**headers, 'If-None-Match': etag})
+    assert sparse.status_code == 200
+    assert sparse.headers['ETag'] != etag
+
+    revalidated = client.get('/api/activity/activities?fields=id,co2',
+                             headers={**headers, 'If-None-Match': sparse.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_activity_without_a_log_reports_float_co2(client, auth_headers):
+    headers, _ = auth_headers
+    assert client.post('/api/activity/activities', headers=headers,
+                       json={'category': 'food', 'notes': 'lunch'}).status_code == 201
+    response = client.get('/api/activity/activities?fields=id,co2', headers=headers)
+    assert [item['co2'] for item in response.get_json()['data']] == [0.0]
+    assert b'"co2":0.0' in response.data
+
+
+def test_activity_etag_only_changes_when_activities_do(app, client, auth_headers, monkeypatch):
+    from app import db
+    from models.user import User
+    from services import discover_service
+    from services.user_service import geocode_user_location
+
+    headers, email = auth_headers
+
+    def etag():
+        return client.get('/api/activity/activities', headers=headers).headers['ETag']
+
+    before = etag()
+    profile_before = client.get('/api/user/profile', headers=headers).headers['ETag']
+
+    # Logins, profile edits and background geocoding leave activities alone
+    assert client.post('/api/user/login', json={'email': email, 'password': 'Secret123!'}).status_code == 200
+    assert client.put('/api/user/profile', headers=headers, json={'bio': 'Cycles to work'}).status_code == 200
+    monkeypatch.setattr(discover_service, 'geocode_place',
+                        lambda place_name, raise_errors=False: {'lat': -1.29, 'lng': 36.82})
+    with app.app_context():
+        user_id = User.query.filter_by(email=email).first().id
+    geocode_user_location(app, user_id, None)
+    with app.app_context():
+        assert db.session.get(User, user_id).latitude == -1.29
+    assert etag() == before
+    assert client.get('/api/user/profile', headers=headers).headers['ETag'] != profile_before
+
+    assert client.post('/api/activity/activities', headers=headers,
+                       json={'category': 'food', 'notes': 'lunch'}).status_code == 201
+    assert etag() != before
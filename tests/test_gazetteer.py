@@ -0,0 +1,60 @@
+import pytest
+
+from config import Config
+from services import discover_service
+from services.gazetteer import gazetteer
+from services.geocode_client import GeocoderBusyError
+
+NEAR_MISSES = ['Mombasa Road', 'Nairobi West', 'Kenya', 'Lamu Road']
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('Nairobi', 'Nairobi, Nairobi, Kenya'),
+    ('Westlands, Nairobi', 'Westlands, Nairobi, Kenya'),
+    ('Mt Kenya', 'Mount Kenya, Nyeri, Kenya'),
+])
+def test_exact_names_and_aliases_score_one(query, expected):
+    result, score = gazetteer.lookup(query)
+    assert result['display_name'] == expected
+    assert score == 1.0
+
+
+@pytest.mark.parametrize('query', NEAR_MISSES)
+def test_near_misses_are_not_confident(query):
+    _, score = gazetteer.lookup(query)
+    assert score < Config.GAZETTEER_CONFIDENCE
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Point geocode_place at a fake Nominatim, bypassing the persistent cache."""
+    answers = {}
+
+    def geocode(place_name):
+        answer = answers['value']
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(discover_service.nominatim_client, 'geocode', geocode)
+    monkeypatch.setattr(discover_service.geocode_cache, 'get_forward', lambda place_name: (False, None))
+    monkeypatch.setattr(discover_service.geocode_cache, 'set_forward', lambda place_name, result: None)
+    return answers
+
+
+@pytest.mark.parametrize('query', NEAR_MISSES)
+def test_near_misses_do_not_fall_back_to_a_fuzzy_match(upstream, query):
+    upstream['value'] = None
+    assert discover_service.geocode_place(query) is None
+
+    upstream['value'] = ConnectionError('unreachable')
+    assert discover_service.geocode_place(query) is None
+
+    upstream['value'] = GeocoderBusyError(1.0)
+    with pytest.raises(GeocoderBusyError):
+        discover_service.geocode_place(query)
+
+
+def test_exact_match_is_answered_without_nominatim(upstream):
+    upstream['value'] = AssertionError('Nominatim should not be asked')
+    assert discover_service.geocode_place('Kisumu')['display_name'] == 'Kisumu, Kisumu, Kenya'
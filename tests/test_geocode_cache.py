@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from services.geocode_cache import GeocodeCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return GeocodeCache(str(tmp_path / 'geocode.db'), ttl=60, negative_ttl=5, max_entries=3, reverse_precision=3)
+
+
+def test_equivalent_queries_share_a_key(cache):
+    assert cache.forward_key('  Westlands ,Nairobi!') == cache.forward_key('westlands, nairobi')
+    assert cache.forward_key('Nyéri') == cache.forward_key('NYERI')
+    assert cache.forward_key('Thika') != cache.forward_key('Thika Road')
+
+
+def test_reverse_keys_snap_to_the_grid(cache):
+    assert cache.reverse_key(-1.29211, 36.82189) == cache.reverse_key(-1.29249, 36.82151) == 'rev:-1.292,36.822'
+
+
+def test_hits_misses_and_negative_entries(cache):
+    assert cache.get_forward('Nairobi') == (False, None)
+    cache.set_forward('Nairobi', {'lat': -1.29, 'lng': 36.82, 'display_name': 'Nairobi'})
+    cache.set_forward('Atlantis', None)
+    assert cache.get_forward('nairobi') == (True, {'lat': -1.29, 'lng': 36.82, 'display_name': 'Nairobi'})
+    assert cache.get_forward('Atlantis') == (True, None)
+
+
+def test_entries_expire(cache, monkeypatch):
+    cache.set_forward('Nairobi', {'lat': -1.29, 'lng': 36.82, 'display_name': 'Nairobi'})
+    cache.set_forward('Atlantis', None)
+    real_time = time.time
+    monkeypatch.setattr(time, 'time', lambda: real_time() + 10)
+    # Negative entries use the shorter TTL
+    assert cache.get_forward('Atlantis') == (False, None)
+    assert cache.get_forward('Nairobi')[0] is True
+    monkeypatch.setattr(time, 'time', lambda: real_time() + 120)
+    assert cache.get_forward('Nairobi') == (False, None)
+
+
+def test_table_is_trimmed_by_least_recent_use(cache, monkeypatch):
+    monkeypatch.setattr(GeocodeCache, 'EVICT_EVERY', 5)
+    monkeypatch.setattr(GeocodeCache, 'TOUCH_INTERVAL', 0)
+    for name in ('a', 'b', 'c', 'd'):
+        cache.set_forward(name, {'name': name})
+        time.sleep(0.01)
+    cache.get_forward('a')  # refreshes last_used
+    cache.set_forward('e', {'name': 'e'})  # 5th write evicts down to 3
+    assert [name for name in 'abcde' if cache.get_forward(name)[0]] == ['a', 'd', 'e']
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from services.geocode_client import GeocoderBusyError, NominatimClient, SharedTokenBucket
+
+
+class _StubNominatim(BaseHTTPRequestHandler):
+    delay = 0.0
+    hits = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        type(self).hits.append((url.path, params))
+        time.sleep(self.delay)
+        if url.path == '/search':
+            body = [] if params.get('q') == 'nowhere' else \
+                [{'lat': '-1.2921', 'lon': '36.8219', 'display_name': f"{params['q']}, Kenya"}]
+        elif url.path == '/reverse':
+            body = {'display_name': f"Near {params['lat']},{params['lon']}"}
+        else:
+            self.send_error(404)
+            return
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    _StubNominatim.delay = 0.0
+    _StubNominatim.hits = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubNominatim)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", _StubNominatim
+    server.shutdown()
+    server.server_close()
+
+
+def _client(base_url, rate=100.0, burst=100, max_wait=1.0, max_queue=50):
+    return NominatimClient(base_url, 'EcoTrack-AI tests', rate, burst, max_wait, max_queue, timeout=2.0)
+
+
+def test_sync_search_and_reverse(stub_server):
+    base_url, stub = stub_server
+    client = _client(base_url)
+    try:
+        assert client.geocode('Nairobi') == {'lat': -1.2921, 'lng': 36.8219, 'display_name': 'Nairobi, Kenya'}
+        assert client.geocode('nowhere') is None
+        assert client.reverse(-1.29, 36.82) == {'place_name': 'Near -1.29,36.82'}
+        assert [path for path, _ in stub.hits] == ['/search', '/search', '/reverse']
+        assert stub.hits[0][1]['format'] == 'jsonv2'
+    finally:
+        client.close()
+
+
+def test_concurrent_sync_lookups_are_coalesced(stub_server):
+    base_url, stub = stub_server
+    stub.delay = 0.3
+    client = _client(base_url)
+    try:
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            results = list(pool.map(lambda _: client.geocode('Kisumu'), range(5)))
+        assert all(result == results[0] for result in results)
+        assert len(stub.hits) == 1
+    finally:
+        client.close()
+
+
+def test_busy_when_the_rate_limit_queue_is_full(stub_server):
+    base_url, stub = stub_server
+    # One token, refilled every 10 s, and callers won't wait more than 0.5 s
+    client = _client(base_url, rate=0.1, burst=1, max_wait=0.5, max_queue=1)
+    try:
+        assert client.geocode('Eldoret') is not None
+        with pytest.raises(GeocoderBusyError) as excinfo:
+            client.geocode('Thika')
+        assert excinfo.value.retry_after > 0.5
+        assert len(stub.hits) == 1
+    finally:
+        client.close()
+
+
+def test_shared_bucket_is_one_budget_across_instances(tmp_path):
+    path = str(tmp_path / 'limits.db')
+    # Two workers pointing at the same file, 1 request/s with no burst beyond one
+    first = SharedTokenBucket(path, 'nominatim', rate=1.0, burst=1, max_wait=0.5, max_queue=5)
+    second = SharedTokenBucket(path, 'nominatim', rate=1.0, burst=1, max_wait=0.5, max_queue=5)
+    assert first.reserve() == 0.0
+    with pytest.raises(GeocoderBusyError) as excinfo:
+        second.reserve()
+    assert 0.5 < excinfo.value.retry_after <= 1.0
+
+    # A separate limiter name has its own budget
+    other = SharedTokenBucket(path, 'other', rate=1.0, burst=1, max_wait=0.5, max_queue=5)
+    assert other.reserve() == 0.0
@@ -0,0 +1,24 @@
+from flask import jsonify
+
+
+def test_defaults_are_compact_and_keep_insertion_order(app):
+    with app.app_context():
+        assert jsonify({'b': 1, 'a': 2}).data == b'{"b":1,"a":2}'
+
+
+def test_sort_keys_and_compact_are_honoured(app, monkeypatch):
+    monkeypatch.setattr(app.json, 'sort_keys', True)
+    monkeypatch.setattr(app.json, 'compact', False)
+    with app.app_context():
+        assert jsonify({'b': 1, 'a': {'d': 3, 'c': 4}}).data == (
+            b'{\n  "a": {\n    "c": 4,\n    "d": 3\n  },\n  "b": 1\n}\n'
+        )
+        assert app.json.dumps({'b': 1, 'a': 2}) == '{"a":2,"b":1}'
+
+
+def test_debug_mode_pretty_prints_unless_compact(app, monkeypatch):
+    monkeypatch.setattr(app, 'debug', True)
+    with app.app_context():
+        assert jsonify({'a': 1}).data == b'{\n  "a": 1\n}\n'
+        monkeypatch.setattr(app.json, 'compact', True)
+        assert jsonify({'a': 1}).data == b'{"a":1}'
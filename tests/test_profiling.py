@@ -0,0 +1,31 @@
+from app import create_app
+from config import DEFAULT_SECRET_KEY
+from profiling import ProfilingMiddleware, make_profile_token
+
+
+def test_profile_token_is_single_use_across_workers(app):
+    # Two middlewares stand in for two worker processes sharing the app cache
+    first = ProfilingMiddleware(app.wsgi_app, app)
+    second = ProfilingMiddleware(app.wsgi_app, app)
+    token = make_profile_token(app.config['PROFILING_SECRET'])
+
+    options = first._verify(token)
+    assert options['mode'] == 'cprofile'
+    assert first._verify(token) is None
+    assert second._verify(token) is None
+    assert second._verify(make_profile_token(app.config['PROFILING_SECRET'], 'sample'))['mode'] == 'sample'
+
+
+def test_tokens_signed_with_another_key_are_ignored(app):
+    middleware = ProfilingMiddleware(app.wsgi_app, app)
+    assert middleware._verify(make_profile_token(app.config['SECRET_KEY'])) is None
+
+
+def test_profiling_is_refused_without_a_private_secret(monkeypatch):
+    from config import TestingConfig
+
+    for secret in (None, DEFAULT_SECRET_KEY):
+        monkeypatch.setattr(TestingConfig, 'PROFILING_SECRET', secret)
+        app = create_app('testing')
+        assert 'profiling' not in app.extensions
+        assert not isinstance(app.wsgi_app, ProfilingMiddleware)
@@ -0,0 +1,37 @@
+import pytest
+
+from app import db
+from models.user import User
+from query_tracker import QueryBudgetExceeded, query_budget
+
+
+@pytest.fixture
+def activities(client, auth_headers):
+    headers, _ = auth_headers
+    for payload in (
+        {'category': 'energy', 'energy_type': 'electricity', 'energy_amount': 12},
+        {'category': 'transport', 'vehicle_type': 'petrol', 'distance_km': 30},
+        {'category': 'transport', 'vehicle_type': 'diesel', 'distance_km': 8},
+    ):
+        assert client.post('/api/activity/activities', json=payload, headers=headers).status_code == 201
+    return headers
+
+
+@pytest.mark.parametrize('path', ['/api/activity/activities', '/api/activity/summary'])
+def test_activity_reads_run_three_queries(client, activities, query_counter, path):
+    with query_counter(3, n_plus_one_threshold=2):
+        response = client.get(path, headers=activities)
+    assert response.status_code == 200
+    assert response.headers['X-Query-Count'] == '3'
+
+
+def test_strict_budget_fails_the_request(app, client):
+    @app.route('/_test/over-budget')
+    @query_budget(1)
+    def over_budget():
+        db.session.query(User).count()
+        db.session.query(User).first()
+        return 'ok'
+
+    with pytest.raises(QueryBudgetExceeded, match='ran 2 queries, budget is 1'):
+        client.get('/_test/over-budget')
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+from sqlalchemy import text
+
+from app import db
+from slow_query_log import slow_query_log
+from sql_timing import add_consumer, remove_consumer
+
+SLOW_SQL = ("WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter WHERE x < 1000000) "
+            "SELECT count(*) FROM counter")
+
+
+@pytest.fixture
+def timed():
+    calls = []
+
+    def consumer(conn, statement, parameters, executemany, elapsed):
+        calls.append((statement, elapsed))
+
+    add_consumer(consumer)
+    yield calls
+    remove_consumer(consumer)
+
+
+def test_each_statement_is_timed_once_per_consumer(app, timed):
+    with app.app_context():
+        db.session.execute(text('SELECT 1'))
+        with pytest.raises(Exception):
+            db.session.execute(text('SELECT * FROM no_such_table'))
+        db.session.rollback()
+        db.session.execute(text('SELECT 2'))
+        assert not db.session.connection().info.get('query_start')
+    assert [statement for statement, _ in timed] == ['SELECT 1', 'SELECT 2']
+    assert all(elapsed >= 0 for _, elapsed in timed)
+
+
+def test_slow_statement_reaches_the_slow_query_log(app, monkeypatch):
+    monkeypatch.setattr(slow_query_log, 'threshold', 0.01)
+    with app.app_context():
+        assert db.session.execute(text(SLOW_SQL)).scalar() == 1000000
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        summary = slow_query_log.summary(limit=100)
+        matches = [q for q in summary['queries'] if 'RECURSIVE counter' in q['sql']]
+        if matches:
+            break
+        time.sleep(0.05)
+    assert matches, summary
+    assert matches[0]['count'] == 1
+    assert matches[0]['max_ms'] >= 10
+    assert 'tests/test_sql_timing.py' in matches[0]['call_sites'][0]
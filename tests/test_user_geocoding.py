@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from app import db
+from models.user import User
+from services import discover_service, user_service
+from services.geocode_client import GeocoderBusyError
+from services.user_service import geocode_user_location
+
+
+@pytest.fixture
+def user_id(app):
+    with app.app_context():
+        user = User(email='geo@example.com', username='geo', location='Somewhere unusual')
+        user.set_password('Secret123!')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def _geocoded(app, user_id):
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        return user.latitude, user.longitude, user.location_geocoded_at
+
+
+def _stub_geocoder(monkeypatch, answer):
+    def geocode(place_name, raise_errors=False):
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+    monkeypatch.setattr(discover_service, 'geocode_place', geocode)
+
+
+def test_coordinates_are_stored_and_stamped(app, user_id, monkeypatch):
+    _stub_geocoder(monkeypatch, {'lat': -1.29, 'lng': 36.82, 'display_name': 'Nairobi'})
+    geocode_user_location(app, user_id, 'Somewhere unusual')
+    lat, lng, geocoded_at = _geocoded(app, user_id)
+    assert (lat, lng) == (-1.29, 36.82)
+    assert geocoded_at is not None
+
+
+def test_not_found_is_a_definitive_answer(app, user_id, monkeypatch):
+    _stub_geocoder(monkeypatch, None)
+    geocode_user_location(app, user_id, 'Somewhere unusual')
+    lat, lng, geocoded_at = _geocoded(app, user_id)
+    assert (lat, lng) == (None, None)
+    assert geocoded_at is not None
+
+
+def test_busy_returns_retry_after_and_leaves_location_unresolved(app, user_id, monkeypatch):
+    _stub_geocoder(monkeypatch, GeocoderBusyError(2.5))
+    assert geocode_user_location(app, user_id, 'Somewhere unusual') == 2.5
+    assert _geocoded(app, user_id) == (None, None, None)
+
+
+def test_unreachable_leaves_location_unresolved(app, user_id, monkeypatch):
+    _stub_geocoder(monkeypatch, ConnectionError('unreachable'))
+    assert geocode_user_location(app, user_id, 'Somewhere unusual') is None
+    assert _geocoded(app, user_id) == (None, None, None)
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_busy_job_is_requeued_after_retry_after(app, user_id, monkeypatch):
+    answers = [GeocoderBusyError(0.2), {'lat': 0.5, 'lng': 35.3, 'display_name': 'Eldoret'}]
+
+    def geocode(place_name, raise_errors=False):
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(discover_service, 'geocode_place', geocode)
+    assert user_service.schedule_geocode(app, user_id, 'Somewhere unusual')
+    # No worker thread sleeps through the back-off, and a duplicate is not queued twice
+    assert not user_service.schedule_geocode(app, user_id, 'Somewhere unusual')
+    assert _wait_for(lambda: _geocoded(app, user_id)[0] == 0.5)
+    assert _wait_for(lambda: not user_service._geocode_pending)
+
+
+def test_new_location_is_geocoded_while_the_old_one_is_pending(app, user_id, monkeypatch):
+    release = threading.Event()
+
+    def geocode(place_name, raise_errors=False):
+        if place_name == 'Somewhere unusual':
+            release.wait(2)
+        return {'lat': 1.0 if place_name == 'Kitale' else 9.0, 'lng': 35.0, 'display_name': place_name}
+
+    monkeypatch.setattr(discover_service, 'geocode_place', geocode)
+    assert user_service.schedule_geocode(app, user_id, 'Somewhere unusual')
+    with app.app_context():
+        db.session.get(User, user_id).location = 'Kitale'
+        db.session.commit()
+    assert user_service.schedule_geocode(app, user_id, 'Kitale')
+    release.set()
+    assert _wait_for(lambda: not user_service._geocode_pending)
+    assert _geocoded(app, user_id)[0] == 1.0
+
+
+def test_unreachable_geocoder_raises_only_when_asked(monkeypatch):
+    def unreachable(place_name):
+        raise ConnectionError('unreachable')
+    monkeypatch.setattr(discover_service.nominatim_client, 'geocode', unreachable)
+    monkeypatch.setattr(discover_service.gazetteer, 'lookup', lambda place_name: (None, 0.0))
+    assert discover_service.geocode_place('Atlantis') is None
+    with pytest.raises(ConnectionError):
+        discover_service.geocode_place('Atlantis', raise_errors=True)
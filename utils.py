@@ -1,4 +1,8 @@
+import hashlib
+import hmac
 import math
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     R = 6371
@@ -7,4 +11,61 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     dlon = lon2 - lon1
     a = math.sin(dlat / 2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2)**2
     c = 2 * math.asin(math.sqrt(a))
-    return R * c
\ No newline at end of file
+    return R * c
+
+def admin_required(fn):
+    """Require the X-Admin-Token header to match the ADMIN_TOKEN setting."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        expected = current_app.config.get('ADMIN_TOKEN')
+        if not expected:
+            return jsonify({'success': False, 'message': 'Admin API is disabled'}), 403
+        supplied = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(supplied.encode(), expected.encode()):
+            return jsonify({'success': False, 'message': 'Invalid admin token'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def etag_by_user_version(version_column):
+    """Weak ETag from a per-user version column and the query string; matching If-None-Match gets a 304.
+
+    Each resource names the User column that changes exactly when its
+    payload does. Only the version lookup runs for a 304, not the view's
+    own queries. Must sit under @jwt_required().
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            from flask_jwt_extended import get_jwt_identity
+            from sqlalchemy import select
+            from app import db
+            from models.user import User
+
+            row = db.session.execute(
+                select(User.id, getattr(User, version_column).label('version')).where(User.email == get_jwt_identity())
+            ).first()
+            if row is None:
+                return fn(*args, **kwargs)
+
+            # fields= / format= change the body, so the query string is part of the tag
+            query = hashlib.sha1(request.query_string).hexdigest()[:12]
+            version = row.version.isoformat() if hasattr(row.version, 'isoformat') else row.version
+            etag = f"{request.endpoint}-{row.id}-{version}-{query}"
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            # Clients must revalidate, and shared caches must not mix users
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Authorization')
+            return response
+        return wrapper
+    return decorator
+
+
+# Activity lists and summaries: bumped by the routes that write activities
+etag_by_data_version = etag_by_user_version('data_version')